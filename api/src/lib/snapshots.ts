@@ -0,0 +1,87 @@
+import { FastifyReply } from 'fastify'
+import { existsSync, readFileSync, statSync } from 'fs'
+import { join, normalize } from 'path'
+
+// Precomputed responses written by etl/pipelines/assemble.py after each save
+const snapshotDir = process.env.GTI_SNAPSHOT_DIR || join(process.cwd(), '..', 'data', 'snapshots')
+
+interface SnapshotPointer {
+  version: string
+  methodology_version?: string
+  path: string
+  latest_year: number | null
+}
+
+export interface SnapshotBody {
+  body: Buffer
+  encoding?: 'br' | 'gzip'
+  version: string
+  methodologyVersion: string
+}
+
+let pointer: SnapshotPointer | null = null
+let pointerMtime = 0
+const bodies = new Map<string, Buffer | null>()
+
+// Re-read current.json only when the assembler has published a new version
+export function currentSnapshot(): SnapshotPointer | null {
+  const pointerPath = join(snapshotDir, 'current.json')
+  try {
+    const mtime = statSync(pointerPath).mtimeMs
+    if (mtime !== pointerMtime) {
+      pointer = JSON.parse(readFileSync(pointerPath, 'utf8'))
+      pointerMtime = mtime
+      bodies.clear()
+    }
+  } catch {
+    pointer = null
+    pointerMtime = 0
+  }
+  return pointer
+}
+
+function readCached(path: string): Buffer | null {
+  if (!bodies.has(path)) {
+    bodies.set(path, existsSync(path) ? readFileSync(path) : null)
+  }
+  return bodies.get(path) ?? null
+}
+
+// Best precompressed variant of a snapshot file the client accepts, or null when absent
+export function readSnapshot(relativePath: string, acceptEncoding: string | undefined): SnapshotBody | null {
+  const current = currentSnapshot()
+  if (!current) return null
+
+  const base = normalize(join(snapshotDir, current.path, relativePath))
+  if (!base.startsWith(normalize(snapshotDir))) return null
+
+  // Pointers written before methodology_version was recorded: strip the run timestamp
+  const versions = {
+    version: current.version,
+    methodologyVersion: current.methodology_version ?? current.version.replace(/-[^-]*$/, ''),
+  }
+
+  const accepts = acceptEncoding || ''
+  if (accepts.includes('br')) {
+    const body = readCached(`${base}.br`)
+    if (body) return { body, encoding: 'br', ...versions }
+  }
+  if (accepts.includes('gzip')) {
+    const body = readCached(`${base}.gz`)
+    if (body) return { body, encoding: 'gzip', ...versions }
+  }
+
+  const body = readCached(base)
+  return body ? { body, ...versions } : null
+}
+
+export function sendSnapshot(reply: FastifyReply, snapshot: SnapshotBody) {
+  reply
+    .header('Cache-Control', 's-maxage=86400, stale-while-revalidate=604800')
+    .header('X-GTI-Version', snapshot.methodologyVersion)
+    .header('X-GTI-Snapshot', snapshot.version)
+    .header('Vary', 'Accept-Encoding')
+    .header('Content-Type', 'application/json')
+  if (snapshot.encoding) reply.header('Content-Encoding', snapshot.encoding)
+  return reply.send(snapshot.body)
+}
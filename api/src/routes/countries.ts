@@ -1,25 +1,26 @@
 import { FastifyPluginAsync } from 'fastify'
 import db from '../lib/db'
+import { readSnapshot, sendSnapshot } from '../lib/snapshots'
 import { countrySchema, countryResponseSchema } from '../lib/schemas'
 
 const countriesRoute: FastifyPluginAsync = async (fastify) => {
   fastify.get('/countries', async (request, reply) => {
     try {
+      // Serve the precomputed snapshot when the assembler has published one
+      const snapshot = readSnapshot('countries.json', request.headers['accept-encoding'])
+      if (snapshot) return sendSnapshot(reply, snapshot)
+
+      // country_latest is refreshed by the assembler after every save
       const result = await db.query(`
-        SELECT 
+        SELECT
           c.iso3,
           c.name,
           c.region,
-          cy.year as latest_year,
-          cy.gti as latest_gti,
-          cy.confidence_tier
+          cl.latest_year,
+          cl.latest_gti,
+          cl.confidence_tier
         FROM countries c
-        LEFT JOIN country_year cy ON c.iso3 = cy.iso3
-        LEFT JOIN (
-          SELECT iso3, MAX(year) as max_year
-          FROM country_year
-          GROUP BY iso3
-        ) latest ON c.iso3 = latest.iso3 AND cy.year = latest.max_year
+        LEFT JOIN country_latest cl ON c.iso3 = cl.iso3
         ORDER BY c.name
       `)
 
@@ -1,5 +1,6 @@
 import { FastifyPluginAsync } from 'fastify'
 import db from '../lib/db'
+import { readSnapshot, sendSnapshot } from '../lib/snapshots'
 import { countryQuerySchema, countryDetailSchema } from '../lib/schemas'
 
 const countryRoute: FastifyPluginAsync = async (fastify) => {
@@ -8,6 +9,12 @@ const countryRoute: FastifyPluginAsync = async (fastify) => {
       const { iso3 } = request.params as { iso3: string }
       const { from, to } = countryQuerySchema.parse(request.query)
 
+      // Snapshots hold the full series; year-filtered requests still go to the DB
+      if (!from && !to && /^[A-Z]{3}$/.test(iso3)) {
+        const snapshot = readSnapshot(`country/${iso3}.json`, request.headers['accept-encoding'])
+        if (snapshot) return sendSnapshot(reply, snapshot)
+      }
+
       // Get country info
       const countryResult = await db.query(`
         SELECT iso3, name, region FROM countries WHERE iso3 = $1
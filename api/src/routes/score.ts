@@ -1,11 +1,20 @@
 import { FastifyPluginAsync } from 'fastify'
 import db from '../lib/db'
+import { currentSnapshot, readSnapshot, sendSnapshot } from '../lib/snapshots'
 import { scoreQuerySchema, scoreSchema } from '../lib/schemas'
 
 const scoreRoute: FastifyPluginAsync = async (fastify) => {
   fastify.get('/score', async (request, reply) => {
     try {
       const { year, trust_type } = scoreQuerySchema.parse(request.query)
+
+      // Serve the precomputed snapshot when the assembler has published one
+      const latestSnapshotYear = currentSnapshot()?.latest_year
+      const snapshotYear = year || latestSnapshotYear
+      if (snapshotYear) {
+        const snapshot = readSnapshot(`score/${snapshotYear}/${trust_type}.json`, request.headers['accept-encoding'])
+        if (snapshot) return sendSnapshot(reply, snapshot)
+      }
       
       // Default to latest year if not specified
       let targetYear = year
@@ -0,0 +1,45 @@
+-- Global Trust Index Database Schema
+-- Migration 001: Observation change log for incremental assembly
+
+-- Country-years touched by any insert, update or delete on observations
+CREATE TABLE IF NOT EXISTS observation_changes (
+    id BIGSERIAL PRIMARY KEY,
+    iso3 TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    changed_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_observation_changes_country_year ON observation_changes(iso3, year);
+
+-- Statement-level triggers log each distinct key once per statement, so bulk loads stay cheap
+CREATE OR REPLACE FUNCTION log_observation_changes() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO observation_changes (iso3, year)
+        SELECT DISTINCT iso3, year FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO observation_changes (iso3, year)
+        SELECT DISTINCT iso3, year FROM old_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS observations_log_insert ON observations;
+CREATE TRIGGER observations_log_insert
+    AFTER INSERT ON observations
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_observation_changes();
+
+DROP TRIGGER IF EXISTS observations_log_update ON observations;
+CREATE TRIGGER observations_log_update
+    AFTER UPDATE ON observations
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_observation_changes();
+
+DROP TRIGGER IF EXISTS observations_log_delete ON observations;
+CREATE TRIGGER observations_log_delete
+    AFTER DELETE ON observations
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_observation_changes();
@@ -0,0 +1,20 @@
+-- Global Trust Index Database Schema
+-- Migration 002: Data-quality flags written by the QA stage after assembly
+
+CREATE TABLE IF NOT EXISTS quality_flags (
+    id BIGSERIAL PRIMARY KEY,
+    iso3 TEXT REFERENCES countries(iso3),
+    year INTEGER NOT NULL,
+    check_name TEXT NOT NULL CHECK (check_name IN ('yoy_outlier', 'low_sample_size')),
+    subject TEXT NOT NULL,  -- metric for yoy_outlier, source/trust_type for low_sample_size
+    value NUMERIC,
+    threshold NUMERIC,
+    details JSONB,
+    version TEXT,
+    flagged_at TIMESTAMPTZ DEFAULT NOW(),
+
+    -- One flag per check and subject, replaced on every QA run
+    UNIQUE(iso3, year, check_name, subject)
+);
+
+CREATE INDEX IF NOT EXISTS idx_quality_flags_year ON quality_flags(year, check_name);
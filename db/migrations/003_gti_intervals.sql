@@ -0,0 +1,6 @@
+-- Global Trust Index Database Schema
+-- Migration 003: Bootstrap confidence intervals for the GTI (assemble --uncertainty)
+
+ALTER TABLE country_year ADD COLUMN IF NOT EXISTS gti_p5 NUMERIC CHECK (gti_p5 >= 0 AND gti_p5 <= 100);
+ALTER TABLE country_year ADD COLUMN IF NOT EXISTS gti_p50 NUMERIC CHECK (gti_p50 >= 0 AND gti_p50 <= 100);
+ALTER TABLE country_year ADD COLUMN IF NOT EXISTS gti_p95 NUMERIC CHECK (gti_p95 >= 0 AND gti_p95 <= 100);
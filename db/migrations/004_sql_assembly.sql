@@ -0,0 +1,177 @@
+-- Global Trust Index Database Schema
+-- Migration 004: Set-based assembly in SQL (assemble --engine=sql), latest-year view and covering indexes
+
+-- Methodology mirrored from methodology.yaml; the assembler rewrites these tables before each SQL run
+CREATE TABLE IF NOT EXISTS methodology_settings (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),  -- single row
+    version TEXT NOT NULL,
+    minimum_sample_size INTEGER NOT NULL,
+    max_data_age_years INTEGER NOT NULL,
+    survey_grace_years INTEGER NOT NULL,
+    decay_after_grace DOUBLE PRECISION NOT NULL,
+    synced_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Availability bit of each pillar, and whether survey data carries forward between waves
+CREATE TABLE IF NOT EXISTS methodology_pillars (
+    pillar TEXT PRIMARY KEY,
+    bit INTEGER NOT NULL UNIQUE,
+    carried BOOLEAN NOT NULL
+);
+
+-- Trust types that feed a pillar; others do not feed the GTI
+CREATE TABLE IF NOT EXISTS methodology_trust_types (
+    trust_type TEXT PRIMARY KEY,
+    pillar TEXT NOT NULL
+);
+
+-- Source weight within a pillar; unlisted sources take the pillar's mean weight
+CREATE TABLE IF NOT EXISTS methodology_source_weights (
+    pillar TEXT NOT NULL,
+    source TEXT NOT NULL,
+    weight DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (pillar, source)
+);
+
+-- GTI coefficients and confidence tier per pillar availability mask; masks without a rule get no GTI
+CREATE TABLE IF NOT EXISTS methodology_combinations (
+    mask INTEGER PRIMARY KEY,
+    interpersonal DOUBLE PRECISION NOT NULL,
+    institutional DOUBLE PRECISION NOT NULL,
+    governance DOUBLE PRECISION NOT NULL,
+    confidence_tier CHAR(1) NOT NULL CHECK (confidence_tier IN ('A', 'B', 'C')),
+    confidence DOUBLE PRECISION NOT NULL
+);
+
+-- Pillar aggregation, survey carry-forward and GTI combination as one set-based query.
+-- Mirrors aggregate_pillars, carry_forward and Methodology.combine in etl/pipelines:
+-- small-sample observations are dropped, pillar scores are source-weighted means,
+-- carried pillars take the latest year at most max_data_age_years back, and
+-- confidence decays once carried data is older than survey_grace_years.
+-- NULL arguments mean no filter; the key arrays restrict results to (iso3, year) pairs.
+CREATE OR REPLACE FUNCTION assemble_country_year(
+    p_years INTEGER[] DEFAULT NULL,
+    p_sources TEXT[] DEFAULT NULL,
+    p_key_iso3 TEXT[] DEFAULT NULL,
+    p_key_years INTEGER[] DEFAULT NULL
+)
+RETURNS TABLE (
+    iso3 TEXT,
+    year INTEGER,
+    interpersonal DOUBLE PRECISION,
+    institutional DOUBLE PRECISION,
+    governance DOUBLE PRECISION,
+    gti DOUBLE PRECISION,
+    confidence_score DOUBLE PRECISION,
+    confidence_tier CHAR(1),
+    sources_used JSONB
+) AS $$
+    WITH settings AS (
+        SELECT * FROM methodology_settings
+    ),
+    history AS (
+        -- Years whose observations can be carried forward into the requested years
+        SELECT DISTINCT requested.y - age.n AS y
+        FROM unnest(p_years) AS requested(y)
+        CROSS JOIN settings
+        CROSS JOIN generate_series(0, settings.max_data_age_years) AS age(n)
+    ),
+    weighted AS (
+        SELECT o.iso3, o.year, tt.pillar, o.source, o.score_0_100::float8 AS score,
+               COALESCE(sw.weight, fallback.weight, 1.0) AS weight
+        FROM observations o
+        JOIN methodology_trust_types tt ON tt.trust_type = o.trust_type
+        LEFT JOIN methodology_source_weights sw ON sw.pillar = tt.pillar AND sw.source = o.source
+        LEFT JOIN (
+            SELECT w.pillar, AVG(w.weight) AS weight
+            FROM methodology_source_weights w
+            GROUP BY w.pillar
+        ) fallback ON fallback.pillar = tt.pillar
+        CROSS JOIN settings
+        WHERE (o.sample_n IS NULL OR o.sample_n >= settings.minimum_sample_size)
+          AND (p_years IS NULL OR o.year IN (SELECT h.y FROM history h))
+          AND (p_sources IS NULL OR o.source = ANY(p_sources))
+          AND (p_key_iso3 IS NULL OR o.iso3 = ANY(p_key_iso3))
+    ),
+    observed AS (
+        SELECT w.iso3, w.year, w.pillar,
+               SUM(w.score * w.weight) / NULLIF(SUM(w.weight), 0) AS score,
+               jsonb_agg(DISTINCT w.source ORDER BY w.source) AS sources
+        FROM weighted w
+        GROUP BY w.iso3, w.year, w.pillar
+    ),
+    targets AS (
+        -- Country-years with observations in the requested years (or keys)
+        SELECT DISTINCT o.iso3, o.year
+        FROM observed o
+        WHERE (p_years IS NULL OR o.year = ANY(p_years))
+          AND (p_key_iso3 IS NULL OR (o.iso3, o.year) IN (
+              SELECT k.iso3, k.y FROM unnest(p_key_iso3, p_key_years) AS k(iso3, y)
+          ))
+    ),
+    spans AS (
+        -- Years each pillar score serves: its own year, and for carried pillars every
+        -- following year up to the next wave or max_data_age_years, whichever is first
+        SELECT o.iso3, o.year, o.pillar, o.score, o.sources, p.bit, p.carried,
+               LEAST(
+                   LEAD(o.year) OVER (PARTITION BY o.iso3, o.pillar ORDER BY o.year) - 1,
+                   o.year + CASE WHEN p.carried THEN settings.max_data_age_years ELSE 0 END
+               ) AS last_year
+        FROM observed o
+        JOIN methodology_pillars p ON p.pillar = o.pillar
+        CROSS JOIN settings
+        WHERE o.score IS NOT NULL
+    ),
+    latest AS (
+        SELECT t.iso3, t.year, s.pillar, s.score, s.sources, s.bit, s.carried,
+               t.year - s.year AS age
+        FROM spans s
+        CROSS JOIN LATERAL generate_series(s.year, s.last_year) AS covered(y)
+        JOIN targets t ON t.iso3 = s.iso3 AND t.year = covered.y
+    ),
+    pillars AS (
+        SELECT l.iso3, l.year,
+               MAX(l.score) FILTER (WHERE l.pillar = 'interpersonal') AS interpersonal,
+               MAX(l.score) FILTER (WHERE l.pillar = 'institutional') AS institutional,
+               MAX(l.score) FILTER (WHERE l.pillar = 'governance') AS governance,
+               SUM(l.bit) AS mask,
+               COALESCE(MAX(l.age) FILTER (WHERE l.carried), 0) AS age,
+               jsonb_object_agg(l.pillar, l.sources) AS sources_used
+        FROM latest l
+        GROUP BY l.iso3, l.year
+    )
+    SELECT p.iso3, p.year, p.interpersonal, p.institutional, p.governance,
+           c.interpersonal * COALESCE(p.interpersonal, 0)
+               + c.institutional * COALESCE(p.institutional, 0)
+               + c.governance * COALESCE(p.governance, 0),
+           c.confidence * GREATEST(0, LEAST(1,
+               1 - s.decay_after_grace * GREATEST(p.age - s.survey_grace_years, 0)
+           )),
+           c.confidence_tier,
+           p.sources_used
+    FROM pillars p
+    JOIN methodology_combinations c ON c.mask = p.mask
+    CROSS JOIN settings s
+$$ LANGUAGE sql STABLE;
+
+-- Latest computed year per country for /countries; refreshed concurrently after each assembly
+CREATE MATERIALIZED VIEW IF NOT EXISTS country_latest AS
+SELECT DISTINCT ON (cy.iso3)
+    cy.iso3,
+    cy.year AS latest_year,
+    cy.gti AS latest_gti,
+    cy.confidence_tier
+FROM country_year cy
+ORDER BY cy.iso3, cy.year DESC;
+
+-- REFRESH ... CONCURRENTLY requires a unique index
+CREATE UNIQUE INDEX IF NOT EXISTS idx_country_latest_iso3 ON country_latest(iso3);
+
+-- Covering indexes so /score (by year) and /country/:iso3 (series by country) are index-only scans
+CREATE INDEX IF NOT EXISTS idx_country_year_score ON country_year(year)
+    INCLUDE (iso3, gti, interpersonal, institutional, governance, confidence_tier);
+CREATE INDEX IF NOT EXISTS idx_country_year_series ON country_year(iso3, year DESC)
+    INCLUDE (gti, interpersonal, institutional, governance, confidence_tier, confidence_score, sources_used);
+
+-- Superseded by idx_country_year_score
+DROP INDEX IF EXISTS idx_country_year_year;
@@ -0,0 +1,21 @@
+-- Global Trust Index Database Schema
+-- Migration 005: Versioned country_year publishes (shadow table swap, retained versions for rollback)
+
+-- One row per published country_year version. The live version is the country_year table itself;
+-- replaced versions are renamed to country_year__<version tag> and kept until retention drops them
+CREATE TABLE IF NOT EXISTS country_year_versions (
+    version TEXT PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    row_count INTEGER,
+    status TEXT NOT NULL CHECK (status IN ('live', 'retained', 'dropped')),
+    published_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_country_year_versions_live ON country_year_versions(status)
+    WHERE status = 'live';
+
+-- Register the table created by earlier migrations so the first publish can retain it
+INSERT INTO country_year_versions (version, table_name, row_count, status)
+SELECT 'initial', 'country_year', (SELECT COUNT(*) FROM country_year), 'live'
+WHERE NOT EXISTS (SELECT 1 FROM country_year_versions WHERE status = 'live')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark - country-year read cache
+Times the API's /score and /country/:iso3 SQL queries against the memory-mapped cache
+"""
+
+import sys
+import time
+import random
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+import click
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.lib.db import connection
+from etl.pipelines.cache import CountryYearCache, export_cache
+from etl.pipelines.snapshots import TRUST_TYPE_COLUMNS
+
+# The queries api/src/routes/score.ts and country.ts run without a snapshot
+SCORE_SQL = """
+    SELECT cy.iso3, cy.year, cy.{column} AS score, cy.confidence_tier
+    FROM country_year cy
+    JOIN countries c ON cy.iso3 = c.iso3
+    WHERE cy.year = %s AND cy.{column} IS NOT NULL
+    ORDER BY c.name
+"""
+
+SERIES_SQL = """
+    SELECT year, gti, interpersonal, institutional, governance,
+           confidence_tier, confidence_score, sources_used
+    FROM country_year
+    WHERE iso3 = %s
+    ORDER BY year DESC
+"""
+
+
+def time_calls(fn: Callable[[Any], object], args: List) -> Tuple[float, float]:
+    """Median and p95 latency in microseconds of fn over args"""
+    runs = []
+    for arg in args:
+        started = time.perf_counter()
+        fn(arg)
+        runs.append((time.perf_counter() - started) * 1e6)
+    return float(np.median(runs)), float(np.percentile(runs, 95))
+
+
+def check(cache: CountryYearCache, conn, years: List[int], countries: List[str]) -> None:
+    """Fail unless the cache answers exactly what the SQL queries return"""
+    with conn.cursor() as cur:
+        for year in years[:5]:
+            for trust_type, column in TRUST_TYPE_COLUMNS.items():
+                cur.execute(SCORE_SQL.format(column=column), (year,))
+                expected = {iso3: float(score) for iso3, _, score, _ in cur.fetchall()}
+                scores = cache.scores_for_year(year, trust_type)
+                got = dict(zip((c.decode() for c in scores.iso3), scores.values.tolist()))
+                # The SQL join drops country_year rows without a countries entry
+                got = {k: v for k, v in got.items() if k in expected}
+                assert got.keys() == expected.keys(), f"{year}/{trust_type}: countries differ"
+                assert np.allclose(list(got.values()), [expected[k] for k in got]), f"{year}/{trust_type}"
+
+        for iso3 in countries[:20]:
+            cur.execute(SERIES_SQL, (iso3,))
+            rows = cur.fetchall()
+            series = cache.series(iso3)
+            assert [r[0] for r in rows] == series.years.tolist(), f"{iso3}: years differ"
+            gti = [np.nan if r[1] is None else float(r[1]) for r in rows]
+            assert np.allclose(gti, series.values['gti'], equal_nan=True), f"{iso3}: gti differs"
+            assert [r[5] for r in rows] == cache.tier_labels(series.tiers), f"{iso3}: tiers differ"
+
+
+def run(conn, queries: int, cache_path: Optional[Path], seed: int = 42) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = cache_path or Path(tmp) / 'country_year.bin'
+        started = time.perf_counter()
+        export_cache(conn, 'bench', path)
+        print(f"Cache export: {time.perf_counter() - started:.3f}s, {path.stat().st_size / 2**20:.2f} MB")
+
+        started = time.perf_counter()
+        cache = CountryYearCache(path)
+        print(f"Cache open: {(time.perf_counter() - started) * 1e6:.0f}us "
+              f"({len(cache)} rows, {len(cache.codes)} countries, {len(cache.years)} years)")
+
+        rng = random.Random(seed)
+        years = [int(y) for y in cache.years]
+        countries = cache.countries
+        year_args = [(rng.choice(years), rng.choice(list(TRUST_TYPE_COLUMNS))) for _ in range(queries)]
+        country_args = [rng.choice(countries) for _ in range(queries)]
+
+        check(cache, conn, years, countries)
+
+        with conn.cursor() as cur:
+            def sql_score(arg):
+                year, trust_type = arg
+                cur.execute(SCORE_SQL.format(column=TRUST_TYPE_COLUMNS[trust_type]), (year,))
+                return cur.fetchall()
+
+            def sql_series(iso3):
+                cur.execute(SERIES_SQL, (iso3,))
+                return cur.fetchall()
+
+            results = [
+                ('score by year', 'sql', time_calls(sql_score, year_args)),
+                ('score by year', 'cache', time_calls(lambda a: cache.scores_for_year(*a), year_args)),
+                ('country series', 'sql', time_calls(sql_series, country_args)),
+                ('country series', 'cache', time_calls(cache.series, country_args)),
+            ]
+        conn.rollback()
+        cache.close()
+
+    print(f"\n{'query':<16} {'reader':<6} {'median us':>10} {'p95 us':>10}")
+    for query, reader, (median, p95) in results:
+        print(f"{query:<16} {reader:<6} {median:>10.1f} {p95:>10.1f}")
+
+
+@click.command()
+@click.option('--queries', default=500, help='Queries timed per reader and query type')
+@click.option('--cache-path', type=click.Path(dir_okay=False, path_type=Path),
+              help='Keep the exported cache here instead of a temporary file')
+def main(queries: int, cache_path: Optional[Path]):
+    """Compare cache reads with SQL over the current country_year contents"""
+    from dotenv import load_dotenv
+    env_path = project_root / '.env'
+    if env_path.exists():
+        load_dotenv(env_path)
+
+    with connection() as conn:
+        run(conn, queries, cache_path)
+
+
+if __name__ == '__main__':
+    main()
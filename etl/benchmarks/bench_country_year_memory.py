@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark - country-year score memory
+Compares a list of CountryYearScore dataclasses with the CountryYearScores arrays
+"""
+
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+import click
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.benchmarks.bench_save_country_year import make_scores
+from etl.pipelines.scores import CountryYearScores
+
+
+def traced_bytes(build, *args) -> int:
+    """Bytes still allocated after build(*args) returns, while its result is alive"""
+    gc.collect()
+    tracemalloc.start()
+    result = build(*args)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+@click.command()
+@click.option('--sizes', default='10000,100000,1000000', help='Comma-separated country-year counts')
+def main(sizes: str):
+    """Measure retained memory of both representations"""
+    print(f"{'rows':>9} {'dataclasses':>13} {'arrays':>11} {'ratio':>7} {'bytes/row':>16}")
+    for size in (int(s) for s in sizes.split(',')):
+        dataclass_bytes = traced_bytes(make_scores, size)
+        # The input records exist before tracing starts, so only the arrays are counted
+        array_bytes = traced_bytes(CountryYearScores.from_records, make_scores(size))
+
+        print(f"{size:>9,} {dataclass_bytes / 2**20:>11.1f}MB {array_bytes / 2**20:>9.1f}MB "
+              f"{dataclass_bytes / array_bytes:>6.1f}x "
+              f"{dataclass_bytes / size:>7.0f} vs {array_bytes / size:>4.0f}")
+
+
+if __name__ == '__main__':
+    main()
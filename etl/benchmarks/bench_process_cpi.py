@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark - CPI normalization
+Times CPIProcessor.process_cpi_wide on a synthetic multi-year CPI history file
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+import click
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.jobs.cpi import CPIProcessor
+
+REGIONS = ['AME', 'AP', 'ECA', 'MENA', 'SSA', 'WE/EU']
+
+# 40,000 countries x 25 years = 1M country-year cells. TI's real history covers
+# about 180 countries; the synthetic file is scaled up so normalization dominates.
+DEFAULT_COUNTRIES = 40_000
+DEFAULT_YEARS = 25
+
+
+def make_cpi_file(path: Path, n_countries: int = DEFAULT_COUNTRIES, n_years: int = DEFAULT_YEARS,
+                  last_year: int = 2024, unmapped_share: float = 0.01, seed: int = 42) -> int:
+    """Write a synthetic wide CPI history file; returns its country-year cell count
+
+    Like TI's historical release: one row per country with ISO3 and regional
+    columns, a 'CPI YYYY' and 'Rank YYYY' column per year, and blanks for years
+    a country was not scored. The iso_map.csv countries are listed by name only,
+    so the name lookup is exercised too; a few rows cannot be mapped at all.
+    """
+    rng = np.random.default_rng(seed)
+    names = pd.read_csv(project_root / 'data' / 'reference' / 'iso_map.csv')['name'].tolist()
+    named = min(len(names), n_countries)
+
+    countries = names[:named] + [f"Synthetic Country {i:05d}" for i in range(named, n_countries)]
+    iso3 = [''] * named + [f"Q{i:05d}" for i in range(named, n_countries)]
+    unmapped = rng.random(n_countries) < unmapped_share
+    for i in np.flatnonzero(unmapped):
+        countries[i], iso3[i] = f"Unmapped Region {i:05d}", ''
+
+    frame = pd.DataFrame({
+        'Country': countries,
+        'ISO3': iso3,
+        'Region': rng.choice(REGIONS, size=n_countries),
+    })
+
+    # Each country drifts around its own level; some enter the index late
+    years = range(last_year - n_years + 1, last_year + 1)
+    level = rng.uniform(10, 90, size=n_countries)
+    first_year = np.where(rng.random(n_countries) < 0.1, rng.choice(list(years), size=n_countries), years[0])
+    for year in years:
+        level = np.clip(level + rng.normal(0, 2, size=n_countries), 0, 100)
+        scores = np.where(year >= first_year, np.round(level), np.nan)
+        frame[f'CPI {year}'] = scores
+        frame[f'Rank {year}'] = pd.Series(scores).rank(ascending=False, method='min').astype('Int64')
+
+    frame.to_csv(path, index=False)
+    return n_countries * n_years
+
+
+@click.command()
+@click.option('--countries', default=DEFAULT_COUNTRIES, help='Countries in the synthetic file')
+@click.option('--years', default=DEFAULT_YEARS, help='Years of history in the synthetic file')
+def main(countries: int, years: int):
+    """Run the CPI normalization benchmark"""
+    processor = CPIProcessor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'cpi_history.csv'
+        rows = make_cpi_file(path, countries, years)
+
+        started = time.perf_counter()
+        observations, rejects = processor.process_cpi_wide(path)
+        elapsed = time.perf_counter() - started
+
+    print(f"{rows:,} country-years -> {len(observations):,} observations, {len(rejects):,} rejects")
+    print(f"process_cpi_wide: {elapsed:.3f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark - country_year writers
+Compares the bulk COPY writer against row-by-row upserts at increasing row counts
+"""
+
+import sys
+import time
+import random
+from pathlib import Path
+from typing import List
+
+import click
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.lib.db import connection
+from etl.lib.synthetic import BENCH_PREFIX, cleanup, country_code, insert_countries
+from etl.pipelines.assemble import GTIAssembler, CountryYearScore
+from etl.pipelines.scores import CountryYearScores
+
+
+def make_scores(n_rows: int, n_years: int = 50, seed: int = 42) -> List[CountryYearScore]:
+    """Generate synthetic computed scores spread over countries and years"""
+    rng = random.Random(seed)
+    n_countries = max(1, -(-n_rows // n_years))
+    scores = []
+    for i in range(n_rows):
+        governance = rng.uniform(10, 90)
+        institutional = rng.uniform(10, 90)
+        scores.append(CountryYearScore(
+            iso3=country_code(i % n_countries),
+            year=1975 + i // n_countries,
+            institutional=institutional,
+            governance=governance,
+            gti=0.6 * institutional + 0.4 * governance,
+            confidence_score=0.7,
+            confidence_tier='B',
+            sources_used={'governance': ['CPI'], 'institutional': ['OECD']}
+        ))
+    return scores
+
+
+def time_writer(assembler: GTIAssembler, conn, scores: CountryYearScores, bulk: bool) -> float:
+    """Time one save into an empty country_year slice"""
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM country_year WHERE iso3 LIKE %s", (f"{BENCH_PREFIX}%",))
+    conn.commit()
+
+    started = time.perf_counter()
+    assembler.save_country_year_scores(conn, scores, bulk=bulk)
+    return time.perf_counter() - started
+
+
+def run(assembler: GTIAssembler, conn, sizes: List[int], skip_rows_above: int) -> None:
+    """Time both writers at each size"""
+    print(f"{'rows':>8} {'writer':>6} {'seconds':>9} {'rows/s':>10}")
+    for size in sizes:
+        scores = CountryYearScores.from_records(make_scores(size))
+        insert_countries(conn, sorted(set(scores.iso3)))
+
+        for writer, bulk in (('copy', True), ('rows', False)):
+            if not bulk and size > skip_rows_above:
+                print(f"{size:>8} {writer:>6} {'skipped':>9}")
+                continue
+            elapsed = time_writer(assembler, conn, scores, bulk)
+            print(f"{size:>8} {writer:>6} {elapsed:>9.3f} {size / elapsed:>10,.0f}")
+
+
+@click.command()
+@click.option('--sizes', default='200,10000,100000', help='Comma-separated row counts')
+@click.option('--skip-rows-above', default=100000, help='Skip the row-by-row writer above this size')
+def main(sizes: str, skip_rows_above: int):
+    """Run the writer benchmark against the configured database"""
+    from dotenv import load_dotenv
+    env_path = project_root / '.env'
+    if env_path.exists():
+        load_dotenv(env_path)
+
+    assembler = GTIAssembler()
+
+    with connection() as conn:
+        try:
+            run(assembler, conn, [int(s) for s in sizes.split(',')], skip_rows_above)
+        finally:
+            cleanup(conn)
+
+
+if __name__ == '__main__':
+    main()
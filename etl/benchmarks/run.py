@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - Time the ETL and assembly hot paths on synthetic data
+Results are written as JSON; --compare flags regressions against a saved baseline
+"""
+
+import sys
+import json
+import time
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import click
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.benchmarks.bench_process_cpi import DEFAULT_COUNTRIES, DEFAULT_YEARS, make_cpi_file
+from etl.benchmarks.bench_save_country_year import make_scores, time_writer
+from etl.lib.synthetic import cleanup, insert_countries, load_observations, make_observations
+from etl.jobs.cpi import CPIProcessor
+from etl.pipelines.aggregation import aggregate_pillars, carry_forward
+from etl.pipelines.assemble import GTIAssembler
+from etl.pipelines.cache import CountryYearCache, write_cache
+from etl.pipelines.scores import CountryYearScores
+
+DEFAULT_RESULTS_DIR = project_root / 'data' / 'benchmarks'
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Wall time of each of `repeat` calls"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - started)
+    return runs
+
+
+def run_memory_benchmarks(sizes: Dict[str, int], repeat: int) -> Dict[str, Dict]:
+    """Benchmarks that run without a database"""
+    results = {}
+    processor = CPIProcessor()
+    assembler = GTIAssembler()
+    methodology = assembler.methodology
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'cpi_history.csv'
+        cpi_rows = make_cpi_file(path, sizes['cpi_countries'], sizes['cpi_years'])
+        results['process_cpi_wide'] = _result(
+            best_of(lambda: processor.process_cpi_wide(path), repeat), cpi_rows
+        )
+
+    observations = make_observations(sizes['observations'])
+
+    def aggregate():
+        observed = aggregate_pillars(observations, methodology)
+        carry_forward(
+            observed, observed.index, methodology.carried_pillars, methodology.max_data_age_years,
+            methodology.survey_grace_years, methodology.decay_after_grace
+        )
+
+    results['aggregate_pillars'] = _result(best_of(aggregate, repeat), len(observations))
+
+    scores = CountryYearScores.from_records(make_scores(sizes['country_years']))
+    results['compute_gti_scores'] = _result(
+        best_of(lambda: assembler.compute_gti_scores(scores), repeat), len(scores)
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CountryYearCache(write_cache(scores.to_frame(), 'bench', Path(tmp) / 'country_year.bin'))
+
+        def read_cache():
+            for year in cache.years:
+                cache.scores_for_year(int(year))
+
+        results['read_country_year_cache'] = _result(best_of(read_cache, repeat), len(cache))
+        cache.close()
+    return results
+
+
+def run_db_benchmarks(sizes: Dict[str, int], repeat: int) -> Dict[str, Dict]:
+    """Benchmarks against the configured Postgres; synthetic rows are removed afterwards"""
+    from etl.lib.db import connection
+
+    results = {}
+    assembler = GTIAssembler()
+    observations = make_observations(sizes['observations'])
+    latest_year = int(observations['year'].max())
+
+    with connection() as conn:
+        try:
+            cleanup(conn)
+            load_observations(conn, observations)
+
+            results['fetch_pillar_scores'] = _result(
+                best_of(lambda: assembler.fetch_pillar_scores(conn, latest_year), repeat),
+                int((observations['year'] == latest_year).sum())
+            )
+            results['fetch_pillar_scores_all_years'] = _result(
+                best_of(lambda: assembler.fetch_pillar_scores_for_years(conn, None), repeat),
+                len(observations)
+            )
+
+            scores = CountryYearScores.from_records(make_scores(sizes['country_years']))
+            insert_countries(conn, list(set(scores.iso3)))
+            runs = [time_writer(assembler, conn, scores, bulk=True) for _ in range(repeat)]
+            results['save_country_year_scores'] = _result(runs, len(scores))
+        finally:
+            cleanup(conn)
+
+    return results
+
+
+def _result(runs: List[float], rows: int) -> Dict:
+    best = min(runs)
+    return {
+        'seconds': best,
+        'runs': runs,
+        'rows': rows,
+        'rows_per_second': rows / best if best > 0 else None,
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict, threshold: float) -> List[str]:
+    """Print current vs baseline times and return the benchmarks that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<32} {'baseline':>9} {'current':>9} {'change':>8}")
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            print(f"{name:<32} {'-':>9} {result['seconds']:>9.3f} {'new':>8}")
+            continue
+        if previous['rows'] != result['rows']:
+            # Different input sizes are not comparable
+            print(f"{name:<32} {previous['seconds']:>9.3f} {result['seconds']:>9.3f} {'rows differ':>8}")
+            continue
+        change = result['seconds'] / previous['seconds'] - 1
+        marker = '  REGRESSION' if change > threshold else ''
+        print(f"{name:<32} {previous['seconds']:>9.3f} {result['seconds']:>9.3f} {change:>+8.1%}{marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@click.command()
+@click.option('--observations', default=1_000_000, help='Synthetic observations for aggregation and fetch benchmarks')
+@click.option('--country-years', default=100_000, help='Synthetic country-year scores for compute and save')
+@click.option('--cpi-countries', default=DEFAULT_COUNTRIES, help='Countries in the synthetic CPI history file')
+@click.option('--cpi-years', default=DEFAULT_YEARS, help='Years of history in the synthetic CPI file')
+@click.option('--repeat', default=3, help='Runs per benchmark; the fastest is reported')
+@click.option('--skip-db', is_flag=True, help='Only run benchmarks that do not need Postgres')
+@click.option('--output', type=click.Path(dir_okay=False, path_type=Path),
+              default=DEFAULT_RESULTS_DIR / 'latest.json', help='Where to write the results JSON')
+@click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help='Baseline results JSON to compare against')
+@click.option('--threshold', default=0.2, help='Relative slowdown that counts as a regression')
+def main(observations: int, country_years: int, cpi_countries: int, cpi_years: int, repeat: int, skip_db: bool,
+         output: Path, baseline_path: Optional[Path], threshold: float):
+    """Run the benchmark suite and optionally compare with a baseline"""
+    from dotenv import load_dotenv
+    env_path = project_root / '.env'
+    if env_path.exists():
+        load_dotenv(env_path)
+
+    sizes = {
+        'observations': observations, 'country_years': country_years,
+        'cpi_countries': cpi_countries, 'cpi_years': cpi_years,
+    }
+
+    results = run_memory_benchmarks(sizes, repeat)
+    if not skip_db:
+        results.update(run_db_benchmarks(sizes, repeat))
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': sizes,
+        'repeat': repeat,
+        'results': results,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'benchmark':<32} {'rows':>10} {'seconds':>9} {'rows/s':>12}")
+    for name, result in results.items():
+        print(f"{name:<32} {result['rows']:>10,} {result['seconds']:>9.3f} {result['rows_per_second'] or 0:>12,.0f}")
+    print(f"\nResults written to {output}")
+
+    if baseline_path:
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} benchmarks regressed more than {threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"✅ No regressions above {threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Source Adapters - Common download/parse/normalize/load contract for ETL sources
+Subclasses fetch and shape one source; staging, manifests and the COPY upsert are shared
+"""
+
+import io
+import hashlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import pandas as pd
+
+from etl.lib import metrics
+from etl.lib.db import connection
+from etl.lib.manifest import Manifest, file_sha256
+
+project_root = Path(__file__).parent.parent.parent
+
+OBSERVATION_COLUMNS = [
+    'iso3', 'year', 'source', 'trust_type', 'raw_value',
+    'raw_unit', 'score_0_100', 'sample_n', 'method_notes', 'source_url'
+]
+
+# A period is a year, or a label such as 'history' for inputs spanning many years
+Period = Union[int, str]
+
+
+class SourceAdapter(ABC):
+    """Base class for one source's ETL job
+
+    Subclasses set `source` and must implement download, parse and normalize; the
+    orchestrator and CLIs drive them through process and load. Periods default
+    to one per requested year.
+    """
+
+    source: str = ''
+
+    def __init__(self):
+        self.project_root = project_root
+        self.raw_data_dir = self.project_root / 'data' / 'raw'
+        self.staging_dir = self.project_root / 'data' / 'staging'
+        self.reference_dir = self.project_root / 'data' / 'reference'
+
+        # Ensure directories exist
+        self.raw_data_dir.mkdir(parents=True, exist_ok=True)
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+
+        # Content hashes of raw inputs and staging outputs from previous runs
+        self.manifest = Manifest(self.staging_dir / 'manifest.json')
+
+    @property
+    def job(self) -> str:
+        """Job name used for metrics, manifest keys and staging files"""
+        return self.source.lower()
+
+    def periods(self, years: List[int]) -> List[Period]:
+        """Periods to ingest for the requested years"""
+        return list(years)
+
+    @abstractmethod
+    def download(self, period: Period, force: bool = False) -> Path:
+        """Fetch (or locate) the raw input for a period"""
+
+    @abstractmethod
+    def parse(self, raw_path: Path, period: Period) -> pd.DataFrame:
+        """Read the raw input into a source-specific frame"""
+
+    @abstractmethod
+    def normalize(self, parsed: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Map a parsed frame to observations (OBSERVATION_COLUMNS) and rejected rows"""
+
+    def has_input(self, raw_path: Path) -> bool:
+        """False when download found nothing to ingest"""
+        return raw_path.exists()
+
+    def process(self, raw_path: Path, period: Period) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Parse and normalize one period"""
+        observations, rejects = self.normalize(self.parse(raw_path, period))
+        print(f"Processed {len(observations)} {self.source} observations for {period}")
+        return observations, rejects
+
+    def load(self, observations: pd.DataFrame) -> None:
+        """Load observations into database
+
+        Rows are streamed with COPY into a staging table and merged with a single
+        upsert, so a full multi-year history loads as one batch in one transaction.
+        """
+        columns = ', '.join(OBSERVATION_COLUMNS)
+
+        with metrics.stage(self.job, 'db_write', rows_in=len(observations)) as write, connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE observations_staging
+                    (LIKE observations INCLUDING DEFAULTS) ON COMMIT DROP
+                """)
+
+                buffer = io.StringIO()
+                observations.to_csv(buffer, columns=OBSERVATION_COLUMNS, index=False, header=False)
+                buffer.seek(0)
+                cur.copy_expert(
+                    f"COPY observations_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+
+                cur.execute(f"""
+                    INSERT INTO observations ({columns})
+                    SELECT {columns} FROM observations_staging
+                    ON CONFLICT (iso3, year, source, trust_type)
+                    DO UPDATE SET
+                      raw_value = EXCLUDED.raw_value,
+                      raw_unit = EXCLUDED.raw_unit,
+                      score_0_100 = EXCLUDED.score_0_100,
+                      sample_n = EXCLUDED.sample_n,
+                      method_notes = EXCLUDED.method_notes,
+                      source_url = EXCLUDED.source_url,
+                      ingested_at = NOW()
+                """)
+
+                conn.commit()
+                write.rows_out = len(observations)
+                print(f"Loaded {len(observations)} observations to database")
+
+    def input_sha256(self, raw_path: Path) -> str:
+        """Content hash of a raw file, or of every file in a raw directory"""
+        if not raw_path.is_dir():
+            return file_sha256(raw_path)
+        digest = hashlib.sha256()
+        for path in sorted(p for p in raw_path.rglob('*') if p.is_file()):
+            digest.update(f"{path.relative_to(raw_path)}:{file_sha256(path)}\n".encode())
+        return digest.hexdigest()
+
+    def is_up_to_date(self, raw_path: Path, period: Period) -> bool:
+        """True if this raw input was already processed and loaded unchanged"""
+        return self.manifest.is_current(
+            f'{self.job}/{period}', self.input_sha256(raw_path), self.staging_path(period)
+        )
+
+    def record_loaded(self, raw_path: Path, period: Period) -> None:
+        """Record the raw and staging hashes after a successful load"""
+        self.manifest.record(
+            f'{self.job}/{period}', raw_path, self.input_sha256(raw_path), self.staging_path(period)
+        )
+
+    def staging_path(self, period: Period) -> Path:
+        return self.staging_dir / f'{self.job}_{period}.csv'
+
+    def save_staging_data(self, observations: pd.DataFrame, period: Period,
+                          rejects: Optional[pd.DataFrame] = None) -> Path:
+        """Save processed data (and any rejected rows) to staging CSV"""
+        staging_path = self.staging_path(period)
+
+        observations.to_csv(staging_path, index=False)
+        print(f"Saved staging data to {staging_path}")
+
+        if rejects is not None and len(rejects):
+            rejects_path = self.staging_dir / f'{self.job}_{period}_rejects.csv'
+            rejects.to_csv(rejects_path, index=False)
+            print(f"Saved {len(rejects)} rejected rows to {rejects_path}")
+
+        return staging_path
+
+    def run(self, period: Period, force: bool = False, skip_download: bool = False) -> bool:
+        """Download, process, stage and load one period; False if there was nothing to do"""
+        raw_path = self.raw_path(period) if skip_download else self.download(period, force=force)
+        if not self.has_input(raw_path):
+            print(f"No {self.source} input found at {raw_path}, skipping")
+            return False
+
+        # Skip parse and load when the input hash matches the last successful load
+        if not force and self.is_up_to_date(raw_path, period):
+            print(f"{self.source} data for {period} is unchanged since the last load, skipping "
+                  f"(use --force to reload)")
+            return False
+
+        observations, rejects = self.process(raw_path, period)
+        self.save_staging_data(observations, period, rejects)
+        self.load(observations)
+        self.record_loaded(raw_path, period)
+        return True
+
+    def raw_path(self, period: Period) -> Path:
+        """Where download puts the raw input for a period"""
+        return self.raw_data_dir / self.job / str(period)
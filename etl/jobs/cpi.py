@@ -6,33 +6,50 @@ Downloads, processes, and loads CPI data into the trust index database
 
 import os
 import sys
-import requests
+import numpy as np
 import pandas as pd
-import psycopg2
-from psycopg2.extras import execute_values
 import click
 from pathlib import Path
-from typing import Dict, List, Tuple
-import hashlib
+from typing import Dict, List, Optional, Tuple
 import json
+import re
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-class CPIProcessor:
+from etl.lib.downloader import AsyncDownloader, DownloadRequest
+from etl.lib import metrics
+from etl.jobs.adapter import OBSERVATION_COLUMNS, Period, SourceAdapter
+
+# Year columns in TI's historical multi-year release, e.g. 'CPI 2012'
+WIDE_YEAR_COLUMN = re.compile(r'CPI \d{4}')
+
+# Label used for staging and manifest entries of the multi-year file
+HISTORY_LABEL = 'history'
+
+# Stage profiled by --profile
+HOT_STAGE = 'normalize'
+
+# Common name variations not listed in iso_map.csv
+NAME_VARIATIONS = {
+    'United States of America': 'USA',
+    'United Kingdom of Great Britain and Northern Ireland': 'GBR',
+    'Russian Federation': 'RUS'
+}
+
+class CPIProcessor(SourceAdapter):
+    source = 'CPI'
+    
     def __init__(self):
-        self.project_root = project_root
-        self.raw_data_dir = self.project_root / 'data' / 'raw'
-        self.staging_dir = self.project_root / 'data' / 'staging'
-        self.reference_dir = self.project_root / 'data' / 'reference'
-        
-        # Ensure directories exist
-        self.raw_data_dir.mkdir(parents=True, exist_ok=True)
-        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        super().__init__()
         
         # Load ISO mappings
         self.iso_mappings = self._load_iso_mappings()
+        self.iso_lookup = pd.DataFrame(
+            list({**NAME_VARIATIONS, **self.iso_mappings}.items()),
+            columns=['Country', 'mapped_iso3']
+        )
         
     def _load_iso_mappings(self) -> Dict[str, str]:
         """Load country name to ISO3 mappings"""
@@ -44,23 +61,59 @@ class CPIProcessor:
         df = pd.read_csv(iso_map_path)
         return dict(zip(df['name'], df['iso3']))
     
-    def download_cpi_data(self, year: int) -> Path:
+    def download(self, period: Period, force: bool = False) -> Path:
+        if period == HISTORY_LABEL:
+            raise ValueError("The multi-year CPI file is not downloaded; pass it with --wide-file")
+        return self.download_cpi_data(int(period), force)
+    
+    def parse(self, raw_path: Path, period: Period) -> pd.DataFrame:
+        """Long (Country, ISO3, year, score) frame from a single-year or multi-year file"""
+        with metrics.stage('cpi', 'parse') as parse:
+            if period == HISTORY_LABEL:
+                scores = self._parse_wide(raw_path)
+            else:
+                df = pd.read_csv(raw_path)
+                scores = pd.DataFrame({
+                    'Country': df['Country'],
+                    'ISO3': df['ISO3'] if 'ISO3' in df.columns else None,
+                    'year': period,
+                    'score': df[f'CPI {period}']
+                })
+            parse.rows_out = len(scores)
+        return scores
+    
+    def normalize(self, parsed: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        return self.normalize_cpi_frame(parsed)
+    
+    def process(self, raw_path: Path, period: Period) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        if period == HISTORY_LABEL:
+            return self.process_cpi_wide(raw_path)
+        return self.process_cpi_data(raw_path, int(period))
+    
+    def raw_path(self, period: Period) -> Path:
+        return self.raw_data_dir / 'cpi' / str(period) / 'cpi.csv'
+    
+    @metrics.timed('cpi', 'download')
+    def download_cpi_data(self, year: int, force: bool = False) -> Path:
         """Download CPI data for specified year"""
-        # TI publishes CPI data with different URL patterns
-        # For this MVP, we'll simulate the download with mock data
+        # TI publishes CPI data with different URL patterns; set CPI_DOWNLOAD_URL
+        # (e.g. 'https://example.org/cpi/{year}.csv') to fetch real files.
+        # Without it, we simulate the download with mock data
+        if os.getenv('CPI_DOWNLOAD_URL'):
+            return self.download_cpi_years([year], force)[year]
         
         year_dir = self.raw_data_dir / 'cpi' / str(year)
         year_dir.mkdir(parents=True, exist_ok=True)
         
         output_path = year_dir / 'cpi.csv'
         
-        if output_path.exists():
+        if output_path.exists() and not force:
             print(f"CPI data for {year} already exists at {output_path}")
             return output_path
         
         # For MVP: Create mock CPI data based on real 2023 scores
         mock_cpi_data = [
-            {'Country', 'ISO3', f'CPI {year}', 'Rank'},
+            ['Country', 'ISO3', f'CPI {year}', 'Rank'],
             ['Sweden', 'SWE', 76, 5],
             ['United States', 'USA', 69, 15], 
             ['Brazil', 'BRA', 38, 104],
@@ -79,115 +132,118 @@ class CPIProcessor:
         
         print(f"Downloaded mock CPI data for {year} to {output_path}")
         return output_path
+    
+    @metrics.timed('cpi', 'download')
+    def download_cpi_years(self, years: List[int], force: bool = False) -> Dict[int, Path]:
+        """Download several CPI years concurrently from CPI_DOWNLOAD_URL"""
+        url_template = os.getenv('CPI_DOWNLOAD_URL')
+        if not url_template:
+            return {year: self.download_cpi_data(year, force) for year in years}
         
-    def process_cpi_data(self, input_path: Path, year: int) -> List[Tuple]:
-        """Process raw CPI CSV into normalized observations"""
-        df = pd.read_csv(input_path)
+        downloader = AsyncDownloader(
+            self.raw_data_dir,
+            per_host_limit=int(os.getenv('DOWNLOAD_PER_HOST_LIMIT', '4'))
+        )
+        results = downloader.download([
+            DownloadRequest(url_template.format(year=year), 'CPI', year, 'cpi.csv')
+            for year in years
+        ], force=force)
         
-        observations = []
+        for result in results:
+            print(f"CPI {result.request.year}: {result.status} ({result.path})")
+        return {result.request.year: result.path for result in results}
         
-        for _, row in df.iterrows():
-            country_name = row['Country']
-            iso3 = row.get('ISO3') or self._map_country_to_iso3(country_name)
-            
-            if not iso3:
-                print(f"Warning: Could not map '{country_name}' to ISO3 code")
-                continue
-                
-            cpi_score = row[f'CPI {year}']
-            
-            if pd.isna(cpi_score):
-                continue
-                
-            # CPI scores are already 0-100, higher = less corrupt (better governance)
-            observation = (
-                iso3,
-                year,
-                'CPI',  # source
-                'governance',  # trust_type
-                float(cpi_score),  # raw_value
-                'CPI Score (0-100)',  # raw_unit
-                float(cpi_score),  # score_0_100 (already normalized)
-                None,  # sample_n
-                f'Transparency International CPI {year}',  # method_notes
-                f'https://www.transparency.org/en/cpi/{year}'  # source_url
-            )
-            
-            observations.append(observation)
-            
+    def process_cpi_data(self, input_path: Path, year: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Process raw CPI CSV into normalized observations and rejected rows"""
+        observations, rejects = self.normalize_cpi_frame(self.parse(input_path, year))
         print(f"Processed {len(observations)} CPI observations for {year}")
-        return observations
+        return observations, rejects
     
-    def _map_country_to_iso3(self, country_name: str) -> str:
-        """Map country name to ISO3 code"""
-        # Direct lookup
-        if country_name in self.iso_mappings:
-            return self.iso_mappings[country_name]
-            
-        # Fuzzy matching for common variations
-        name_variations = {
-            'United States of America': 'USA',
-            'United Kingdom of Great Britain and Northern Ireland': 'GBR',
-            'Russian Federation': 'RUS'
-        }
-        
-        return name_variations.get(country_name, '')
-        
-    def load_to_database(self, observations: List[Tuple]) -> None:
-        """Load observations into database"""
-        conn = psycopg2.connect(
-            host=os.getenv('POSTGRES_HOST', 'localhost'),
-            port=os.getenv('POSTGRES_PORT', '5432'),
-            database=os.getenv('POSTGRES_DB', 'trust'),
-            user=os.getenv('POSTGRES_USER', 'trust'),
-            password=os.getenv('POSTGRES_PASSWORD', 'trust')
+    def process_cpi_wide(self, input_path: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Process a multi-year CPI file with one 'CPI YYYY' column per year"""
+        scores = self.parse(input_path, HISTORY_LABEL)
+        observations, rejects = self.normalize_cpi_frame(scores)
+        print(f"Processed {len(observations)} CPI observations for {scores['year'].nunique()} years")
+        return observations, rejects
+    
+    def _parse_wide(self, input_path: Path) -> pd.DataFrame:
+        df = pd.read_csv(input_path)
+        
+        year_columns = [c for c in df.columns if WIDE_YEAR_COLUMN.fullmatch(str(c))]
+        if not year_columns:
+            raise ValueError(f"No 'CPI YYYY' columns found in {input_path}")
+        
+        id_columns = ['Country'] + (['ISO3'] if 'ISO3' in df.columns else [])
+        scores = df.melt(
+            id_vars=id_columns, value_vars=year_columns,
+            var_name='year', value_name='score'
         )
+        scores['year'] = scores['year'].str[-4:].astype(int)
+        if 'ISO3' not in scores.columns:
+            scores['ISO3'] = None
+        return scores
+    
+    @metrics.timed('cpi', 'normalize', rows_in='scores')
+    def normalize_cpi_frame(self, scores: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Normalize a long (Country, ISO3, year, score) frame column-wise
         
-        try:
-            with conn.cursor() as cur:
-                execute_values(
-                    cur,
-                    """INSERT INTO observations 
-                       (iso3, year, source, trust_type, raw_value, raw_unit, 
-                        score_0_100, sample_n, method_notes, source_url) 
-                       VALUES %s
-                       ON CONFLICT (iso3, year, source, trust_type) 
-                       DO UPDATE SET
-                         raw_value = EXCLUDED.raw_value,
-                         score_0_100 = EXCLUDED.score_0_100,
-                         method_notes = EXCLUDED.method_notes,
-                         source_url = EXCLUDED.source_url,
-                         ingested_at = NOW()""",
-                    observations
-                )
-                
-                conn.commit()
-                print(f"Loaded {len(observations)} observations to database")
-                
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
-            
-    def save_staging_data(self, observations: List[Tuple], year: int) -> Path:
-        """Save processed data to staging CSV"""
-        staging_path = self.staging_dir / f'cpi_{year}.csv'
+        Returns observations in database column order and a reject frame of rows
+        whose country could not be mapped to ISO3 or whose score is not numeric.
+        Rows with a missing score are dropped silently, as before.
+        """
+        # Vectorized ISO3 mapping: provided code first, then name lookup
+        mapped = scores.merge(self.iso_lookup, on='Country', how='left')
+        provided = mapped['ISO3'].astype('string').str.strip().replace('', pd.NA)
+        iso3 = provided.fillna(mapped['mapped_iso3'].astype('string'))
+        
+        raw_score = mapped['score']
+        score = pd.to_numeric(raw_score, errors='coerce')
         
-        df = pd.DataFrame(observations, columns=[
-            'iso3', 'year', 'source', 'trust_type', 'raw_value', 
-            'raw_unit', 'score_0_100', 'sample_n', 'method_notes', 'source_url'
-        ])
+        unmapped = iso3.isna()
+        invalid = ~unmapped & raw_score.notna() & score.isna()
+        rejects = mapped.loc[unmapped | invalid, ['Country', 'year', 'score']].assign(
+            reason=np.where(unmapped[unmapped | invalid], 'unmapped_country', 'invalid_score')
+        )
         
-        df.to_csv(staging_path, index=False)
-        print(f"Saved staging data to {staging_path}")
+        keep = ~unmapped & score.notna()
+        years = mapped.loc[keep, 'year'].astype(int)
+        # CPI scores are already 0-100, higher = less corrupt (better governance)
+        values = score[keep].astype(float)
         
-        return staging_path
+        observations = pd.DataFrame({
+            'iso3': iso3[keep].astype(str),
+            'year': years,
+            'source': 'CPI',
+            'trust_type': 'governance',
+            'raw_value': values,
+            'raw_unit': 'CPI Score (0-100)',
+            'score_0_100': values,
+            'sample_n': None,
+            'method_notes': 'Transparency International CPI ' + years.astype(str),
+            'source_url': 'https://www.transparency.org/en/cpi/' + years.astype(str)
+        }, columns=OBSERVATION_COLUMNS)
+        
+        # A country listed twice for a year would make the upsert touch one row twice
+        observations = observations.drop_duplicates(
+            ['iso3', 'year', 'source', 'trust_type'], keep='last'
+        ).reset_index(drop=True)
+        
+        if len(rejects):
+            print(f"Warning: rejected {len(rejects)} CPI rows ({rejects['reason'].value_counts().to_dict()})")
+        
+        return observations, rejects.reset_index(drop=True)
 
 @click.command()
 @click.option('--year', default=2024, help='Year to process CPI data for')
 @click.option('--skip-download', is_flag=True, help='Skip download and use existing raw data')
-def main(year: int, skip_download: bool):
+@click.option('--force', is_flag=True, help='Re-download and reload even if the input is unchanged')
+@click.option('--wide-file', type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help="Multi-year CPI file with one 'CPI YYYY' column per year; loads every year at once")
+@click.option('--profile', is_flag=True, help=f"Dump cProfile stats for the '{HOT_STAGE}' stage to data/profiles/")
+@click.option('--metrics-textfile', type=click.Path(dir_okay=False, path_type=Path), envvar='GTI_METRICS_TEXTFILE',
+              help='Write stage metrics to this Prometheus textfile on exit')
+def main(year: int, skip_download: bool, force: bool, wide_file: Optional[Path], profile: bool,
+         metrics_textfile: Optional[Path]):
     """Main CPI ETL process"""
     
     # Load environment
@@ -196,27 +252,39 @@ def main(year: int, skip_download: bool):
     if env_path.exists():
         load_dotenv(env_path)
     
+    metrics.configure('cpi', HOT_STAGE if profile else None, metrics_textfile)
+    
     processor = CPIProcessor()
     
+    if wide_file:
+        run_wide(processor, wide_file, force)
+        return
+    
     print(f"Starting CPI ETL for year {year}")
     
     try:
         # Download data
         if not skip_download:
-            raw_data_path = processor.download_cpi_data(year)
+            raw_data_path = processor.download_cpi_data(year, force=force)
         else:
             raw_data_path = processor.raw_data_dir / 'cpi' / str(year) / 'cpi.csv'
             if not raw_data_path.exists():
                 raise FileNotFoundError(f"Raw data not found at {raw_data_path}")
         
+        # Skip parse and load when the input hash matches the last successful load
+        if not force and processor.is_up_to_date(raw_data_path, year):
+            print(f"CPI data for {year} is unchanged since the last load, skipping (use --force to reload)")
+            return
+        
         # Process data
-        observations = processor.process_cpi_data(raw_data_path, year)
+        observations, rejects = processor.process_cpi_data(raw_data_path, year)
         
         # Save staging data
-        processor.save_staging_data(observations, year)
+        processor.save_staging_data(observations, year, rejects)
         
         # Load to database
-        processor.load_to_database(observations)
+        processor.load(observations)
+        processor.record_loaded(raw_data_path, year)
         
         print(f"✅ CPI ETL completed successfully for year {year}")
         
@@ -224,5 +292,29 @@ def main(year: int, skip_download: bool):
         print(f"❌ CPI ETL failed: {e}")
         sys.exit(1)
 
+def run_wide(processor: CPIProcessor, wide_file: Path, force: bool) -> None:
+    """Load every year of a multi-year CPI file in one pass"""
+    print(f"Starting multi-year CPI ETL from {wide_file}")
+    
+    try:
+        if not force and processor.is_up_to_date(wide_file, HISTORY_LABEL):
+            print(f"{wide_file} is unchanged since the last load, skipping (use --force to reload)")
+            return
+        
+        observations, rejects = processor.process_cpi_wide(wide_file)
+        processor.save_staging_data(observations, HISTORY_LABEL, rejects)
+        processor.load(observations)
+        processor.record_loaded(wide_file, HISTORY_LABEL)
+        
+        years = sorted(observations['year'].unique())
+        if years:
+            print(f"✅ CPI ETL completed successfully for {years[0]}-{years[-1]}")
+        else:
+            print("✅ CPI ETL completed (no observations)")
+        
+    except Exception as e:
+        print(f"❌ CPI ETL failed: {e}")
+        sys.exit(1)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+ESS ETL Job - European Social Survey respondent-level microdata
+Aggregates the cumulative rounds file to weighted country-year 0-10 trust means
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.lib.microdata import MicrodataSpec, MicrodataVariable
+from etl.jobs.survey import MicrodataAdapter, microdata_command
+
+# Nominal fieldwork year of each ESS round
+ESS_ROUND_YEARS = {
+    1: 2002, 2: 2004, 3: 2006, 4: 2008, 5: 2010, 6: 2012,
+    7: 2014, 8: 2016, 9: 2018, 10: 2020, 11: 2023,
+}
+
+# 0-10 items; 77 (refusal), 88 (don't know) and 99 (no answer) fall outside the valid range
+ESS_SPEC = MicrodataSpec(
+    country_column='cntry',
+    year_column='essround',
+    weight_column='anweight',
+    variables=(
+        MicrodataVariable('ppl_trust_index', 'ppltrst', 'interpersonal',
+                          'Mean trust in people (0-10)', 0, 10),
+        MicrodataVariable('trust_parliament', 'trstprl', 'institutional',
+                          'Mean trust in parliament (0-10)', 0, 10),
+    ),
+    year_codes=ESS_ROUND_YEARS,
+)
+
+
+class ESSAdapter(MicrodataAdapter):
+    source = 'ESS'
+    spec = ESS_SPEC
+    country_codes = 'iso2'
+    source_url = 'https://www.europeansocialsurvey.org/data-portal'
+
+
+main = microdata_command(ESSAdapter)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Survey Microdata Adapter - Shared job for respondent-level survey sources
+Streams every file in data/raw/<source>/ through weighted running sums and loads one observation per country-year
+"""
+
+import os
+import sys
+import click
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.lib import metrics
+from etl.lib.downloader import AsyncDownloader, DownloadRequest
+from etl.lib.microdata import DEFAULT_CHUNK_ROWS, MicrodataSpec, aggregate_microdata, microdata_files
+from etl.jobs.adapter import OBSERVATION_COLUMNS, Period, SourceAdapter
+from etl.pipelines.methodology import load_methodology
+
+# Survey files hold every wave, so each source is ingested as one period
+MICRODATA_PERIOD = 'microdata'
+
+# Stage profiled by --profile
+HOT_STAGE = 'parse'
+
+
+class MicrodataAdapter(SourceAdapter):
+    """Adapter for survey sources shipped as respondent-level files
+
+    Subclasses describe the file layout with `spec`. Files are placed in
+    data/raw/<source>/microdata/ by hand (survey licences require
+    registration) or fetched from <SOURCE>_DOWNLOAD_URL. Parsing streams
+    them in chunks across `workers` processes, so memory stays flat
+    however large the files are.
+    """
+
+    spec: MicrodataSpec
+    country_codes: str = 'iso3'  # or 'iso2', mapped through iso_map.csv
+    source_url: str = ''
+
+    def __init__(self, workers: Optional[int] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        super().__init__()
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.methodology = load_methodology()
+        self.iso2_to_iso3 = self._load_iso2_mappings()
+
+    def _load_iso2_mappings(self) -> Dict[str, str]:
+        iso_map_path = self.reference_dir / 'iso_map.csv'
+        if not iso_map_path.exists():
+            return {}
+        df = pd.read_csv(iso_map_path, keep_default_na=False)
+        return dict(zip(df['iso2'], df['iso3']))
+
+    def periods(self, years: List[int]) -> List[Period]:
+        return [MICRODATA_PERIOD]
+
+    def raw_path(self, period: Period) -> Path:
+        return self.raw_data_dir / self.job / str(period)
+
+    def has_input(self, raw_path: Path) -> bool:
+        return bool(microdata_files(raw_path))
+
+    def download(self, period: Period, force: bool = False) -> Path:
+        """Fetch the file at <SOURCE>_DOWNLOAD_URL if set; otherwise use files already in place"""
+        raw_path = self.raw_path(period)
+        raw_path.mkdir(parents=True, exist_ok=True)
+
+        url = os.getenv(f'{self.source}_DOWNLOAD_URL')
+        if url:
+            with metrics.stage(self.job, 'download'):
+                downloader = AsyncDownloader(
+                    self.raw_data_dir,
+                    per_host_limit=int(os.getenv('DOWNLOAD_PER_HOST_LIMIT', '4'))
+                )
+                filename = Path(url.split('?', 1)[0]).name
+                [result] = downloader.download(
+                    [DownloadRequest(url, self.source, period, filename)], force=force
+                )
+                print(f"{self.source}: {result.status} ({result.path})")
+        return raw_path
+
+    def parse(self, raw_path: Path, period: Period) -> pd.DataFrame:
+        """Weighted mean and respondent count per (country, year, variable)"""
+        files = microdata_files(raw_path)
+        with metrics.stage(self.job, 'parse') as parse:
+            print(f"Aggregating {len(files)} {self.source} files "
+                  f"({sum(f.stat().st_size for f in files) / 2**20:,.0f} MB)")
+            means = aggregate_microdata(files, self.spec, self.workers, self.chunk_rows)
+            parse.rows_out = len(means)
+        return means
+
+    def normalize(self, parsed: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Country-year means to observations, applying the methodology's scale per variable"""
+        with metrics.stage(self.job, 'normalize', rows_in=len(parsed)) as normalize:
+            country = parsed['country'].astype(str).str.strip().str.upper()
+            if self.country_codes == 'iso2':
+                iso3 = country.map(self.iso2_to_iso3)
+            else:
+                iso3 = country.where(country.str.fullmatch(r'[A-Z]{3}'))
+
+            unmapped = iso3.isna()
+            rejects = parsed.loc[unmapped, ['country', 'year', 'variable']].assign(reason='unmapped_country')
+
+            kept = parsed[~unmapped]
+            variables = {v.name: v for v in self.spec.variables}
+            score = kept['raw_value'].astype(float).copy()
+            for name, rows in kept.groupby('variable').groups.items():
+                scale = self.methodology.variable_scales.get((self.source, name))
+                if scale:
+                    score[rows] = scale.apply(score[rows])
+
+            weight_column = self.spec.weight_column
+            observations = pd.DataFrame({
+                'iso3': iso3[~unmapped],
+                'year': kept['year'].astype(int),
+                'source': self.source,
+                'trust_type': kept['variable'].map(lambda v: variables[v].trust_type),
+                'raw_value': kept['raw_value'].round(4),
+                'raw_unit': kept['variable'].map(lambda v: variables[v].unit),
+                'score_0_100': score.clip(0, 100).round(4),
+                'sample_n': kept['sample_n'].astype(np.int64),
+                'method_notes': (
+                    f"{self.source} microdata, weighted by {weight_column}: "
+                    + kept['variable'].map(lambda v: variables[v].column)
+                ),
+                'source_url': self.source_url,
+            }, columns=OBSERVATION_COLUMNS)
+
+            observations = observations.sort_values(['iso3', 'year', 'trust_type']).reset_index(drop=True)
+            normalize.rows_out = len(observations)
+
+        if len(rejects):
+            print(f"Warning: rejected {len(rejects)} {self.source} country-years with unmapped country codes")
+        return observations, rejects.reset_index(drop=True)
+
+
+def microdata_command(adapter_cls: Type[MicrodataAdapter]) -> click.Command:
+    """Click entry point for a microdata source"""
+    source = adapter_cls.source
+
+    @click.command()
+    @click.option('--workers', type=int, help='Processes reading file shards (default: all cores)')
+    @click.option('--chunk-rows', default=DEFAULT_CHUNK_ROWS, help='Respondent rows read per chunk')
+    @click.option('--skip-download', is_flag=True, help='Use files already in data/raw without fetching')
+    @click.option('--force', is_flag=True, help='Reload even if the input files are unchanged')
+    @click.option('--profile', is_flag=True, help=f"Dump cProfile stats for the '{HOT_STAGE}' stage to data/profiles/")
+    @click.option('--metrics-textfile', type=click.Path(dir_okay=False, path_type=Path),
+                  envvar='GTI_METRICS_TEXTFILE', help='Write stage metrics to this Prometheus textfile on exit')
+    def main(workers: Optional[int], chunk_rows: int, skip_download: bool, force: bool, profile: bool,
+             metrics_textfile: Optional[Path]):
+        # Load environment
+        from dotenv import load_dotenv
+        env_path = project_root / '.env'
+        if env_path.exists():
+            load_dotenv(env_path)
+
+        adapter = adapter_cls(workers=workers, chunk_rows=chunk_rows)
+        metrics.configure(adapter.job, HOT_STAGE if profile else None, metrics_textfile)
+
+        print(f"Starting {source} microdata ETL")
+        try:
+            adapter.run(MICRODATA_PERIOD, force=force, skip_download=skip_download)
+            print(f"✅ {source} ETL completed successfully")
+
+        except Exception as e:
+            print(f"❌ {source} ETL failed: {e}")
+            sys.exit(1)
+
+    main.help = f"{source} microdata ETL process"
+    return main
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+WVS ETL Job - World Values Survey respondent-level microdata
+Aggregates the integrated time-series file to weighted country-year trust shares
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.lib.microdata import MicrodataSpec, MicrodataVariable
+from etl.jobs.survey import MicrodataAdapter, microdata_command
+
+# Column names of the WVS Time-Series (1981-2022) release; negative codes are missing answers
+WVS_SPEC = MicrodataSpec(
+    country_column='COUNTRY_ALPHA',
+    year_column='S020',
+    weight_column='S017',
+    variables=(
+        # A165: 1 = most people can be trusted, 2 = need to be very careful
+        MicrodataVariable('TRUST_MOST_PEOPLE', 'A165', 'interpersonal',
+                          '% most people can be trusted', 1, 2, trusting=(1,)),
+        # E069_11: confidence in the government, 1 = a great deal ... 4 = none at all
+        MicrodataVariable('trust_gov', 'E069_11', 'institutional',
+                          '% a great deal or quite a lot of confidence in government', 1, 4, trusting=(1, 2)),
+    ),
+)
+
+
+class WVSAdapter(MicrodataAdapter):
+    source = 'WVS'
+    spec = WVS_SPEC
+    country_codes = 'iso3'
+    source_url = 'https://www.worldvaluessurvey.org/WVSDocumentationWVL.jsp'
+
+
+main = microdata_command(WVSAdapter)
+
+if __name__ == '__main__':
+    main()
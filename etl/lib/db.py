@@ -0,0 +1,111 @@
+"""
+Database Session Layer - Shared Postgres connection pool for ETL jobs, assembly and seeding
+Every stage borrows connections from one thread-safe pool, so a single orchestrated run reuses them
+"""
+
+import atexit
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from psycopg2.pool import ThreadedConnectionPool
+
+# Rows pulled per round trip by server-side cursors
+DEFAULT_ITERSIZE = 10000
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_slots: Optional[threading.BoundedSemaphore] = None
+_pool_lock = threading.Lock()
+
+
+def connection_params() -> Dict:
+    """Connection settings from the environment (compose defaults)"""
+    params = {
+        'host': os.getenv('POSTGRES_HOST', 'localhost'),
+        'port': os.getenv('POSTGRES_PORT', '5432'),
+        'database': os.getenv('POSTGRES_DB', 'trust'),
+        'user': os.getenv('POSTGRES_USER', 'trust'),
+        'password': os.getenv('POSTGRES_PASSWORD', 'trust'),
+    }
+
+    timeout_ms = os.getenv('POSTGRES_STATEMENT_TIMEOUT_MS')
+    if timeout_ms:
+        params['options'] = f"-c statement_timeout={int(timeout_ms)}"
+
+    return params
+
+
+def get_pool() -> ThreadedConnectionPool:
+    """Create the process-wide pool on first use"""
+    global _pool, _pool_slots
+
+    with _pool_lock:
+        if _pool is None:
+            max_connections = int(os.getenv('POSTGRES_POOL_SIZE', '8'))
+            _pool = ThreadedConnectionPool(1, max_connections, **connection_params())
+            # psycopg2 raises when the pool is exhausted; the semaphore makes callers wait instead
+            _pool_slots = threading.BoundedSemaphore(max_connections)
+        return _pool
+
+
+def close_pool() -> None:
+    """Close every pooled connection"""
+    global _pool, _pool_slots
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _pool_slots = None
+
+
+atexit.register(close_pool)
+
+
+@contextmanager
+def connection(statement_timeout_ms: Optional[int] = None) -> Iterator:
+    """Borrow a pooled connection
+
+    Callers commit their own work; anything left uncommitted is rolled back when
+    the connection goes back to the pool. statement_timeout_ms overrides the
+    pool-wide POSTGRES_STATEMENT_TIMEOUT_MS for this borrow only.
+    """
+    pool = get_pool()
+    slots = _pool_slots
+    assert slots is not None
+
+    slots.acquire()
+    conn = None
+    try:
+        conn = pool.getconn()
+        if statement_timeout_ms is not None:
+            with conn.cursor() as cur:
+                cur.execute("SET statement_timeout = %s", (int(statement_timeout_ms),))
+            conn.commit()
+
+        yield conn
+
+    finally:
+        if conn is not None:
+            broken = bool(conn.closed)
+            if not broken:
+                try:
+                    conn.rollback()
+                    if statement_timeout_ms is not None:
+                        with conn.cursor() as cur:
+                            cur.execute("RESET statement_timeout")
+                        conn.commit()
+                except Exception:
+                    broken = True
+            pool.putconn(conn, close=broken)
+        slots.release()
+
+
+@contextmanager
+def server_side_cursor(conn, name: str = 'etl', itersize: int = DEFAULT_ITERSIZE) -> Iterator:
+    """Named cursor that streams large result sets instead of fetching them at once"""
+    with conn.cursor(name=f"{name}_{uuid.uuid4().hex[:8]}") as cur:
+        cur.itersize = itersize
+        yield cur
@@ -0,0 +1,161 @@
+"""
+Async Downloader - Concurrent source fetches with conditional requests and resumable transfers
+Files stream to data/raw/<source>/<year>/; ETag and Last-Modified are kept in a local manifest
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# Bytes written per chunk while streaming a response body
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class DownloadRequest:
+    url: str
+    source: str
+    year: int
+    filename: str
+
+
+@dataclass
+class DownloadResult:
+    request: DownloadRequest
+    path: Path
+    status: str  # 'downloaded', 'resumed' or 'not_modified'
+    bytes_received: int = 0
+
+
+class DownloadError(Exception):
+    pass
+
+
+class AsyncDownloader:
+    """Fetch many source files concurrently with per-host limits
+
+    A file that exists locally is revalidated with If-None-Match /
+    If-Modified-Since and left untouched on 304. Interrupted transfers leave a
+    .part file that the next attempt resumes with a Range request, guarded by
+    If-Range so a changed upstream file restarts from scratch.
+    """
+
+    def __init__(self, raw_dir: Path, manifest_path: Optional[Path] = None,
+                 per_host_limit: int = 4, retries: int = 2, timeout_seconds: float = 300):
+        self.raw_dir = raw_dir
+        self.manifest_path = manifest_path or raw_dir / 'download_manifest.json'
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+        self.manifest: Dict[str, Dict] = self._read_manifest()
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def target_path(self, request: DownloadRequest) -> Path:
+        return self.raw_dir / request.source.lower() / str(request.year) / request.filename
+
+    def download(self, requests: List[DownloadRequest], force: bool = False) -> List[DownloadResult]:
+        """Blocking entry point for synchronous ETL jobs"""
+        return asyncio.run(self.fetch_all(requests, force))
+
+    async def fetch_all(self, requests: List[DownloadRequest], force: bool = False) -> List[DownloadResult]:
+        """Fetch every request concurrently; raises if any download fails
+
+        force skips revalidation and downloads every file in full.
+        """
+        if force:
+            for request in requests:
+                self.manifest.pop(request.url, None)
+
+        self._host_limits = {}
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            results = await asyncio.gather(
+                *(self._fetch_with_retries(session, r) for r in requests),
+                return_exceptions=True
+            )
+        self._write_manifest()
+
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise DownloadError(f"{len(errors)} of {len(requests)} downloads failed: {errors[0]}")
+        return [r for r in results if isinstance(r, DownloadResult)]
+
+    async def _fetch_with_retries(self, session: aiohttp.ClientSession,
+                                  request: DownloadRequest) -> DownloadResult:
+        host = urlsplit(request.url).netloc
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with limit:
+                    return await self._fetch(session, request)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise DownloadError(f"{request.url}: {e}") from e
+                # The .part file is kept, so the retry resumes where this attempt stopped
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+        raise DownloadError(f"{request.url}: no attempts made")
+
+    async def _fetch(self, session: aiohttp.ClientSession, request: DownloadRequest) -> DownloadResult:
+        path = self.target_path(request)
+        part_path = path.with_name(path.name + '.part')
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = self.manifest.get(request.url, {})
+        headers = {}
+
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        if offset and entry.get('partial_etag'):
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = entry['partial_etag']
+        elif path.exists():
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        async with session.get(request.url, headers=headers) as response:
+            if response.status == 304:
+                return DownloadResult(request, path, 'not_modified')
+            if response.status not in (200, 206):
+                raise DownloadError(f"{request.url}: HTTP {response.status}")
+
+            resumed = response.status == 206
+            etag = response.headers.get('ETag')
+            # Remember the validator before writing, so an interrupted transfer can resume
+            self.manifest[request.url] = {**entry, 'partial_etag': etag}
+            self._write_manifest()
+
+            received = 0
+            with open(part_path, 'ab' if resumed else 'wb') as f:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    f.write(chunk)
+                    received += len(chunk)
+
+        os.replace(part_path, path)
+        self.manifest[request.url] = {
+            'path': str(path),
+            'etag': etag,
+            'last_modified': response.headers.get('Last-Modified'),
+            'bytes': path.stat().st_size,
+        }
+        return DownloadResult(request, path, 'resumed' if resumed else 'downloaded', received)
+
+    def _read_manifest(self) -> Dict[str, Dict]:
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    def _write_manifest(self) -> None:
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(self.manifest_path.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
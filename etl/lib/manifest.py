@@ -0,0 +1,77 @@
+"""
+Content Manifest - Track content hashes of raw and staging files
+Lets ETL jobs skip parse and load when their inputs have not changed since the last run
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+# Read files in 1 MiB blocks when hashing
+HASH_BLOCK_SIZE = 1 << 20
+
+# Serializes read-modify-write of manifest files between threads of one run
+_write_lock = threading.Lock()
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """JSON manifest mapping job keys to the hashes of their input and output files"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, Dict] = self._read()
+
+    def _read(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.entries.get(key)
+
+    def is_current(self, key: str, input_hash: str, output_path: Path) -> bool:
+        """True if the job already loaded this exact input and its output is intact"""
+        entry = self.entries.get(key)
+        if not entry or entry.get('input_sha256') != input_hash:
+            return False
+        if not output_path.exists():
+            return False
+        return file_sha256(output_path) == entry.get('output_sha256')
+
+    def record(self, key: str, input_path: Path, input_hash: str, output_path: Path) -> None:
+        """Record a completed job and persist the manifest
+
+        Entries written by other jobs since this manifest was loaded are kept.
+        """
+        entry = {
+            'input': str(input_path),
+            'input_sha256': input_hash,
+            'output': str(output_path),
+            'output_sha256': file_sha256(output_path),
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+        }
+        with _write_lock:
+            self.entries = {**self._read(), key: entry}
+            self.save()
+
+    def save(self) -> None:
+        """Write the manifest atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,198 @@
+"""
+Stage Metrics - Wall time, row counts and peak RSS for ETL and assembly stages
+Each finished stage is logged as one JSON line on stderr and can be exported as a Prometheus textfile
+"""
+
+import atexit
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent.parent / 'data' / 'profiles'
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+@dataclass
+class StageMetrics:
+    job: str
+    stage: str
+    seconds: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    peak_rss_bytes: int = 0
+    status: str = 'running'
+
+
+_records: List[StageMetrics] = []
+_records_lock = threading.Lock()
+_active = threading.local()
+# (job, stage) pairs run under cProfile, and where their stats are written
+_profile_stages: Set[Tuple[str, str]] = set()
+_profile_dir: Path = DEFAULT_PROFILE_DIR
+
+
+def peak_rss_bytes() -> int:
+    """Process-wide peak resident set size so far"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+def enable_profiling(job: str, stage_name: str, output_dir: Path = DEFAULT_PROFILE_DIR) -> None:
+    """Run the given stage under cProfile and dump its stats when it finishes"""
+    global _profile_dir
+    _profile_stages.add((job, stage_name))
+    _profile_dir = output_dir
+
+
+def configure(job: str, profile_stage: Optional[str] = None, textfile: Optional[Path] = None) -> None:
+    """Set up a CLI run: optional cProfile for one stage, Prometheus textfile on exit"""
+    if profile_stage:
+        enable_profiling(job, profile_stage)
+    if textfile:
+        atexit.register(write_prometheus_textfile, textfile)
+
+
+@contextmanager
+def stage(job: str, name: str, rows_in: Optional[int] = None) -> Iterator[StageMetrics]:
+    """Time a block and record it as one stage
+
+    Set rows_out (and rows_in, if not known up front) on the yielded record.
+    A stage re-entered while already running in the same thread (e.g. a
+    download helper delegating to another) is only recorded once.
+    """
+    if not hasattr(_active, 'stages'):
+        _active.stages = set()
+    active = _active.stages
+    record = StageMetrics(job, name, rows_in=rows_in)
+    if (job, name) in active:
+        yield record
+        return
+
+    profiler = cProfile.Profile() if (job, name) in _profile_stages else None
+    active.add((job, name))
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+        record.status = 'succeeded'
+    except BaseException:
+        record.status = 'failed'
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        record.seconds = time.perf_counter() - started
+        record.peak_rss_bytes = peak_rss_bytes()
+        active.discard((job, name))
+        with _records_lock:
+            _records.append(record)
+        print(json.dumps({'event': 'stage', **asdict(record)}), file=sys.stderr)
+        if profiler:
+            _dump_profile(profiler, job, name)
+
+
+def timed(job: str, name: str, rows_in: Optional[str] = None) -> Callable:
+    """Decorator form of stage()
+
+    rows_in names an argument whose length is the input row count; rows_out is
+    the length of the return value (or of its first element for tuples).
+    """
+    def decorate(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            count_in = None
+            if rows_in is not None:
+                count_in = _row_count(signature.bind(*args, **kwargs).arguments.get(rows_in))
+            with stage(job, name, rows_in=count_in) as record:
+                result = fn(*args, **kwargs)
+                record.rows_out = _row_count(result)
+                return result
+
+        return wrapper
+    return decorate
+
+
+def recorded_stages() -> List[StageMetrics]:
+    with _records_lock:
+        return list(_records)
+
+
+def write_prometheus_textfile(path: Path, records: Optional[List[StageMetrics]] = None) -> None:
+    """Write stage metrics in the node_exporter textfile format (atomically)
+
+    Repeated runs of a stage (e.g. one download per year) are summed into one
+    series per (job, stage); peak RSS is the maximum.
+    """
+    records = recorded_stages() if records is None else records
+    totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for record in records:
+        total = totals.setdefault((record.job, record.stage), {'runs': 0, 'failures': 0, 'seconds': 0.0})
+        total['runs'] += 1
+        total['failures'] += record.status == 'failed'
+        total['seconds'] += record.seconds
+        for attribute in ('rows_in', 'rows_out'):
+            value = getattr(record, attribute)
+            if value is not None:
+                total[attribute] = total.get(attribute, 0) + value
+        total['peak_rss_bytes'] = max(total.get('peak_rss_bytes', 0), record.peak_rss_bytes)
+
+    metrics = [
+        ('runs', 'gti_etl_stage_runs', 'Times the stage ran'),
+        ('failures', 'gti_etl_stage_failures', 'Times the stage raised'),
+        ('seconds', 'gti_etl_stage_seconds', 'Total wall time of the stage'),
+        ('rows_in', 'gti_etl_stage_rows_in', 'Rows read by the stage'),
+        ('rows_out', 'gti_etl_stage_rows_out', 'Rows produced by the stage'),
+        ('peak_rss_bytes', 'gti_etl_stage_peak_rss_bytes', 'Process peak RSS when the stage finished'),
+    ]
+
+    lines = []
+    for attribute, metric, help_text in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for (job, stage_name), total in totals.items():
+            if attribute in total:
+                lines.append(f'{metric}{{job="{job}",stage="{stage_name}"}} {total[attribute]}')
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path)
+
+
+def _row_count(value) -> Optional[int]:
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if value is None or isinstance(value, (str, bytes, Path)):
+        return None
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def _dump_profile(profiler: cProfile.Profile, job: str, name: str) -> None:
+    output_dir = _profile_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    path = output_dir / f"{job}-{name}-{timestamp}.prof"
+    profiler.dump_stats(path)
+
+    print(f"cProfile for {job}/{name} written to {path}", file=sys.stderr)
+    pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(25)
@@ -0,0 +1,243 @@
+"""
+Survey Microdata - Stream respondent-level files into weighted country-year means
+Files are read in chunks and split into shards across processes; only running sums per (country, year, variable) stay in memory
+"""
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Respondent rows read per chunk
+DEFAULT_CHUNK_ROWS = 200_000
+
+# Uncompressed CSVs larger than this are split into byte-range shards
+MIN_SHARD_BYTES = 64 << 20
+
+# Formats read_chunks understands; CSVs may also be gzip/bz2/zip/xz compressed
+MICRODATA_SUFFIXES = ('.csv', '.gz', '.bz2', '.zip', '.xz', '.dta', '.parquet')
+
+SUM_COLUMNS = ['weight_sum', 'weighted_sum', 'sample_n']
+
+
+@dataclass(frozen=True)
+class MicrodataVariable:
+    """One survey item aggregated to a country-year value
+
+    Answers outside [valid_min, valid_max] (refusals, don't know, not asked)
+    are ignored. With `trusting` codes the value is the weighted share of
+    valid answers in those codes, in percent; otherwise it is the weighted
+    mean answer.
+    """
+    name: str
+    column: str
+    trust_type: str
+    unit: str
+    valid_min: float
+    valid_max: float
+    trusting: Tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class MicrodataSpec:
+    """Where a survey file keeps the country, year, weight and variables"""
+    country_column: str
+    year_column: str
+    weight_column: str
+    variables: Tuple[MicrodataVariable, ...]
+    # Maps year_column codes (e.g. survey rounds) to years; empty = the column holds years
+    year_codes: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(dict.fromkeys(
+            [self.country_column, self.year_column, self.weight_column] + [v.column for v in self.variables]
+        ))
+
+
+@dataclass(frozen=True)
+class Shard:
+    """A whole file, or a byte range of an uncompressed CSV starting on a line boundary"""
+    path: Path
+    start: int = 0
+    stop: Optional[int] = None
+    header: Tuple[str, ...] = ()
+
+
+class WeightedSums:
+    """Running weighted sums per (country, year, variable)
+
+    Chunks and shards are folded in with add/merge, so memory depends on the
+    number of country-years rather than on the number of respondents.
+    """
+
+    def __init__(self, sums: Optional[pd.DataFrame] = None):
+        self.sums = sums if sums is not None else pd.DataFrame(
+            columns=SUM_COLUMNS, index=pd.MultiIndex.from_tuples([], names=['country', 'year', 'variable'])
+        )
+
+    def add(self, chunk: pd.DataFrame, spec: MicrodataSpec) -> None:
+        """Fold one chunk of respondent rows into the sums"""
+        self.merge(WeightedSums(chunk_sums(chunk, spec)))
+
+    def merge(self, other: 'WeightedSums') -> None:
+        if len(self.sums) == 0:
+            self.sums = other.sums
+        elif len(other.sums):
+            self.sums = self.sums.add(other.sums, fill_value=0)
+
+    def means(self) -> pd.DataFrame:
+        """(country, year, variable, raw_value, sample_n) with weighted means"""
+        sums = self.sums[self.sums['weight_sum'] > 0]
+        return pd.DataFrame({
+            'raw_value': sums['weighted_sum'] / sums['weight_sum'],
+            'sample_n': sums['sample_n'].astype(np.int64),
+        }).reset_index()
+
+
+def chunk_sums(chunk: pd.DataFrame, spec: MicrodataSpec) -> pd.DataFrame:
+    """Weighted sums of one chunk, indexed by (country, year, variable)"""
+    country = chunk[spec.country_column].astype('string').str.strip()
+    year = pd.to_numeric(chunk[spec.year_column], errors='coerce')
+    if spec.year_codes:
+        year = year.map(spec.year_codes)
+    weight = pd.to_numeric(chunk[spec.weight_column], errors='coerce')
+    usable = country.notna() & (country != '') & year.notna() & (weight > 0)
+
+    frames = []
+    for variable in spec.variables:
+        answer = pd.to_numeric(chunk[variable.column], errors='coerce')
+        valid = usable & answer.between(variable.valid_min, variable.valid_max)
+        value = answer[valid]
+        if variable.trusting:
+            value = value.isin(variable.trusting) * 100.0
+        w = weight[valid]
+        frames.append(pd.DataFrame({
+            'country': country[valid],
+            'year': year[valid].astype(np.int64),
+            'variable': variable.name,
+            'weight_sum': w,
+            'weighted_sum': w * value,
+            'sample_n': 1,
+        }))
+
+    long = pd.concat(frames, ignore_index=True)
+    return long.groupby(['country', 'year', 'variable'], sort=False)[SUM_COLUMNS].sum()
+
+
+def microdata_files(directory: Path) -> List[Path]:
+    """Survey files in a directory, in a stable order"""
+    if not directory.exists():
+        return []
+    return sorted(p for p in directory.iterdir() if p.is_file() and p.suffix.lower() in MICRODATA_SUFFIXES)
+
+
+def plan_shards(paths: Sequence[Path], workers: int, min_shard_bytes: int = MIN_SHARD_BYTES) -> List[Shard]:
+    """Split files into shards: one per file, large uncompressed CSVs into ~workers byte ranges
+
+    Ranges start on line boundaries, so CSVs must not contain quoted newlines
+    (numeric survey exports do not).
+    """
+    shards = []
+    for path in paths:
+        size = path.stat().st_size
+        if path.suffix.lower() != '.csv' or workers < 2 or size < 2 * min_shard_bytes:
+            shards.append(Shard(path))
+            continue
+
+        with open(path, 'rb') as f:
+            header_line = f.readline()
+            header = tuple(pd.read_csv(io.BytesIO(header_line), nrows=0).columns)
+            boundaries = [f.tell()]
+            n_ranges = min(workers, size // min_shard_bytes)
+            for i in range(1, n_ranges):
+                f.seek(max(boundaries[-1], size * i // n_ranges))
+                f.readline()
+                if f.tell() >= size:
+                    break
+                boundaries.append(f.tell())
+        boundaries.append(size)
+        shards.extend(Shard(path, start, stop, header) for start, stop in zip(boundaries, boundaries[1:]))
+    return shards
+
+
+def read_chunks(shard: Shard, columns: Sequence[str], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Stream the given columns of a shard chunk_rows rows at a time"""
+    suffix = shard.path.suffix.lower()
+
+    if suffix == '.dta':
+        with pd.read_stata(shard.path, columns=list(columns), convert_categoricals=False,
+                           iterator=True, chunksize=chunk_rows) as reader:
+            yield from reader
+        return
+
+    if suffix == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(shard.path).iter_batches(batch_size=chunk_rows, columns=list(columns)):
+            yield batch.to_pandas()
+        return
+
+    if shard.header and shard.stop is not None:
+        # A byte-range shard: read from start up to stop, with the file's header names
+        with open(shard.path, 'rb') as f:
+            f.seek(shard.start)
+            reader = _RangeReader(f, shard.stop - shard.start)
+            yield from pd.read_csv(io.BufferedReader(reader), names=list(shard.header), header=None,
+                                   usecols=list(columns), chunksize=chunk_rows, low_memory=False)
+        return
+
+    yield from pd.read_csv(shard.path, usecols=list(columns), chunksize=chunk_rows, low_memory=False)
+
+
+class _RangeReader(io.RawIOBase):
+    """Raw reader that stops after `remaining` bytes of an open file"""
+
+    def __init__(self, f, remaining: int):
+        self._f = f
+        self._remaining = remaining
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining <= 0:
+            return 0
+        data = self._f.read(min(len(buffer), self._remaining))
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def aggregate_shard(shard: Shard, spec: MicrodataSpec, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
+    """Weighted sums of one shard"""
+    sums = WeightedSums()
+    for chunk in read_chunks(shard, spec.columns, chunk_rows):
+        sums.add(chunk, spec)
+    return sums.sums
+
+
+def aggregate_microdata(paths: Sequence[Path], spec: MicrodataSpec, workers: Optional[int] = None,
+                        chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
+    """Weighted mean and respondent count per (country, year, variable) across all files
+
+    Shards run in a process pool; each returns its sums, which are merged here.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = plan_shards(paths, workers)
+    total = WeightedSums()
+
+    if workers < 2 or len(shards) < 2:
+        for shard in shards:
+            total.merge(WeightedSums(aggregate_shard(shard, spec, chunk_rows)))
+        return total.means()
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+        futures = [pool.submit(aggregate_shard, shard, spec, chunk_rows) for shard in shards]
+        for future in futures:
+            total.merge(WeightedSums(future.result()))
+    return total.means()
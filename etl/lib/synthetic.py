@@ -0,0 +1,219 @@
+"""
+Synthetic Data - Deterministic countries and observations for benchmarks and dev seeding
+Countries follow iso_map.csv's columns; observations follow the observations table with survey waves and gaps
+"""
+
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from etl.jobs.adapter import OBSERVATION_COLUMNS
+
+ISO_MAP_PATH = Path(__file__).parent.parent.parent / 'data' / 'reference' / 'iso_map.csv'
+
+# Synthetic country codes are prefixed so they never collide with real ISO3 codes.
+# Benchmarks clean up after themselves; dev seeding uses its own prefix so they leave it alone.
+BENCH_PREFIX = 'ZB'
+SEED_PREFIX = 'ZS'
+
+DEFAULT_YEARS = range(1995, 2025)
+
+# Share of years missing from annual indices
+ANNUAL_GAP_RATE = 0.03
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    source: str
+    trust_type: str
+    every_years: int  # 1 = annual, otherwise one survey wave per this many years
+    coverage: float  # share of countries the source covers
+    survey: bool  # surveys carry a sample_n
+
+
+DEFAULT_SOURCES = [
+    SourceSpec('CPI', 'governance', 1, 0.95, False),
+    SourceSpec('WGI', 'governance', 1, 0.95, False),
+    SourceSpec('WVS', 'interpersonal', 5, 0.6, True),
+    SourceSpec('WVS', 'institutional', 5, 0.6, True),
+    SourceSpec('ESS', 'interpersonal', 2, 0.2, True),
+    SourceSpec('ESS', 'institutional', 2, 0.2, True),
+    SourceSpec('OECD', 'institutional', 1, 0.2, True),
+]
+
+
+def country_code(i: int, prefix: str = BENCH_PREFIX) -> str:
+    return f"{prefix}{i:05d}"
+
+
+def make_countries(n_countries: int, seed: int = 42, prefix: str = BENCH_PREFIX) -> pd.DataFrame:
+    """Countries with iso_map.csv's columns, sampling its regions and income groups"""
+    rng = np.random.default_rng(seed)
+    reference = pd.read_csv(ISO_MAP_PATH)
+    picks = rng.integers(0, len(reference), size=n_countries)
+    codes = [country_code(i, prefix) for i in range(n_countries)]
+    return pd.DataFrame({
+        'iso3': codes,
+        'iso2': [c[:2] for c in codes],
+        'name': [f"Synthetic {reference['name'].iat[p]} {i}" for i, p in enumerate(picks)],
+        'region': reference['region'].to_numpy()[picks],
+        'income_group': reference['income_group'].to_numpy()[picks],
+    })
+
+
+def rows_per_country(years: Sequence[int], sources: Sequence[SourceSpec] = DEFAULT_SOURCES) -> float:
+    """Expected observations per country over the given years, net of gaps and late survey starts"""
+    n_years = len(years)
+    late_start = 1 - (max(1, n_years // 2) - 1) / (2 * n_years)
+    return sum(
+        s.coverage * n_years / s.every_years * (late_start if s.survey else 1 - ANNUAL_GAP_RATE)
+        for s in sources
+    )
+
+
+def iter_observations(n_countries: int, years: Sequence[int] = DEFAULT_YEARS,
+                      sources: Sequence[SourceSpec] = DEFAULT_SOURCES, seed: int = 42,
+                      chunk_rows: int = 500_000, first_country: int = 0,
+                      prefix: str = BENCH_PREFIX) -> Iterator[pd.DataFrame]:
+    """Observations for n_countries synthetic countries, about chunk_rows rows at a time
+
+    Each chunk covers whole countries and draws from its own generator keyed by
+    the seed and its first country, so the output only depends on the arguments.
+    Countries follow a trend plus a random walk; each source adds a per-country
+    offset and noise. Surveys run in waves with a per-country phase and start
+    year, annual indices miss about 3% of years, and survey sample sizes are
+    log-normal with about 2% below 300.
+    """
+    year_array = np.asarray(list(years))
+    per_chunk = max(1, int(chunk_rows // max(rows_per_country(list(years), sources), 1)))
+    for start in range(first_country, first_country + n_countries, per_chunk):
+        stop = min(start + per_chunk, first_country + n_countries)
+        yield _generate_observations(
+            np.arange(start, stop), year_array, sources, np.random.default_rng([seed, start]), prefix
+        )
+
+
+def _generate_observations(countries: np.ndarray, years: np.ndarray, sources: Sequence[SourceSpec],
+                           rng: np.random.Generator, prefix: str = BENCH_PREFIX) -> pd.DataFrame:
+    n = len(countries)
+    codes = np.array([country_code(i, prefix) for i in countries])
+
+    # Latent trust level per country-year: level + linear trend + random walk
+    level = rng.uniform(20, 80, size=n)
+    trend = rng.normal(0, 0.3, size=n)
+    walk = rng.normal(0, 0.8, size=(n, len(years))).cumsum(axis=1)
+    latent = level[:, None] + trend[:, None] * (years - years[0])[None, :] + walk
+
+    frames = []
+    for spec in sources:
+        covered = rng.random(n) < spec.coverage
+        phase = rng.integers(0, spec.every_years, size=n)
+        present = covered[:, None] & ((years[None, :] - phase[:, None]) % spec.every_years == 0)
+        if spec.survey:
+            # Surveys reach countries at different times
+            first_year = years[0] + rng.integers(0, max(1, len(years) // 2), size=n)
+            present &= years[None, :] >= first_year[:, None]
+        else:
+            present &= rng.random(present.shape) >= ANNUAL_GAP_RATE
+
+        country_idx, year_idx = np.nonzero(present)
+        k = len(country_idx)
+        offset = rng.normal(0, 5, size=n)
+        score = np.clip(
+            latent[country_idx, year_idx] + offset[country_idx] + rng.normal(0, 3, size=k), 0, 100
+        ).round(2)
+        sample_n = pd.array(np.full(k, pd.NA), dtype='Int64')
+        if spec.survey:
+            sizes = np.maximum(rng.lognormal(np.log(1200), 0.35, size=k).astype(np.int64), 300)
+            small = rng.random(k) < 0.02
+            sizes[small] = rng.integers(50, 300, size=int(small.sum()))
+            sample_n = pd.array(sizes, dtype='Int64')
+        frames.append(pd.DataFrame({
+            'iso3': codes[country_idx],
+            'year': years[year_idx],
+            'source': spec.source,
+            'trust_type': spec.trust_type,
+            'raw_value': score,
+            'raw_unit': 'synthetic (0-100)',
+            'score_0_100': score,
+            'sample_n': sample_n,
+            'method_notes': 'synthetic',
+            'source_url': None,
+        }, columns=OBSERVATION_COLUMNS))
+
+    observations = pd.concat(frames, ignore_index=True)
+    return observations.sort_values(['iso3', 'year', 'source', 'trust_type'], kind='stable', ignore_index=True)
+
+
+def make_observations(n_observations: int, years: Sequence[int] = DEFAULT_YEARS,
+                      sources: Sequence[SourceSpec] = DEFAULT_SOURCES, seed: int = 42) -> pd.DataFrame:
+    """At most n_observations rows across as many countries as needed
+
+    Every (iso3, year, source, trust_type) is unique; see iter_observations.
+    """
+    per_country = rows_per_country(list(years), sources)
+    n_countries = max(1, int(np.ceil(n_observations / per_country * 1.05)))
+    observations = pd.concat(
+        iter_observations(n_countries, years, sources, seed, chunk_rows=max(n_observations, 1)),
+        ignore_index=True
+    )
+    # Keep whole countries so each one has a realistic history: drop the one the cut splits
+    kept = observations.head(n_observations)
+    if len(observations) > n_observations and kept['iso3'].nunique() > 1:
+        kept = kept[kept['iso3'] != observations['iso3'].iat[n_observations]]
+    return kept.reset_index(drop=True)
+
+
+def extra_sources(n_sources: int, seed: int = 42) -> List[SourceSpec]:
+    """Additional synthetic survey sources alternating interpersonal and institutional"""
+    rng = np.random.default_rng([seed, n_sources])
+    return [
+        SourceSpec(f"SYN{i:02d}", ('interpersonal', 'institutional')[i % 2],
+                   int(rng.integers(1, 6)), float(rng.uniform(0.2, 0.9)), True)
+        for i in range(n_sources)
+    ]
+
+
+def insert_countries(conn, codes: List[str], prefix: str = BENCH_PREFIX) -> None:
+    """Insert the synthetic countries referenced by benchmark or seeded rows"""
+    countries = make_countries(max(int(c[len(prefix):]) for c in codes) + 1, prefix=prefix)
+    countries = countries[countries['iso3'].isin(set(codes))]
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO countries (iso3, iso2, name, region, income_group)
+            SELECT * FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[], %s::text[])
+            ON CONFLICT (iso3) DO NOTHING
+        """, [countries[c].tolist() for c in ['iso3', 'iso2', 'name', 'region', 'income_group']])
+    conn.commit()
+
+
+def load_observations(conn, observations: pd.DataFrame) -> None:
+    """COPY synthetic observations straight into the observations table"""
+    insert_countries(conn, observations['iso3'].unique().tolist())
+    with conn.cursor() as cur:
+        copy_observations(cur, observations)
+    conn.commit()
+
+
+def copy_observations(cur, observations: pd.DataFrame) -> None:
+    """COPY one frame of observations; the caller commits"""
+    buffer = io.StringIO()
+    observations.to_csv(buffer, columns=OBSERVATION_COLUMNS, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY observations ({', '.join(OBSERVATION_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+
+def cleanup(conn, prefix: str = BENCH_PREFIX) -> None:
+    """Remove every synthetic row with the prefix, including change-log and QA entries"""
+    pattern = f"{prefix}%"
+    with conn.cursor() as cur:
+        for table in ('quality_flags', 'country_year', 'observations', 'observation_changes', 'countries'):
+            cur.execute(f"DELETE FROM {table} WHERE iso3 LIKE %s", (pattern,))
+    conn.commit()
@@ -0,0 +1,151 @@
+"""
+Pillar Aggregation - Array-based aggregation of observations into pillar scores
+Groups all observations by (iso3, year, pillar) at once instead of folding them row by row
+"""
+
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from etl.pipelines.methodology import Methodology
+
+PILLARS = ['interpersonal', 'institutional', 'governance']
+
+# Map trust types to pillars; other trust types do not feed the GTI
+TRUST_TYPE_PILLARS = {
+    'interpersonal': 'interpersonal',
+    'institutional': 'institutional',
+    'governance': 'governance',
+    'cpi': 'governance',
+    'wgi': 'governance',
+}
+
+OBSERVATION_COLUMNS = ['iso3', 'year', 'source', 'trust_type', 'score_0_100', 'sample_n']
+
+# Per-pillar bitmask of contributing sources
+SOURCE_MASK_COLUMNS = [f"{pillar}_sources" for pillar in PILLARS]
+MAX_SOURCE_BITS = 63
+
+
+def empty_observations() -> pd.DataFrame:
+    """Empty observation frame with the expected columns"""
+    return pd.DataFrame(columns=OBSERVATION_COLUMNS)
+
+
+def aggregate_pillars(observations: pd.DataFrame,
+                      methodology: Optional['Methodology'] = None) -> pd.DataFrame:
+    """Aggregate observations into one row per (iso3, year)
+
+    Returns a frame indexed by (iso3, year) with one column per pillar (NaN when
+    the pillar has no observations) and one <pillar>_sources bitmask column per
+    pillar; bit i stands for frame.attrs['sources'][i]. Pillar scores are means
+    of their observations, weighted by the methodology source weights when one
+    is given, so the result does not depend on row order.
+    """
+    obs = observations.assign(pillar=observations['trust_type'].map(TRUST_TYPE_PILLARS))
+    obs = obs[obs['pillar'].notna()]
+    if obs.empty:
+        frame = pd.DataFrame(
+            columns=PILLARS + SOURCE_MASK_COLUMNS,
+            index=pd.MultiIndex.from_arrays([[], []], names=['iso3', 'year'])
+        )
+        frame.attrs['sources'] = ()
+        return frame
+
+    obs = obs.assign(score_0_100=obs['score_0_100'].astype(float))
+    if methodology is not None:
+        weight = methodology.source_weight(obs['pillar'], obs['source'])
+    else:
+        weight = 1.0
+    obs = obs.assign(weight=weight, weighted=obs['score_0_100'] * weight)
+
+    sums = obs.groupby(['iso3', 'year', 'pillar'])[['weighted', 'weight']].sum()
+    scores = (
+        (sums['weighted'] / sums['weight'])
+        .unstack('pillar')
+        .reindex(columns=PILLARS)
+    )
+    scores.columns.name = None
+
+    masks, sources = _source_masks(obs, scores.index)
+    scores[SOURCE_MASK_COLUMNS] = masks
+    scores.attrs['sources'] = sources
+    return scores
+
+
+def _source_masks(obs: pd.DataFrame, index: pd.MultiIndex) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    """Bitmask of contributing sources per pillar for each country-year
+
+    Each (country-year, pillar, source) contributes its bit once, so a grouped
+    sum of the bits equals their bitwise OR.
+    """
+    source_ids, sources = pd.factorize(obs['source'], sort=True)
+    if len(sources) > MAX_SOURCE_BITS:
+        raise ValueError(f"At most {MAX_SOURCE_BITS} distinct sources fit in a source mask")
+
+    bits = obs[['iso3', 'year', 'pillar']].assign(bit=np.left_shift(np.int64(1), source_ids.astype(np.int64)))
+    bits = bits.drop_duplicates()
+    masks = (
+        bits.groupby(['iso3', 'year', 'pillar'])['bit'].sum()
+        .unstack('pillar')
+        .reindex(index=index, columns=PILLARS)
+        .fillna(0)
+        .to_numpy(dtype=np.int64)
+    )
+    return masks, tuple(sources)
+
+
+def carry_forward(pillars: pd.DataFrame, targets: pd.MultiIndex, carried: Sequence[str],
+                  max_age: int, grace_years: int, decay: float) -> pd.DataFrame:
+    """Fill carried pillars of each target country-year from its latest observed year
+
+    One as-of join per pillar over the whole history: each target (iso3, year)
+    takes the most recent score, and its source mask, observed at most max_age
+    years earlier. Returns the pillar frame reindexed to targets with a
+    freshness column: 1.0 for current data, reduced by decay per year once the
+    stalest carried pillar is older than grace_years.
+    """
+    result = pillars.reindex(targets)
+    result.attrs['sources'] = pillars.attrs.get('sources', ())
+    freshness = np.ones(len(result))
+
+    left = pd.DataFrame({
+        'iso3': targets.get_level_values('iso3'),
+        'year': targets.get_level_values('year').astype('int64'),
+        'row': np.arange(len(targets)),
+    }).sort_values('year')
+    target_years = left.sort_values('row')['year'].to_numpy()
+
+    for pillar in carried:
+        mask_column = f"{pillar}_sources"
+        observed = pillars.loc[pillars[pillar].notna(), [pillar, mask_column]].reset_index()
+        observed_masks = observed[mask_column].to_numpy(dtype=np.int64)
+        observed = observed.assign(
+            year=observed['year'].astype('int64'),
+            source_year=observed['year'].astype('int64'),
+            position=np.arange(len(observed))
+        ).sort_values('year')
+
+        matched = pd.merge_asof(
+            left, observed[['iso3', 'year', pillar, 'source_year', 'position']],
+            on='year', by='iso3', direction='backward', tolerance=max_age
+        ).sort_values('row')
+        values = matched[pillar].to_numpy(dtype=float)
+        age = target_years - matched['source_year'].to_numpy(dtype=float)
+        position = matched['position'].to_numpy()
+
+        found = ~np.isnan(values)
+        masks = np.zeros(len(values), dtype=np.int64)
+        masks[found] = observed_masks[position[found].astype(np.int64)]
+        result[pillar] = values
+        result[mask_column] = masks
+
+        stale_years = np.nan_to_num(np.maximum(age - grace_years, 0))
+        freshness = np.minimum(freshness, np.clip(1.0 - decay * stale_years, 0.0, 1.0))
+
+    for mask_column in SOURCE_MASK_COLUMNS:
+        result[mask_column] = result[mask_column].fillna(0).astype(np.int64)
+    result['freshness'] = freshness
+    return result
@@ -4,19 +4,67 @@ Assembly Pipeline - Compute GTI scores from raw observations
 Aggregates pillar scores and computes final GTI with confidence metrics
 """
 
-import os
 import sys
-import psycopg2
 import click
 import json
+import io
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 from dataclasses import dataclass
 
+import numpy as np
+import pandas as pd
+
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from etl.lib import metrics
+from etl.lib.db import connection, server_side_cursor
+from etl.pipelines.aggregation import OBSERVATION_COLUMNS, aggregate_pillars, carry_forward, empty_observations
+from etl.pipelines.cache import DEFAULT_CACHE_PATH, export_cache
+from etl.pipelines.methodology import DEFAULT_METHODOLOGY_PATH, load_methodology
+from etl.pipelines.publish import DEFAULT_MAX_ROW_LOSS, LIVE_TABLE, publish_country_year
+from etl.pipelines.quality import check_quality, filter_small_samples
+from etl.pipelines.scores import CountryYearScores, tier_code
+from etl.pipelines.snapshots import export_snapshots, snapshot_version
+from etl.pipelines.sql_engine import assemble_in_database, refresh_country_latest, sync_methodology
+from etl.pipelines.uncertainty import bootstrap_intervals
+
+# Rows pulled per round trip when streaming observations
+OBSERVATION_FETCH_SIZE = 10000
+
+# Rows buffered per COPY call when bulk-writing country_year
+COPY_CHUNK_SIZE = 50000
+
+# Stage profiled by --profile
+HOT_STAGE = 'aggregate'
+
+COUNTRY_YEAR_COLUMNS = [
+    'iso3', 'year', 'interpersonal', 'institutional', 'governance', 'gti',
+    'gti_p5', 'gti_p50', 'gti_p95',
+    'confidence_score', 'confidence_tier', 'sources_used', 'version'
+]
+
+COUNTRY_YEAR_UPSERT = """
+    ON CONFLICT (iso3, year) 
+    DO UPDATE SET
+        interpersonal = EXCLUDED.interpersonal,
+        institutional = EXCLUDED.institutional,
+        governance = EXCLUDED.governance,
+        gti = EXCLUDED.gti,
+        gti_p5 = EXCLUDED.gti_p5,
+        gti_p50 = EXCLUDED.gti_p50,
+        gti_p95 = EXCLUDED.gti_p95,
+        confidence_score = EXCLUDED.confidence_score,
+        confidence_tier = EXCLUDED.confidence_tier,
+        sources_used = EXCLUDED.sources_used,
+        version = EXCLUDED.version,
+        computed_at = NOW()
+"""
+
+# One score per object; the assembler itself works on CountryYearScores arrays
 @dataclass
 class CountryYearScore:
     iso3: str
@@ -28,196 +76,489 @@ class CountryYearScore:
     confidence_score: float = 0.0
     confidence_tier: str = 'C'
     sources_used: Dict[str, List[str]] = None
+    freshness: float = 1.0
+    gti_p5: Optional[float] = None
+    gti_p50: Optional[float] = None
+    gti_p95: Optional[float] = None
+
+def _as_scores(countries) -> CountryYearScores:
+    """Accept CountryYearScore lists wherever CountryYearScores are expected"""
+    if isinstance(countries, CountryYearScores):
+        return countries
+    return CountryYearScores.from_records(countries)
 
 class GTIAssembler:
-    def __init__(self):
+    def __init__(self, methodology_path: Path = DEFAULT_METHODOLOGY_PATH):
         self.project_root = project_root
         
-        # GTI weights from methodology
-        self.weights = {
-            'interpersonal': 0.3,
-            'institutional': 0.4, 
-            'governance': 0.3
-        }
-        
-    def get_db_connection(self):
-        """Get database connection"""
-        return psycopg2.connect(
-            host=os.getenv('POSTGRES_HOST', 'localhost'),
-            port=os.getenv('POSTGRES_PORT', '5432'),
-            database=os.getenv('POSTGRES_DB', 'trust'),
-            user=os.getenv('POSTGRES_USER', 'trust'),
-            password=os.getenv('POSTGRES_PASSWORD', 'trust')
-        )
-    
-    def fetch_pillar_scores(self, conn, year: int, sources: Optional[List[str]] = None) -> List[CountryYearScore]:
+        # Source weights and GTI combinations compiled from methodology.yaml
+        self.methodology = load_methodology(methodology_path)
+        self._tier_codes = np.array([tier_code(t) for t in self.methodology.tiers], dtype=np.int8)
+        
+        # Version of the last country_year write (published or in place)
+        self.version: Optional[str] = None
+        
+        # Whether the last run wrote or deleted country_year rows; gates export_outputs
+        self.changed = False
+        
+    def fetch_pillar_scores(self, conn, year: int, sources: Optional[List[str]] = None) -> CountryYearScores:
         """Fetch and aggregate pillar scores for all countries in a given year"""
+        return self.fetch_pillar_scores_for_years(conn, [year], sources)
+    
+    def fetch_pillar_scores_for_years(self, conn, years: Optional[List[int]] = None,
+                                      sources: Optional[List[str]] = None,
+                                      keys: Optional[List[Tuple[str, int]]] = None,
+                                      resamples: int = 0, seed: int = 0,
+                                      workers: Optional[int] = None) -> CountryYearScores:
+        """Fetch and aggregate pillar scores for every country-year in one streamed query
         
-        # Build source filter
-        source_filter = ""
-        params = [year]
+        Passing years=None reads the full history; keys restricts the result to
+        specific (iso3, year) pairs. Observations up to max_data_age_years before
+        the requested years are read as well, so survey pillars can be carried
+        forward from the latest wave with one as-of join. With resamples > 0 the
+        bootstrap GTI percentiles are attached as gti_intervals.
+        """
+        history_years = self.methodology.history_years(years) if years is not None else None
+        history_keys = None
+        if keys is not None:
+            history_keys = sorted({
+                (iso3, year - age)
+                for iso3, year in keys
+                for age in range(self.methodology.max_data_age_years + 1)
+            })
+        
+        observations = self.fetch_observations(conn, history_years, sources, history_keys)
+        print(f"Fetched {len(observations)} observations")
+        
+        with metrics.stage('assemble', 'aggregate', rows_in=len(observations)) as aggregate:
+            observations, dropped = filter_small_samples(observations, self.methodology.minimum_sample_size)
+            if len(dropped):
+                print(f"Excluded {len(dropped)} observations with sample_n below "
+                      f"{self.methodology.minimum_sample_size}")
+            
+            observed = aggregate_pillars(observations, self.methodology)
+            
+            # Only country-years with observations in the requested years get a score
+            targets = observed.index
+            if years is not None:
+                targets = targets[targets.get_level_values('year').isin(years)]
+            if keys is not None:
+                targets = targets[targets.isin(pd.MultiIndex.from_tuples(keys, names=targets.names))]
+            
+            pillars = carry_forward(
+                observed, targets, self.methodology.carried_pillars,
+                self.methodology.max_data_age_years,
+                self.methodology.survey_grace_years,
+                self.methodology.decay_after_grace
+            )
+            aggregate.rows_out = len(pillars)
+        scores = CountryYearScores.from_frame(pillars)
+        
+        if resamples > 0:
+            with metrics.stage('assemble', 'uncertainty', rows_in=len(targets)) as uncertainty:
+                scores.gti_intervals = bootstrap_intervals(
+                    observations, targets, self.methodology, resamples, seed, workers
+                )
+                uncertainty.rows_out = len(targets)
+            print(f"Bootstrapped GTI intervals from {resamples} resamples")
+        return scores
+    
+    @metrics.timed('assemble', 'db_read')
+    def fetch_observations(self, conn, years: Optional[List[int]] = None,
+                           sources: Optional[List[str]] = None,
+                           keys: Optional[List[Tuple[str, int]]] = None) -> pd.DataFrame:
+        """Stream observations for the given years (or country-year keys) into a DataFrame"""
+        
+        # Build filters
+        filters = []
+        params: List = []
+        if keys is not None:
+            filters.append("(iso3, year) IN (SELECT * FROM unnest(%s::text[], %s::int[]))")
+            params.append([k[0] for k in keys])
+            params.append([k[1] for k in keys])
+        if years is not None:
+            filters.append("year = ANY(%s)")
+            params.append(list(years))
         if sources:
-            placeholders = ','.join(['%s'] * len(sources))
-            source_filter = f"AND source IN ({placeholders})"
-            params.extend(sources)
+            filters.append("source = ANY(%s)")
+            params.append(list(sources))
+        where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
         
-        with conn.cursor() as cur:
-            # Get all observations for the year
+        chunks = []
+        
+        # Server-side cursor so the full history is streamed rather than fetched at once
+        with server_side_cursor(conn, 'gti_observations', OBSERVATION_FETCH_SIZE) as cur:
             cur.execute(f"""
-                SELECT 
-                    iso3, 
-                    source, 
-                    trust_type, 
-                    score_0_100,
-                    method_notes
+                SELECT {', '.join(OBSERVATION_COLUMNS)}
                 FROM observations 
-                WHERE year = %s {source_filter}
-                ORDER BY iso3, trust_type, source
+                {where_clause}
             """, params)
             
-            observations = cur.fetchall()
-        
-        # Group by country
-        country_data = {}
-        for iso3, source, trust_type, score, method_notes in observations:
-            if iso3 not in country_data:
-                country_data[iso3] = CountryYearScore(
-                    iso3=iso3, 
-                    year=year,
-                    sources_used={}
-                )
-            
-            country = country_data[iso3]
+            while True:
+                rows = cur.fetchmany(OBSERVATION_FETCH_SIZE)
+                if not rows:
+                    break
+                chunks.append(pd.DataFrame.from_records(rows, columns=OBSERVATION_COLUMNS))
+        
+        if not chunks:
+            return empty_observations()
+        return pd.concat(chunks, ignore_index=True)
+    
+    def find_dirty_keys(self, conn, years: Optional[List[int]] = None) -> Tuple[List[Tuple[str, int]], int]:
+        """Find country-years whose observations changed since they were last computed
+        
+        Combines observations ingested after their stored computed_at with keys
+        from the observation_changes log, which records every insert, update and
+        delete, so new and emptied country-years come from the log. A change also
+        dirties the following max_data_age_years, which may carry it forward.
+        Returns the keys and the change-log watermark to clear once they are saved.
+        """
+        watermark = self.change_log_watermark(conn)
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT dirty.iso3, dirty.year FROM (
+                    SELECT o.iso3, o.year
+                    FROM observations o
+                    JOIN country_year cy ON cy.iso3 = o.iso3 AND cy.year = o.year
+                    WHERE o.ingested_at > cy.computed_at
+                    UNION
+                    SELECT iso3, year
+                    FROM observation_changes
+                    WHERE id <= %s
+                ) dirty
+                ORDER BY dirty.iso3, dirty.year
+            """, [watermark])
             
-            # Map trust types to pillars
-            if trust_type in ['interpersonal']:
-                country.interpersonal = self._aggregate_pillar_scores(
-                    country.interpersonal, score, source, trust_type
-                )
-                self._add_source_used(country, 'interpersonal', source)
-                
-            elif trust_type in ['institutional']:
-                country.institutional = self._aggregate_pillar_scores(
-                    country.institutional, score, source, trust_type
-                )
-                self._add_source_used(country, 'institutional', source)
-                
-            elif trust_type in ['governance', 'cpi', 'wgi']:
-                country.governance = self._aggregate_pillar_scores(
-                    country.governance, score, source, trust_type
-                )
-                self._add_source_used(country, 'governance', source)
+            changed = cur.fetchall()
         
-        return list(country_data.values())
+        max_age = self.methodology.max_data_age_years
+        keys = sorted({
+            (iso3, year + age)
+            for iso3, year in changed
+            for age in range(max_age + 1)
+            if years is None or year + age in years
+        })
+        return keys, watermark
     
-    def _aggregate_pillar_scores(self, current_score: Optional[float], new_score: float, 
-                               source: str, trust_type: str) -> float:
-        """Aggregate multiple scores for a pillar (simple average for MVP)"""
-        if current_score is None:
-            return new_score
-        
-        # For MVP: simple average
-        # In production, this would use weighted averages based on methodology
-        return (current_score + new_score) / 2
+    def change_log_watermark(self, conn) -> int:
+        """Highest observation_changes id logged so far"""
+        with conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM observation_changes")
+            return cur.fetchone()[0]
     
-    def _add_source_used(self, country: CountryYearScore, pillar: str, source: str):
-        """Track sources used for each pillar"""
-        if country.sources_used is None:
-            country.sources_used = {}
-            
-        if pillar not in country.sources_used:
-            country.sources_used[pillar] = []
-            
-        if source not in country.sources_used[pillar]:
-            country.sources_used[pillar].append(source)
+    def clear_observation_changes(self, conn, watermark: int) -> None:
+        """Drop change-log entries up to the watermark (committed with the next save)"""
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM observation_changes WHERE id <= %s", (watermark,))
+    
+    def delete_country_years(self, conn, keys: List[Tuple[str, int]]) -> int:
+        """Delete stored scores for keys about to be rewritten (committed with the next save)
+        
+        Dirty country-years that no longer get a GTI, e.g. because all their
+        observations were deleted, are dropped instead of keeping a stale score.
+        """
+        with conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM country_year
+                WHERE (iso3, year) IN (SELECT * FROM unnest(%s::text[], %s::int[]))
+            """, ([k[0] for k in keys], [k[1] for k in keys]))
+            return cur.rowcount
+    
+    def _is_full_rebuild(self, years: Optional[List[int]], sources: Optional[List[str]],
+                         keys: Optional[List[Tuple[str, int]]]) -> bool:
+        """True for a run over every year and source, which replaces country_year outright"""
+        return years is None and keys is None and not sources
+    
+    def _start_changes(self, conn, years: Optional[List[int]], sources: Optional[List[str]],
+                       incremental: bool) -> Tuple[Optional[List[Tuple[str, int]]], Optional[int]]:
+        """Dirty keys for an incremental run, and the change-log watermark the run clears
+        
+        A full rebuild (every year and source) recomputes every logged change, so
+        it clears the log as well; other runs leave it alone.
+        """
+        if incremental:
+            keys, watermark = self.find_dirty_keys(conn, years)
+            print(f"Found {len(keys)} changed country-years")
+            return keys, watermark
+        if self._is_full_rebuild(years, sources, None):
+            return None, self.change_log_watermark(conn)
+        return None, None
     
-    def compute_gti_scores(self, countries: List[CountryYearScore]) -> List[CountryYearScore]:
-        """Compute GTI scores and confidence metrics"""
-        
-        for country in countries:
-            # Count available pillars
-            pillars_available = []
-            if country.interpersonal is not None:
-                pillars_available.append('interpersonal')
-            if country.institutional is not None:
-                pillars_available.append('institutional')  
-            if country.governance is not None:
-                pillars_available.append('governance')
+    def _finish_changes(self, conn, keys: Optional[List[Tuple[str, int]]], watermark: Optional[int]) -> int:
+        """Clear the change log and stale dirty rows in the run's transaction; returns the rows deleted"""
+        if watermark is not None:
+            self.clear_observation_changes(conn, watermark)
+        if keys is not None:
+            return self.delete_country_years(conn, keys)
+        return 0
+    
+    def quality_gate(self, years: Optional[List[int]], strict: bool) -> Callable[[object, str], None]:
+        """check(conn, table) hook that stores QA flags for a write before it commits
+        
+        With strict, an outlier raises QualityGateError and the write is rolled back.
+        """
+        def check(conn, table: str) -> None:
+            with metrics.stage('assemble', 'quality') as quality:
+                quality.rows_out = len(check_quality(conn, self.methodology, years, strict=strict, table=table))
+        return check
+    
+    @metrics.timed('assemble', 'compute', rows_in='countries')
+    def compute_gti_scores(self, countries: Union[CountryYearScores, List[CountryYearScore]]) -> CountryYearScores:
+        """Compute GTI scores and confidence metrics
+        
+        All country-years are combined in one weighted sum using the coefficient
+        row for their set of available pillars (full blend, two-pillar
+        reweighting or governance proxy). The tier confidence is scaled by the
+        freshness of carried-forward survey data. Only rows with a GTI are returned.
+        """
+        scores = _as_scores(countries)
+        
+        gti, masks = self.methodology.combine(scores.pillars)
+        scores.gti = gti
+        scores.tier_codes = self._tier_codes[masks]
+        scores.confidence_score = self.methodology.tier_confidence[masks] * scores.freshness
+        
+        return scores.take(~np.isnan(gti))
+    
+    def assemble(self, conn, years: Optional[List[int]] = None, sources: Optional[List[str]] = None,
+                 incremental: bool = False, bulk: bool = True, resamples: int = 0, seed: int = 0,
+                 workers: Optional[int] = None, publish: bool = True,
+                 max_row_loss: float = DEFAULT_MAX_ROW_LOSS, qa: bool = False,
+                 strict_qa: bool = False) -> CountryYearScores:
+        """Fetch, compute and save GTI scores for the given years in one transaction
+        
+        A full rebuild (every year and source) is published as a new country_year
+        version through a shadow table (see publish.py) unless publish=False.
+        Runs limited by year, source or incremental upsert into the live table.
+        With qa, the quality checks run on the written rows before the commit.
+        """
+        self.changed = False
+        check = self.quality_gate(years, strict_qa) if qa else None
+        keys, watermark = self._start_changes(conn, years, sources, incremental)
+        if keys is not None and not keys:
+            return _as_scores([])
+        
+        # Fetch pillar scores
+        countries = self.fetch_pillar_scores_for_years(conn, years, sources, keys, resamples, seed, workers)
+        print(f"Found data for {len(countries)} country-years")
+        
+        # Compute GTI scores
+        countries_with_gti = self.compute_gti_scores(countries)
+        print(f"Computed GTI for {len(countries_with_gti)} country-years")
+        
+        deleted = self._finish_changes(conn, keys, watermark)
+        
+        if not len(countries_with_gti):
+            if deleted and check is not None:
+                check(conn, LIVE_TABLE)
+            conn.commit()
+            if deleted:
+                # Only stale rows were dropped; the exports still need a run version
+                self.version = snapshot_version(self.methodology.version)
+                self.changed = True
+            return countries_with_gti
+        
+        # Save results
+        if publish and self._is_full_rebuild(years, sources, keys):
+            with metrics.stage('assemble', 'db_write', rows_in=len(countries_with_gti)):
+                self.version, _ = publish_country_year(
+                    conn, self.methodology.version,
+                    lambda cur, table, version: self._copy_rows(cur, countries_with_gti, table, version),
+                    max_row_loss=max_row_loss, check=check
+                )
+        else:
+            self.save_country_year_scores(conn, countries_with_gti, bulk=bulk, check=check)
+            refresh_country_latest(conn)
+        self.changed = True
+        return countries_with_gti
+    
+    def assemble_sql(self, conn, years: Optional[List[int]] = None, sources: Optional[List[str]] = None,
+                     incremental: bool = False, publish: bool = True,
+                     max_row_loss: float = DEFAULT_MAX_ROW_LOSS, qa: bool = False,
+                     strict_qa: bool = False) -> int:
+        """Compute and save GTI scores inside Postgres in one transaction
+        
+        The methodology is synced to the methodology_* tables and
+        assemble_country_year() scores every requested country-year set-based,
+        so observations never leave the database. Full rebuilds are published
+        and other runs upsert, as in assemble(), and qa gates the commit the
+        same way. Returns the rows written.
+        """
+        self.changed = False
+        check = self.quality_gate(years, strict_qa) if qa else None
+        keys, watermark = self._start_changes(conn, years, sources, incremental)
+        if keys is not None and not keys:
+            return 0
+        
+        with metrics.stage('assemble', 'compute') as compute:
+            with conn.cursor() as cur:
+                sync_methodology(cur, self.methodology)
+            deleted = self._finish_changes(conn, keys, watermark)
             
-            # Compute GTI based on available pillars
-            if len(pillars_available) == 3:
-                # All three pillars available
-                country.gti = (
-                    self.weights['interpersonal'] * country.interpersonal +
-                    self.weights['institutional'] * country.institutional +
-                    self.weights['governance'] * country.governance
+            if publish and self._is_full_rebuild(years, sources, keys):
+                self.version, count = publish_country_year(
+                    conn, self.methodology.version,
+                    lambda cur, table, version: assemble_in_database(
+                        cur, COUNTRY_YEAR_COLUMNS, '', version, years, sources, keys, table
+                    ),
+                    max_row_loss=max_row_loss, check=check
                 )
-                country.confidence_tier = 'A'
-                country.confidence_score = 1.0
-                
-            elif len(pillars_available) == 2:
-                # Two pillars - reweight proportionally
-                if 'governance' in pillars_available and 'institutional' in pillars_available:
-                    country.gti = 0.6 * country.institutional + 0.4 * country.governance
-                elif 'governance' in pillars_available and 'interpersonal' in pillars_available:
-                    country.gti = 0.5 * country.interpersonal + 0.5 * country.governance
-                elif 'institutional' in pillars_available and 'interpersonal' in pillars_available:
-                    country.gti = 0.57 * country.institutional + 0.43 * country.interpersonal
-                
-                country.confidence_tier = 'B'
-                country.confidence_score = 0.7
-                
-            elif 'governance' in pillars_available:
-                # Governance proxy only
-                country.gti = country.governance
-                country.confidence_tier = 'C'
-                country.confidence_score = 0.5
-                
             else:
-                # No valid data
-                country.gti = None
-                country.confidence_tier = 'C'
-                country.confidence_score = 0.0
+                self.version = snapshot_version(self.methodology.version)
+                with conn.cursor() as cur:
+                    count = assemble_in_database(
+                        cur, COUNTRY_YEAR_COLUMNS, COUNTRY_YEAR_UPSERT, self.version, years, sources, keys
+                    )
+                if check is not None and (count or deleted):
+                    check(conn, LIVE_TABLE)
+                conn.commit()
+                refresh_country_latest(conn)
+            compute.rows_out = count
+        self.changed = bool(count or deleted)
+        print(f"Saved {count} country-year scores computed in the database")
+        return count
+    
+    def export_outputs(self, conn, snapshots: bool = True,
+                       cache_path: Optional[Path] = DEFAULT_CACHE_PATH) -> bool:
+        """Write the API snapshots and read cache for the last run's version
+        
+        The post-save step of every run that changed country_year, including
+        runs that only deleted stale rows; returns False without writing when
+        nothing changed. cache_path=None skips the cache.
+        """
+        if not self.changed or self.version is None:
+            return False
         
-        return [c for c in countries if c.gti is not None]
+        if snapshots:
+            with metrics.stage('assemble', 'snapshots'):
+                export_snapshots(conn, self.version)
+        if cache_path is not None:
+            with metrics.stage('assemble', 'cache'):
+                export_cache(conn, self.version, cache_path)
+        return True
     
-    def save_country_year_scores(self, conn, countries: List[CountryYearScore]) -> None:
-        """Save computed scores to country_year table"""
+    @metrics.timed('assemble', 'db_write', rows_in='countries')
+    def save_country_year_scores(self, conn, countries: Union[CountryYearScores, List[CountryYearScore]],
+                                 bulk: bool = True, check: Optional[Callable[[object, str], None]] = None) -> None:
+        """Save computed scores to country_year table
+        
+        The bulk path streams rows with COPY into a staging table and merges them
+        with one INSERT ... SELECT; bulk=False upserts one row at a time.
+        check(conn, table) runs on the upserted table before the commit.
+        """
+        countries = _as_scores(countries)
+        self.version = snapshot_version(self.methodology.version)
         
         with conn.cursor() as cur:
-            for country in countries:
-                sources_json = json.dumps(country.sources_used) if country.sources_used else None
-                
-                cur.execute("""
-                    INSERT INTO country_year 
-                    (iso3, year, interpersonal, institutional, governance, gti, 
-                     confidence_score, confidence_tier, sources_used, version)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (iso3, year) 
-                    DO UPDATE SET
-                        interpersonal = EXCLUDED.interpersonal,
-                        institutional = EXCLUDED.institutional,
-                        governance = EXCLUDED.governance,
-                        gti = EXCLUDED.gti,
-                        confidence_score = EXCLUDED.confidence_score,
-                        confidence_tier = EXCLUDED.confidence_tier,
-                        sources_used = EXCLUDED.sources_used,
-                        version = EXCLUDED.version,
-                        computed_at = NOW()
-                """, (
-                    country.iso3, country.year,
-                    country.interpersonal, country.institutional, country.governance, 
-                    country.gti, country.confidence_score, country.confidence_tier,
-                    sources_json, '0.1.0'
-                ))
+            if bulk:
+                self._copy_country_year_scores(cur, countries, self.version)
+            else:
+                for country in countries:
+                    cur.execute(f"""
+                        INSERT INTO country_year 
+                        ({', '.join(COUNTRY_YEAR_COLUMNS)})
+                        VALUES ({', '.join(['%s'] * len(COUNTRY_YEAR_COLUMNS))})
+                        {COUNTRY_YEAR_UPSERT}
+                    """, self._country_year_row(country, self.version))
             
+            if check is not None:
+                check(conn, LIVE_TABLE)
             conn.commit()
             print(f"Saved {len(countries)} country-year scores")
+    
+    def _country_year_row(self, country, version: str) -> Tuple:
+        """Build the country_year column values for a computed score"""
+        sources_json = json.dumps(country.sources_used) if country.sources_used else None
+        return (
+            country.iso3, country.year,
+            country.interpersonal, country.institutional, country.governance, 
+            country.gti, country.gti_p5, country.gti_p50, country.gti_p95,
+            country.confidence_score, country.confidence_tier,
+            sources_json, version
+        )
+    
+    def _copy_rows(self, cur, countries: CountryYearScores, table: str, version: str) -> int:
+        """Stream rows into table with COPY; returns the row count"""
+        columns = ', '.join(COUNTRY_YEAR_COLUMNS)
+        
+        rows = countries.to_frame().assign(version=version)
+        for start in range(0, len(rows), COPY_CHUNK_SIZE):
+            buffer = io.StringIO()
+            rows.iloc[start:start + COPY_CHUNK_SIZE].to_csv(
+                buffer, columns=COUNTRY_YEAR_COLUMNS, index=False, header=False
+            )
+            buffer.seek(0)
+            cur.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        return len(rows)
+    
+    def _copy_country_year_scores(self, cur, countries: CountryYearScores, version: str) -> None:
+        """Stream rows into a temp staging table with COPY, then merge into country_year"""
+        columns = ', '.join(COUNTRY_YEAR_COLUMNS)
+        
+        cur.execute("""
+            CREATE TEMP TABLE country_year_staging 
+            (LIKE country_year INCLUDING DEFAULTS) ON COMMIT DROP
+        """)
+        self._copy_rows(cur, countries, 'country_year_staging', version)
+        
+        cur.execute(f"""
+            INSERT INTO country_year ({columns})
+            SELECT {columns} FROM country_year_staging
+            {COUNTRY_YEAR_UPSERT}
+        """)
+        cur.execute("DROP TABLE country_year_staging")
+
+def parse_years(value: str) -> List[int]:
+    """Parse a year spec such as '1995-2024' or '2019,2021,2023-2024'"""
+    years: Set[int] = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(p) for p in part.split('-', 1))
+            if start > end:
+                raise click.BadParameter(f"Invalid year range '{part}'")
+            years.update(range(start, end + 1))
+        else:
+            years.add(int(part))
+    return sorted(years)
 
 @click.command()
 @click.option('--year', default=2024, help='Year to compute scores for')  
+@click.option('--years', 'years_spec', help='Year range or list to compute, e.g. 1995-2024')
+@click.option('--all-years', is_flag=True, help='Compute scores for every year with observations')
 @click.option('--sources', help='Comma-separated list of sources to include')
-def main(year: int, sources: Optional[str]):
+@click.option('--incremental', is_flag=True,
+              help='Recompute only country-years whose observations changed since the last run')
+@click.option('--publish/--in-place', default=True,
+              help='Publish a full rebuild as a new country_year version, or upsert it into the live table; '
+                   'partial runs always upsert')
+@click.option('--max-row-loss', default=DEFAULT_MAX_ROW_LOSS, show_default=True,
+              help='Share of rows a full rebuild may drop before publishing is refused')
+@click.option('--writer', type=click.Choice(['copy', 'rows']), default='copy',
+              help='Bulk COPY writer or row-by-row upserts (runs that upsert only)')
+@click.option('--engine', type=click.Choice(['python', 'sql']), default='python',
+              help='Aggregate in Python, or set-based inside Postgres with assemble_country_year()')
+@click.option('--snapshots/--no-snapshots', default=True,
+              help='Write precomputed API JSON snapshots after a successful save')
+@click.option('--cache/--no-cache', default=True,
+              help='Write the memory-mapped country-year read cache after a successful save')
+@click.option('--cache-path', type=click.Path(dir_okay=False, path_type=Path), default=DEFAULT_CACHE_PATH,
+              envvar='GTI_CACHE_PATH', show_default=True, help='Where to write the read cache')
+@click.option('--qa/--no-qa', default=True, help='Run quality checks and store flags before committing the save')
+@click.option('--strict-qa', is_flag=True, help='Fail without saving or publishing anything if outliers are flagged')
+@click.option('--uncertainty', 'resamples', default=0, metavar='B',
+              help='Store bootstrap p5/p50/p95 GTI intervals from B resamples (0 = skip)')
+@click.option('--seed', default=0, help='Random seed for --uncertainty resamples')
+@click.option('--workers', type=int, help='Processes for --uncertainty (default: all cores)')
+@click.option('--profile', is_flag=True, help=f"Dump cProfile stats for the '{HOT_STAGE}' stage to data/profiles/")
+@click.option('--metrics-textfile', type=click.Path(dir_okay=False, path_type=Path), envvar='GTI_METRICS_TEXTFILE',
+              help='Write stage metrics to this Prometheus textfile on exit')
+def main(year: int, years_spec: Optional[str], all_years: bool, sources: Optional[str],
+         incremental: bool, publish: bool, max_row_loss: float, writer: str, engine: str,
+         snapshots: bool, cache: bool, cache_path: Path, qa: bool, strict_qa: bool,
+         resamples: int, seed: int, workers: Optional[int], profile: bool, metrics_textfile: Optional[Path]):
     """Main assembly pipeline"""
     
     # Load environment
@@ -226,41 +567,66 @@ def main(year: int, sources: Optional[str]):
     if env_path.exists():
         load_dotenv(env_path)
     
+    if engine == 'sql' and resamples:
+        raise click.BadParameter("bootstrap intervals need --engine=python", param_hint='--uncertainty')
+    
+    metrics.configure('assemble', HOT_STAGE if profile else None, metrics_textfile)
+    
     assembler = GTIAssembler()
     
     # Parse sources
     source_list = sources.split(',') if sources else None
     
-    print(f"Starting GTI assembly for year {year}")
+    # Resolve years: None means the full history
+    if incremental and not years_spec:
+        years: Optional[List[int]] = None
+        label = 'changed country-years'
+    elif all_years:
+        years = None
+        label = 'all years'
+    elif years_spec:
+        years = parse_years(years_spec)
+        label = f"years {years[0]}-{years[-1]}" if years else 'no years'
+    else:
+        years = [year]
+        label = f"year {year}"
+    
+    print(f"Starting GTI assembly for {label}")
     if source_list:
         print(f"Including sources: {source_list}")
     
     try:
-        conn = assembler.get_db_connection()
-        
-        # Fetch pillar scores
-        countries = assembler.fetch_pillar_scores(conn, year, source_list)
-        print(f"Found data for {len(countries)} countries")
-        
-        # Compute GTI scores
-        countries_with_gti = assembler.compute_gti_scores(countries)
-        print(f"Computed GTI for {len(countries_with_gti)} countries")
+        with connection() as conn:
+            started = time.perf_counter()
+            if engine == 'sql':
+                countries_with_gti = None
+                assembled = assembler.assemble_sql(
+                    conn, years, source_list, incremental=incremental, publish=publish, max_row_loss=max_row_loss,
+                    qa=qa, strict_qa=strict_qa
+                )
+            else:
+                countries_with_gti = assembler.assemble(
+                    conn, years, source_list, incremental=incremental, bulk=(writer == 'copy'),
+                    resamples=resamples, seed=seed, workers=workers, publish=publish, max_row_loss=max_row_loss,
+                    qa=qa, strict_qa=strict_qa
+                )
+                assembled = len(countries_with_gti)
+            elapsed = time.perf_counter() - started
+            
+            assembler.export_outputs(conn, snapshots=snapshots, cache_path=cache_path if cache else None)
         
-        # Save results
-        assembler.save_country_year_scores(conn, countries_with_gti)
+        rate = assembled / elapsed if elapsed > 0 else 0.0
+        print(f"Assembled {assembled} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
         
         # Print summary
-        for country in countries_with_gti[:5]:  # Show first 5
-            print(f"  {country.iso3}: GTI={country.gti:.1f}, Tier={country.confidence_tier}")
+        for country in (countries_with_gti or [])[:5]:  # Show first 5
+            print(f"  {country.iso3} {country.year}: GTI={country.gti:.1f}, Tier={country.confidence_tier}")
         
-        print(f"✅ GTI assembly completed successfully for year {year}")
+        print(f"✅ GTI assembly completed successfully for {label}")
         
     except Exception as e:
         print(f"❌ GTI assembly failed: {e}")
         sys.exit(1)
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+Country-Year Cache - Compact binary copy of country_year for database-free reads
+Readers mmap the file and answer per-year and per-country queries with zero-copy array views
+
+Layout (little-endian, sections 8-byte aligned):
+    header     HEADER struct: magic, format version, counts, section offsets, run version
+    iso3       n_countries fixed-width codes, sorted
+    offsets    int32 (n_countries, n_years): row of each country-year, -1 when absent
+    values     float64 (len(METRICS), n_rows): one array per metric, rows sorted by (iso3, year)
+    tiers      int8 (n_rows): confidence tier codes (scores.TIER_CODES), -1 for none
+"""
+
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from etl.pipelines.scores import NO_TIER, TIER_CODES, tier_code
+from etl.pipelines.snapshots import TRUST_TYPE_COLUMNS
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / 'data' / 'cache' / 'country_year.bin'
+
+MAGIC = b'GTICYCACHE'
+FORMAT_VERSION = 1
+
+# Stored metrics, in file order
+METRICS = [
+    'interpersonal', 'institutional', 'governance', 'gti',
+    'gti_p5', 'gti_p50', 'gti_p95', 'confidence_score',
+]
+
+# magic, format version, metric count, countries, years, first year, rows, code width,
+# iso3/offsets/values/tiers section offsets, created_at (unix seconds), run version
+HEADER = struct.Struct('<10sHHIIiII4Qd64s')
+
+
+@dataclass
+class YearScores:
+    """One metric for every country with a value in a year"""
+    iso3: np.ndarray
+    values: np.ndarray
+    tiers: np.ndarray
+
+
+@dataclass
+class CountrySeries:
+    """Every cached year of one country, newest first"""
+    iso3: str
+    years: np.ndarray
+    values: Dict[str, np.ndarray]
+    tiers: np.ndarray
+
+
+def _align(offset: int) -> int:
+    return -(-offset // 8) * 8
+
+
+def build_cache(frame: pd.DataFrame, version: str) -> bytes:
+    """Serialize a country_year frame (iso3, year, METRICS, confidence_tier)"""
+    frame = frame.sort_values(['iso3', 'year'], kind='stable')
+    codes, country_ids = np.unique(frame['iso3'].astype(str).to_numpy(), return_inverse=True)
+    years = frame['year'].to_numpy(dtype=np.int64)
+    first_year = int(years.min()) if len(years) else 0
+    n_years = int(years.max()) - first_year + 1 if len(years) else 0
+    n_rows = len(frame)
+
+    code_width = max((len(c.encode()) for c in codes), default=3)
+    iso3 = np.array([c.encode() for c in codes], dtype=f'S{code_width}')
+    offsets = np.full((len(codes), n_years), -1, dtype='<i4')
+    offsets[country_ids, years - first_year] = np.arange(n_rows, dtype=np.int32)
+    values = np.ascontiguousarray(
+        frame.reindex(columns=METRICS).to_numpy(dtype='<f8', na_value=np.nan).T
+    )
+    tiers = np.array([tier_code(t) if isinstance(t, str) else NO_TIER for t in frame['confidence_tier']],
+                     dtype=np.int8)
+
+    sections = [iso3.tobytes(), offsets.tobytes(), values.tobytes(), tiers.tobytes()]
+    starts = []
+    position = _align(HEADER.size)
+    for section in sections:
+        starts.append(position)
+        position = _align(position + len(section))
+
+    buffer = bytearray(position)
+    HEADER.pack_into(
+        buffer, 0, MAGIC, FORMAT_VERSION, len(METRICS), len(codes), n_years, first_year, n_rows,
+        code_width, *starts, time.time(), version.encode()[:64]
+    )
+    for start, section in zip(starts, sections):
+        buffer[start:start + len(section)] = section
+    return bytes(buffer)
+
+
+def write_cache(frame: pd.DataFrame, version: str, path: Path = DEFAULT_CACHE_PATH) -> Path:
+    """Write the cache atomically; readers holding the previous file keep their mapping"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(build_cache(frame, version))
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_cache(conn, version: str, path: Path = DEFAULT_CACHE_PATH) -> Path:
+    """Write the cache from the current country_year contents"""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT iso3, year, {', '.join(f'{m}::float8' for m in METRICS)}, confidence_tier
+            FROM country_year
+        """)
+        frame = pd.DataFrame.from_records(
+            cur.fetchall(), columns=['iso3', 'year'] + METRICS + ['confidence_tier']
+        )
+    write_cache(frame, version, path)
+    print(f"Wrote country-year cache for {len(frame)} rows to {path}")
+    return path
+
+
+class CountryYearCache:
+    """Read-only, memory-mapped view of a cache file
+
+    Arrays returned by the query methods are views into the mapping or small
+    gathers from it; nothing is parsed up front beyond the header.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._inode = os.fstat(f.fileno()).st_ino
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"{self.path} is not a country-year cache")
+        (magic, format_version, n_metrics, n_countries, n_years, self.first_year, n_rows,
+         code_width, iso3_at, offsets_at, values_at, tiers_at, self.created_at,
+         version) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a country-year cache")
+        if format_version != FORMAT_VERSION or n_metrics != len(METRICS):
+            raise ValueError(f"{self.path} has cache format {format_version}; expected {FORMAT_VERSION}")
+        if len(self._mmap) < tiers_at + n_rows:
+            raise ValueError(f"{self.path} is truncated")
+        self.version = version.rstrip(b'\0').decode()
+
+        self.codes = np.frombuffer(self._mmap, dtype=f'S{code_width}', count=n_countries, offset=iso3_at)
+        self.offsets = np.frombuffer(
+            self._mmap, dtype='<i4', count=n_countries * n_years, offset=offsets_at
+        ).reshape(n_countries, n_years)
+        self.values = np.frombuffer(
+            self._mmap, dtype='<f8', count=n_metrics * n_rows, offset=values_at
+        ).reshape(n_metrics, n_rows)
+        self.tier_codes = np.frombuffer(self._mmap, dtype=np.int8, count=n_rows, offset=tiers_at)
+        self._metric_rows = {name: i for i, name in enumerate(METRICS)}
+
+    def __enter__(self) -> 'CountryYearCache':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.values.shape[1]
+
+    def close(self) -> None:
+        if self._mmap.closed:
+            return
+        # Views must be released before the mapping can close
+        del self.codes, self.offsets, self.values, self.tier_codes
+        self._mmap.close()
+
+    @property
+    def years(self) -> np.ndarray:
+        return np.arange(self.first_year, self.first_year + self.offsets.shape[1])
+
+    @property
+    def countries(self) -> List[str]:
+        return [code.decode() for code in self.codes]
+
+    def is_stale(self) -> bool:
+        """True once a newer cache has replaced the mapped file"""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def scores_for_year(self, year: int, trust_type: str = 'core') -> YearScores:
+        """The /score column for one year, for countries with a value, in iso3 order"""
+        metric = self.values[self._metric_rows[TRUST_TYPE_COLUMNS[trust_type]]]
+        column = year - self.first_year
+        if not 0 <= column < self.offsets.shape[1]:
+            return YearScores(self.codes[:0], metric[:0], self.tier_codes[:0])
+
+        rows = self.offsets[:, column]
+        countries = np.flatnonzero(rows >= 0)
+        rows = rows[countries]
+        values = metric[rows]
+        present = ~np.isnan(values)
+        return YearScores(self.codes[countries[present]], values[present], self.tier_codes[rows[present]])
+
+    def series(self, iso3: str) -> Optional[CountrySeries]:
+        """Every metric of one country by year, newest first; None for unknown countries"""
+        code = iso3.encode()
+        index = int(np.searchsorted(self.codes, code))
+        if index == len(self.codes) or self.codes[index] != code:
+            return None
+
+        row_offsets = self.offsets[index, ::-1]
+        present = row_offsets >= 0
+        rows = row_offsets[present]
+        # A country's rows are contiguous and ascending, so this is one slice
+        block = slice(rows[-1], rows[0] + 1) if len(rows) else slice(0, 0)
+        return CountrySeries(
+            iso3=iso3,
+            years=self.years[::-1][present],
+            values={name: self.values[i, block][::-1] for name, i in self._metric_rows.items()},
+            tiers=self.tier_codes[block][::-1],
+        )
+
+    def tier_labels(self, codes: np.ndarray) -> List[Optional[str]]:
+        """Decode tier codes to 'A'/'B'/'C' (None for no tier)"""
+        return [TIER_CODES[c] if c != NO_TIER else None for c in codes]
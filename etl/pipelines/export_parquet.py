@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Analytics Export - Partitioned Parquet datasets of observations and country_year
+Analysts read these files (memory-mapped, with column and year pushdown) instead of querying production
+"""
+
+import sys
+import json
+import click
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.lib.db import connection, server_side_cursor
+from etl.pipelines.assemble import parse_years
+from etl.pipelines.methodology import load_methodology
+
+DEFAULT_EXPORT_DIR = project_root / 'data' / 'exports'
+
+# Rows per Arrow record batch while streaming from Postgres
+EXPORT_BATCH_SIZE = 100000
+
+TIMESTAMP = pa.timestamp('us', tz='UTC')
+
+TABLES: Dict[str, Dict] = {
+    'observations': {
+        'schema': pa.schema([
+            ('iso3', pa.string()),
+            ('year', pa.int32()),
+            ('source', pa.string()),
+            ('trust_type', pa.string()),
+            ('raw_value', pa.float64()),
+            ('raw_unit', pa.string()),
+            ('score_0_100', pa.float64()),
+            ('sample_n', pa.int32()),
+            ('method_notes', pa.string()),
+            ('source_url', pa.string()),
+            ('ingested_at', TIMESTAMP),
+        ]),
+        'partitioning': ['year', 'source'],
+        'numeric': ['raw_value', 'score_0_100'],
+    },
+    'country_year': {
+        'schema': pa.schema([
+            ('iso3', pa.string()),
+            ('year', pa.int32()),
+            ('interpersonal', pa.float64()),
+            ('institutional', pa.float64()),
+            ('governance', pa.float64()),
+            ('gti', pa.float64()),
+            ('gti_p5', pa.float64()),
+            ('gti_p50', pa.float64()),
+            ('gti_p95', pa.float64()),
+            ('confidence_score', pa.float64()),
+            ('confidence_tier', pa.string()),
+            ('sources_used', pa.string()),
+            ('version', pa.string()),
+            ('computed_at', TIMESTAMP),
+        ]),
+        'partitioning': ['year'],
+        'numeric': ['interpersonal', 'institutional', 'governance', 'gti', 'gti_p5', 'gti_p50', 'gti_p95',
+                    'confidence_score'],
+    },
+}
+
+
+def _partitioning(table: str) -> ds.Partitioning:
+    spec = TABLES[table]
+    fields = [spec['schema'].field(name) for name in spec['partitioning']]
+    return ds.partitioning(pa.schema(fields), flavor='hive')
+
+
+def _record_batches(conn, table: str, years: Optional[List[int]]) -> Iterator[pa.RecordBatch]:
+    """Stream a table from Postgres as Arrow record batches"""
+    spec = TABLES[table]
+    schema: pa.Schema = spec['schema']
+    columns = schema.names
+
+    where_clause, params = "", []
+    if years is not None:
+        where_clause, params = "WHERE year = ANY(%s)", [list(years)]
+
+    with server_side_cursor(conn, f'export_{table}', EXPORT_BATCH_SIZE) as cur:
+        cur.execute(f"SELECT {', '.join(columns)} FROM {table} {where_clause}", params)
+        while True:
+            rows = cur.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            frame = pd.DataFrame.from_records(rows, columns=columns)
+            for column in spec['numeric']:
+                frame[column] = frame[column].astype(float)
+            if 'sources_used' in frame:
+                frame['sources_used'] = [json.dumps(v) if v is not None else None for v in frame['sources_used']]
+            if 'sample_n' in frame:
+                frame['sample_n'] = frame['sample_n'].astype('Int32')
+            yield pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+def export_table(conn, table: str, version: str, years: Optional[List[int]] = None,
+                 export_dir: Path = DEFAULT_EXPORT_DIR) -> Path:
+    """Write one table as a hive-partitioned Parquet dataset
+
+    Only the partitions for the exported years are replaced, so exporting the
+    years touched by an assembly run appends to the existing dataset. Every file
+    carries the assembly version in its schema metadata.
+    """
+    root = export_dir / table
+    metadata = {
+        'gti.table': table,
+        'gti.assembly_version': version,
+        'gti.exported_at': datetime.now(timezone.utc).isoformat(),
+    }
+    schema = TABLES[table]['schema'].with_metadata(metadata)
+
+    ds.write_dataset(
+        _record_batches(conn, table, years),
+        root,
+        schema=schema,
+        format='parquet',
+        partitioning=_partitioning(table),
+        basename_template=f"part-{version}-{{i}}.parquet",
+        existing_data_behavior='delete_matching',
+        max_rows_per_group=EXPORT_BATCH_SIZE,
+    )
+    # Dataset-level schema and version for readers that do not open every file
+    pq.write_metadata(schema, root / '_common_metadata')
+
+    print(f"Exported {table} to {root}")
+    return root
+
+
+def open_dataset(table: str, export_dir: Path = DEFAULT_EXPORT_DIR) -> ds.Dataset:
+    """Open an exported dataset with memory-mapped local reads"""
+    return ds.dataset(
+        export_dir / table,
+        format='parquet',
+        partitioning=_partitioning(table),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+        exclude_invalid_files=True,
+    )
+
+
+def read_table(table: str, columns: Optional[List[str]] = None, years: Optional[List[int]] = None,
+               sources: Optional[List[str]] = None, export_dir: Path = DEFAULT_EXPORT_DIR) -> pa.Table:
+    """Read an exported table, pushing column, year and source filters down to the files"""
+    dataset = open_dataset(table, export_dir)
+
+    expression = None
+    if years is not None:
+        expression = ds.field('year').isin(list(years))
+    if sources is not None:
+        source_filter = ds.field('source').isin(list(sources))
+        expression = source_filter if expression is None else expression & source_filter
+
+    return dataset.to_table(columns=columns, filter=expression)
+
+
+@click.command()
+@click.option('--tables', default=','.join(TABLES), help='Comma-separated tables to export')
+@click.option('--years', 'years_spec', help='Only export (and replace) these years, e.g. 2020-2024')
+@click.option('--version', help='Assembly version recorded in the files (defaults to the methodology version)')
+@click.option('--export-dir', type=click.Path(file_okay=False, path_type=Path), default=DEFAULT_EXPORT_DIR)
+def main(tables: str, years_spec: Optional[str], version: Optional[str], export_dir: Path):
+    """Export observations and country_year as partitioned Parquet"""
+
+    # Load environment
+    from dotenv import load_dotenv
+    env_path = project_root / '.env'
+    if env_path.exists():
+        load_dotenv(env_path)
+
+    table_list = [t.strip() for t in tables.split(',') if t.strip()]
+    unknown = [t for t in table_list if t not in TABLES]
+    if unknown:
+        raise click.BadParameter(f"Unknown tables {unknown}", param_hint='--tables')
+
+    years = parse_years(years_spec) if years_spec else None
+    version = version or load_methodology().version
+
+    try:
+        with connection() as conn:
+            for table in table_list:
+                export_table(conn, table, version, years, export_dir)
+        print(f"✅ Parquet export completed for version {version}")
+
+    except Exception as e:
+        print(f"❌ Parquet export failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
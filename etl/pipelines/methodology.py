@@ -0,0 +1,222 @@
+"""
+Methodology - Compile data/reference/methodology.yaml into weight tables
+Formulas are parsed once into linear coefficients, so scoring never evaluates strings per row
+"""
+
+import ast
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from etl.pipelines.aggregation import PILLARS
+
+DEFAULT_METHODOLOGY_PATH = Path(__file__).parent.parent.parent / 'data' / 'reference' / 'methodology.yaml'
+
+# Availability bit per pillar, in PILLARS order
+PILLAR_BITS = np.array([1 << i for i in range(len(PILLARS))])
+
+# Confidence score attached to each tier
+TIER_CONFIDENCE = {'A': 1.0, 'B': 0.7, 'C': 0.5}
+
+
+@dataclass(frozen=True)
+class Affine:
+    """Linear conversion x -> scale * x + offset"""
+    scale: float
+    offset: float
+
+    def apply(self, values):
+        return values * self.scale + self.offset
+
+
+def compile_linear(expr: str, variables: Sequence[str]) -> Tuple[np.ndarray, float]:
+    """Compile a linear formula such as '0.6 * institutional + 0.4 * governance'
+
+    Returns one coefficient per variable plus a constant term. Anything that is not
+    linear in the variables (products of variables, calls, unknown names) is rejected.
+    """
+    try:
+        tree = ast.parse(str(expr), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid methodology formula '{expr}': {e}") from e
+
+    terms, constant = _linear_terms(tree.body, set(variables), expr)
+    coefficients = np.array([terms.get(name, 0.0) for name in variables], dtype=float)
+    return coefficients, constant
+
+
+def _linear_terms(node, variables, expr) -> Tuple[Dict[str, float], float]:
+    """Reduce an expression node to ({variable: coefficient}, constant)"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return {}, float(node.value)
+
+    if isinstance(node, ast.Name):
+        if node.id not in variables:
+            raise ValueError(f"Unknown variable '{node.id}' in methodology formula '{expr}'")
+        return {node.id: 1.0}, 0.0
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        terms, constant = _linear_terms(node.operand, variables, expr)
+        sign = -1.0 if isinstance(node.op, ast.USub) else 1.0
+        return {k: sign * v for k, v in terms.items()}, sign * constant
+
+    if isinstance(node, ast.BinOp):
+        left_terms, left_const = _linear_terms(node.left, variables, expr)
+        right_terms, right_const = _linear_terms(node.right, variables, expr)
+
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            sign = 1.0 if isinstance(node.op, ast.Add) else -1.0
+            terms = dict(left_terms)
+            for k, v in right_terms.items():
+                terms[k] = terms.get(k, 0.0) + sign * v
+            return terms, left_const + sign * right_const
+
+        if isinstance(node.op, ast.Mult):
+            if left_terms and right_terms:
+                raise ValueError(f"Methodology formula '{expr}' is not linear")
+            if left_terms:
+                return {k: v * right_const for k, v in left_terms.items()}, left_const * right_const
+            return {k: v * left_const for k, v in right_terms.items()}, left_const * right_const
+
+        if isinstance(node.op, ast.Div):
+            if right_terms or right_const == 0:
+                raise ValueError(f"Methodology formula '{expr}' divides by a variable or zero")
+            return {k: v / right_const for k, v in left_terms.items()}, left_const / right_const
+
+    raise ValueError(f"Unsupported expression in methodology formula '{expr}'")
+
+
+def compile_affine(expr: str) -> Affine:
+    """Compile a single-variable conversion such as '((x + 2.5) / 5) * 100'"""
+    coefficients, constant = compile_linear(expr, ['x'])
+    return Affine(scale=float(coefficients[0]), offset=constant)
+
+
+def compile_combinations(aggregation: Dict, proxy_tier: str = 'C') -> Tuple[np.ndarray, List[Optional[str]]]:
+    """GTI coefficient row and confidence tier for every pillar availability mask
+
+    Row m of the matrix holds the pillar coefficients used when the set of
+    available pillars has bitmask m; masks without a rule are NaN (no GTI).
+    """
+    n_masks = 1 << len(PILLARS)
+    combinations = np.full((n_masks, len(PILLARS)), np.nan)
+    tiers: List[Optional[str]] = [None] * n_masks
+
+    def register(expr: str, tier: str):
+        coefficients, constant = compile_linear(expr, PILLARS)
+        if constant:
+            raise ValueError(f"GTI formula '{expr}' must not have a constant term")
+        mask = int(PILLAR_BITS[coefficients != 0].sum())
+        combinations[mask] = coefficients
+        tiers[mask] = tier
+
+    if 'primary' in aggregation:
+        register(aggregation['primary'], 'A')
+    for expr in (aggregation.get('two_pillar_reweighting') or {}).values():
+        register(expr, 'B')
+    if 'proxy_only' in aggregation:
+        register(aggregation['proxy_only'], proxy_tier)
+
+    return combinations, tiers
+
+
+class Methodology:
+    """Compiled methodology: source weights, scale conversions and GTI combinations"""
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.version = str(config.get('version', '0.1.0'))
+
+        self.scales = {name: compile_affine(expr) for name, expr in (config.get('scales') or {}).items()}
+
+        self.pillar_weights = np.array(
+            [float(config['pillars'][p].get('weight', 0.0)) for p in PILLARS]
+        )
+        self.source_weights = self._compile_source_weights(config['pillars'])
+        self.variable_scales = self._compile_variable_scales(config['pillars'])
+
+        proxy_tier = (config.get('confidence') or {}).get('proxy_only_tier', 'C')
+        self.combinations, self.tiers = compile_combinations(config.get('aggregation') or {}, proxy_tier)
+        self.tier_confidence = np.array(
+            [TIER_CONFIDENCE[t] if t else 0.0 for t in self.tiers]
+        )
+
+        # Survey pillars (declared with variables) carry forward between survey waves
+        confidence = config.get('confidence') or {}
+        quality = config.get('quality') or {}
+        self.carried_pillars = [p for p in PILLARS if (config['pillars'].get(p) or {}).get('variables')]
+        self.survey_grace_years = int(confidence.get('survey_grace_years', 0))
+        self.decay_after_grace = float(confidence.get('decay_after_grace', 0.0))
+        self.max_data_age_years = int(quality.get('max_data_age_years', 0))
+        self.outlier_threshold = float(quality.get('outlier_threshold', 25))
+        self.minimum_sample_size = int(quality.get('minimum_sample_size', 0))
+        self.weight_concentration = float((config.get('uncertainty') or {}).get('weight_concentration', 100))
+
+    def _compile_source_weights(self, pillars: Dict) -> pd.DataFrame:
+        """Per (pillar, source) weight table
+
+        Sources listed more than once in a pillar (e.g. several WVS variables) share
+        the sum of their variable weights.
+        """
+        rows = []
+        for pillar in PILLARS:
+            spec = pillars.get(pillar) or {}
+            for entry in (spec.get('variables') or []) + (spec.get('components') or []):
+                rows.append((pillar, entry['source'], float(entry.get('weight', 1.0))))
+
+        table = pd.DataFrame(rows, columns=['pillar', 'source', 'weight'])
+        return table.groupby(['pillar', 'source'], as_index=False)['weight'].sum()
+
+    def _compile_variable_scales(self, pillars: Dict) -> Dict[Tuple[str, str], Affine]:
+        """Scale conversion for each (source, variable) declared in the pillars"""
+        lookup = {}
+        for spec in pillars.values():
+            for entry in (spec.get('variables') or []) + (spec.get('components') or []):
+                scale = entry.get('scale')
+                if scale:
+                    if scale not in self.scales:
+                        raise ValueError(f"Unknown scale '{scale}' for {entry['source']}.{entry['var']}")
+                    lookup[(entry['source'], entry['var'])] = self.scales[scale]
+        return lookup
+
+    def source_weight(self, pillars: pd.Series, sources: pd.Series) -> np.ndarray:
+        """Vectorized weight lookup for (pillar, source) pairs
+
+        Sources the methodology does not list fall back to the mean weight of the
+        listed sources in that pillar.
+        """
+        keys = pd.DataFrame({'pillar': pillars.to_numpy(), 'source': sources.to_numpy()})
+        weights = keys.merge(self.source_weights, on=['pillar', 'source'], how='left')['weight']
+        fallback = keys['pillar'].map(self.source_weights.groupby('pillar')['weight'].mean())
+        return weights.fillna(fallback).fillna(1.0).to_numpy(dtype=float)
+
+    def history_years(self, years: Sequence[int]) -> List[int]:
+        """Years whose observations can be carried forward into the given years"""
+        return sorted({y - age for y in years for age in range(self.max_data_age_years + 1)})
+
+    def availability_mask(self, pillars: np.ndarray) -> np.ndarray:
+        """Bitmask of available pillars for each row of an (N, 3) score array"""
+        return (~np.isnan(pillars)).astype(np.int64) @ PILLAR_BITS
+
+    def combine(self, pillars: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Weighted GTI for an (N, 3) pillar array in one pass
+
+        Returns the GTI (NaN where no rule applies) and the availability masks.
+        """
+        masks = self.availability_mask(pillars)
+        coefficients = self.combinations[masks]
+        gti = np.einsum('ij,ij->i', coefficients, np.nan_to_num(pillars))
+        return gti, masks
+
+
+@lru_cache(maxsize=None)
+def load_methodology(path: Path = DEFAULT_METHODOLOGY_PATH) -> Methodology:
+    """Load and compile methodology.yaml once per process"""
+    with open(path, 'r') as f:
+        config = yaml.safe_load(f)
+    return Methodology(config)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+ETL Orchestrator - Run source ingests concurrently, then assemble every year in one run
+Stages form a dependency DAG executed on a bounded thread pool with per-stage timings
+"""
+
+import sys
+import json
+import time
+import click
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Type
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.lib.db import connection
+from etl.jobs.adapter import Period, SourceAdapter
+from etl.jobs.cpi import CPIProcessor
+from etl.jobs.ess import ESSAdapter
+from etl.jobs.wvs import WVSAdapter
+from etl.pipelines.assemble import GTIAssembler, parse_years
+from etl.pipelines.cache import DEFAULT_CACHE_PATH
+
+@dataclass
+class Task:
+    name: str
+    fn: Callable[[], object]
+    deps: List[str] = field(default_factory=list)
+
+@dataclass
+class StageTiming:
+    name: str
+    status: str = 'pending'
+    started_at: Optional[float] = None
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+def run_dag(tasks: List[Task], max_workers: int = 4) -> Dict[str, StageTiming]:
+    """Run tasks as soon as their dependencies succeed, at most max_workers at a time
+
+    A failed task marks everything downstream of it as skipped; independent
+    branches keep running. Timings are relative to the start of the run.
+    """
+    by_name = {task.name: task for task in tasks}
+    for task in tasks:
+        missing = [d for d in task.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Task '{task.name}' depends on unknown tasks {missing}")
+    _check_acyclic(by_name)
+
+    timings = {task.name: StageTiming(task.name) for task in tasks}
+    pending = dict(by_name)
+    running: Dict[Future, str] = {}
+    run_started = time.perf_counter()
+
+    def timed(task: Task):
+        timing = timings[task.name]
+        timing.started_at = time.perf_counter() - run_started
+        started = time.perf_counter()
+        try:
+            return task.fn()
+        finally:
+            timing.seconds = time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            # Skip tasks whose dependencies failed, submit those that are ready
+            for name, task in list(pending.items()):
+                statuses = [timings[d].status for d in task.deps]
+                if any(s in ('failed', 'skipped') for s in statuses):
+                    timings[name].status = 'skipped'
+                    del pending[name]
+                elif all(s == 'succeeded' for s in statuses):
+                    timings[name].status = 'running'
+                    running[pool.submit(timed, task)] = name
+                    del pending[name]
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    timings[name].status = 'succeeded'
+                else:
+                    timings[name].status = 'failed'
+                    timings[name].error = str(error)
+                    print(f"❌ {name} failed: {error}")
+
+    return timings
+
+def _check_acyclic(by_name: Dict[str, Task]) -> None:
+    """Raise if the task dependencies contain a cycle"""
+    state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(name: str, path: List[str]):
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        state[name] = 1
+        for dep in by_name[name].deps:
+            visit(dep, path + [name])
+        state[name] = 2
+
+    for name in by_name:
+        visit(name, [])
+
+def adapter_tasks(adapter: SourceAdapter, period: Period, force: bool) -> List[Task]:
+    """Download, process and load stages for one period of a source"""
+    state: Dict = {}
+    prefix = f"{adapter.source}:{period}"
+
+    def download():
+        state['raw_path'] = adapter.download(period, force=force)
+
+    def process():
+        if not adapter.has_input(state['raw_path']):
+            print(f"No {adapter.source} input found at {state['raw_path']}, skipping")
+            state['skip'] = True
+            return
+        if not force and adapter.is_up_to_date(state['raw_path'], period):
+            print(f"{adapter.source} data for {period} is unchanged since the last load, skipping")
+            state['skip'] = True
+            return
+        state['observations'], rejects = adapter.process(state['raw_path'], period)
+        adapter.save_staging_data(state['observations'], period, rejects)
+
+    def load():
+        if state.get('skip'):
+            return
+        adapter.load(state['observations'])
+        adapter.record_loaded(state['raw_path'], period)
+
+    return [
+        Task(f"{prefix}:download", download),
+        Task(f"{prefix}:process", process, [f"{prefix}:download"]),
+        Task(f"{prefix}:load", load, [f"{prefix}:process"]),
+    ]
+
+# Ingest adapters by source name (sources from source_metadata without a job yet are not listed)
+SOURCE_ADAPTERS: Dict[str, Type[SourceAdapter]] = {
+    'CPI': CPIProcessor,
+    'WVS': WVSAdapter,
+    'ESS': ESSAdapter,
+}
+
+def assembly_task(years: List[int], deps: List[str], strict_qa: bool = False, snapshots: bool = True,
+                  cache_path: Optional[Path] = DEFAULT_CACHE_PATH) -> Task:
+    """Assemble every year once every ingest has finished
+
+    One assembly run writes all years in one transaction, so a refresh publishes
+    a single country_year change rather than one per year. The quality checks
+    run before that transaction commits, so with strict_qa an outlier fails the
+    stage without writing anything. Snapshots and the read cache are rewritten
+    whenever the run changed country_year.
+    """
+    def assemble():
+        assembler = GTIAssembler()
+        with connection() as conn:
+            assembler.assemble(conn, years, qa=True, strict_qa=strict_qa)
+            assembler.export_outputs(conn, snapshots=snapshots, cache_path=cache_path)
+
+    return Task("assemble", assemble, deps)
+
+def build_tasks(sources: List[str], years: List[int], force: bool = False,
+                assemble: bool = True, strict_qa: bool = False, snapshots: bool = True,
+                cache_path: Optional[Path] = DEFAULT_CACHE_PATH) -> List[Task]:
+    """Full refresh DAG: per-source ingest chains, then one quality-gated assembly over all years
+
+    Each source contributes one chain per period; survey microdata spans every
+    year in a single period.
+    """
+    tasks: List[Task] = []
+    for source in sources:
+        adapter = SOURCE_ADAPTERS[source]()
+        for period in adapter.periods(years):
+            tasks.extend(adapter_tasks(adapter, period, force))
+
+    if assemble:
+        loads = [t.name for t in tasks if t.name.endswith(':load')]
+        tasks.append(assembly_task(years, loads, strict_qa, snapshots, cache_path))
+
+    return tasks
+
+@click.command()
+@click.option('--years', 'years_spec', default='2024', help='Year range or list to refresh, e.g. 2020-2024')
+@click.option('--sources', default=','.join(SOURCE_ADAPTERS), help='Comma-separated sources to ingest')
+@click.option('--max-workers', default=4, help='Maximum stages running at once')
+@click.option('--force', is_flag=True, help='Reload sources even if their inputs are unchanged')
+@click.option('--skip-assembly', is_flag=True, help='Only run the ingest stages')
+@click.option('--strict-qa', is_flag=True, help='Fail assembly without writing anything if quality checks flag outliers')
+@click.option('--snapshots/--no-snapshots', default=True,
+              help='Write precomputed API JSON snapshots when assembly changes country_year')
+@click.option('--cache/--no-cache', default=True,
+              help='Write the memory-mapped country-year read cache when assembly changes country_year')
+@click.option('--cache-path', type=click.Path(dir_okay=False, path_type=Path), default=DEFAULT_CACHE_PATH,
+              envvar='GTI_CACHE_PATH', show_default=True, help='Where to write the read cache')
+@click.option('--timings-json', type=click.Path(dir_okay=False, path_type=Path),
+              help='Write per-stage timings to this file')
+def main(years_spec: str, sources: str, max_workers: int, force: bool, skip_assembly: bool,
+         strict_qa: bool, snapshots: bool, cache: bool, cache_path: Path, timings_json: Optional[Path]):
+    """Refresh every source and the GTI in one orchestrated run"""
+
+    # Load environment
+    from dotenv import load_dotenv
+    env_path = project_root / '.env'
+    if env_path.exists():
+        load_dotenv(env_path)
+
+    source_list = [s.strip() for s in sources.split(',') if s.strip()]
+    unknown = [s for s in source_list if s not in SOURCE_ADAPTERS]
+    if unknown:
+        raise click.BadParameter(
+            f"No ETL job for {unknown}; available: {', '.join(SOURCE_ADAPTERS)}", param_hint='--sources'
+        )
+    years = parse_years(years_spec)
+
+    tasks = build_tasks(source_list, years, force=force, assemble=not skip_assembly, strict_qa=strict_qa,
+                        snapshots=snapshots, cache_path=cache_path if cache else None)
+    print(f"Running {len(tasks)} stages for {source_list} over {len(years)} years "
+          f"with {max_workers} workers")
+
+    started = time.perf_counter()
+    timings = run_dag(tasks, max_workers=max_workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{'stage':<28} {'status':<10} {'start':>8} {'seconds':>8}")
+    for timing in sorted(timings.values(), key=lambda t: (t.started_at is None, t.started_at or 0)):
+        start = f"{timing.started_at:.2f}" if timing.started_at is not None else '-'
+        seconds = f"{timing.seconds:.2f}" if timing.seconds is not None else '-'
+        print(f"{timing.name:<28} {timing.status:<10} {start:>8} {seconds:>8}")
+
+    if timings_json:
+        timings_json.parent.mkdir(parents=True, exist_ok=True)
+        with open(timings_json, 'w') as f:
+            json.dump({
+                'wall_seconds': elapsed,
+                'stages': [asdict(t) for t in timings.values()]
+            }, f, indent=2)
+
+    failed = [t.name for t in timings.values() if t.status != 'succeeded']
+    if failed:
+        print(f"❌ ETL run finished in {elapsed:.2f}s with {len(failed)} failed or skipped stages")
+        sys.exit(1)
+
+    print(f"✅ ETL run completed in {elapsed:.2f}s")
+
+if __name__ == '__main__':
+    main()
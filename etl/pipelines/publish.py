@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Versioned Publishing - Build country_year in a shadow table and swap it in atomically
+Readers see either the old or the new version, never a mix; replaced tables are kept for rollback
+"""
+
+import re
+import sys
+import click
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.lib.db import connection
+from etl.pipelines.cache import DEFAULT_CACHE_PATH, export_cache
+from etl.pipelines.snapshots import export_snapshots, snapshot_version
+
+LIVE_TABLE = 'country_year'
+
+# Replaced versions kept as tables for rollback
+KEEP_VERSIONS = 3
+
+# Largest share of live rows a full rebuild may drop before the publish is refused
+DEFAULT_MAX_ROW_LOSS = 0.05
+
+# Same definition as migration 004. A view stays bound to the table it was created
+# on, so every swap recreates it over the new live table.
+COUNTRY_LATEST_VIEW = f"""
+    CREATE MATERIALIZED VIEW country_latest AS
+    SELECT DISTINCT ON (cy.iso3)
+        cy.iso3,
+        cy.year AS latest_year,
+        cy.gti AS latest_gti,
+        cy.confidence_tier
+    FROM {LIVE_TABLE} cy
+    ORDER BY cy.iso3, cy.year DESC
+"""
+
+
+class PublishError(Exception):
+    pass
+
+
+def version_tag(version: str) -> str:
+    """Identifier-safe form of a version, e.g. 0_1_0_20241001t120000000z"""
+    return re.sub(r'[^a-z0-9]+', '_', version.lower()).strip('_')
+
+
+def archive_table(version: str) -> str:
+    """Table a version lives in while it is not the live country_year"""
+    return f"{LIVE_TABLE}__{version_tag(version)}"
+
+
+def publish_country_year(conn, methodology_version: str, load: Callable[[object, str, str], int],
+                         max_row_loss: float = DEFAULT_MAX_ROW_LOSS,
+                         keep_versions: int = KEEP_VERSIONS,
+                         check: Optional[Callable[[object, str], object]] = None) -> Tuple[str, int]:
+    """Publish a full rebuild as a new country_year version; returns (version, rows written)
+
+    load(cur, table, version) writes every computed row into an empty shadow table
+    without indexes and returns how many it wrote; the shadow table replaces the
+    live one outright. Partial runs upsert into the live table instead, so only
+    full rebuilds create versions. Constraints and indexes are built after the
+    load, the row counts are checked, and the rename swap commits with the
+    caller's open transaction. check(conn, table), e.g. the quality checks,
+    runs on the finished shadow table before the swap; raising from it aborts
+    the publish with the live table untouched.
+    """
+    with conn.cursor() as cur:
+        # Serializes publishers and in-place writers; readers are not blocked
+        cur.execute(f"LOCK TABLE {LIVE_TABLE} IN SHARE ROW EXCLUSIVE MODE")
+        previous = _live_version(cur)
+        version = snapshot_version(methodology_version)
+        shadow = archive_table(version)
+
+        cur.execute(f"CREATE TABLE {shadow} (LIKE {LIVE_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        written = load(cur, shadow, version)
+        loaded = _count(cur, shadow)
+        if loaded != written:
+            raise PublishError(f"{shadow} holds {loaded} rows after {written} were written")
+
+        _check_row_count(loaded, _count(cur, LIVE_TABLE), max_row_loss)
+
+        _build_indexes(cur, shadow, version_tag(version))
+        cur.execute(f"ANALYZE {shadow}")
+
+        if check is not None:
+            check(conn, shadow)
+
+        _swap(cur, shadow, version, previous)
+        cur.execute("""
+            INSERT INTO country_year_versions (version, table_name, row_count, status, published_at)
+            VALUES (%s, %s, %s, 'live', NOW())
+        """, (version, LIVE_TABLE, loaded))
+    conn.commit()
+    print(f"Published country_year version {version} ({loaded} rows, replacing {previous})")
+
+    drop_expired_versions(conn, keep_versions)
+    return version, written
+
+
+def rollback_country_year(conn, version: str) -> None:
+    """Swap a retained version back in; the live version is retained in its place"""
+    with conn.cursor() as cur:
+        cur.execute(f"LOCK TABLE {LIVE_TABLE} IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute("""
+            SELECT table_name FROM country_year_versions
+            WHERE version = %s AND status = 'retained'
+        """, (version,))
+        row = cur.fetchone()
+        if row is None:
+            raise PublishError(f"Version {version} is not a retained country_year version")
+        previous = _live_version(cur)
+
+        _swap(cur, row[0], version, previous)
+        cur.execute("""
+            UPDATE country_year_versions
+            SET status = 'live', table_name = %s, published_at = NOW()
+            WHERE version = %s
+        """, (LIVE_TABLE, version))
+    conn.commit()
+    print(f"Rolled country_year back to {version} (retained {previous})")
+
+
+def drop_expired_versions(conn, keep_versions: int = KEEP_VERSIONS) -> List[str]:
+    """Drop retained tables beyond the newest keep_versions; returns the dropped versions"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT version, table_name FROM country_year_versions
+            WHERE status = 'retained'
+            ORDER BY published_at DESC
+            OFFSET %s
+        """, (keep_versions,))
+        expired = cur.fetchall()
+        for version, table in expired:
+            cur.execute(f"DROP TABLE IF EXISTS {table}")
+            cur.execute("UPDATE country_year_versions SET status = 'dropped' WHERE version = %s", (version,))
+    conn.commit()
+    return [version for version, _ in expired]
+
+
+def list_versions(conn) -> List[Tuple]:
+    """(version, status, row_count, published_at) for every version not yet dropped, newest first"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT version, status, row_count, published_at FROM country_year_versions
+            WHERE status <> 'dropped'
+            ORDER BY published_at DESC
+        """)
+        return cur.fetchall()
+
+
+def _count(cur, table: str) -> int:
+    cur.execute(f"SELECT COUNT(*) FROM {table}")
+    return cur.fetchone()[0]
+
+
+def _live_version(cur) -> str:
+    cur.execute("SELECT version FROM country_year_versions WHERE status = 'live'")
+    row = cur.fetchone()
+    if row is None:
+        raise PublishError("No live country_year version is registered; apply migration 005")
+    return row[0]
+
+
+def _check_row_count(rows: int, live_rows: int, max_row_loss: float) -> None:
+    """Refuse a rebuild that drops more than max_row_loss of the live rows"""
+    if rows < live_rows * (1 - max_row_loss):
+        raise PublishError(
+            f"Full rebuild would shrink country_year from {live_rows} to {rows} rows "
+            f"(more than {max_row_loss:.0%}); raise --max-row-loss to publish it anyway"
+        )
+
+
+def _constraints(cur, table: str, kinds: str) -> List[Tuple[str, str, str]]:
+    """(name, kind, definition) of the table's constraints of the given pg_constraint kinds"""
+    cur.execute("""
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = ANY(%s)
+        ORDER BY conname
+    """, (table, list(kinds)))
+    return cur.fetchall()
+
+
+def _indexes(cur, table: str) -> List[Tuple[str, str, bool]]:
+    """(name, definition, backs a constraint) of every index on the table"""
+    cur.execute("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid),
+               EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+        ORDER BY c.relname
+    """, (table,))
+    return cur.fetchall()
+
+
+def _build_indexes(cur, shadow: str, tag: str) -> None:
+    """Give the shadow table the live table's keys, foreign keys and indexes
+
+    Index names take a __<tag> suffix until the swap, since index names are
+    unique per schema.
+    """
+    for name, kind, definition in _constraints(cur, LIVE_TABLE, 'puf'):
+        constraint = name if kind == 'f' else f"{name}__{tag}"
+        cur.execute(f'ALTER TABLE {shadow} ADD CONSTRAINT "{constraint}" {definition}')
+
+    for name, definition, is_constraint in _indexes(cur, LIVE_TABLE):
+        if is_constraint:
+            continue
+        cur.execute(re.sub(
+            r'^(CREATE (?:UNIQUE )?INDEX) \S+ ON (?:ONLY )?\S+ ',
+            lambda m: f'{m.group(1)} "{name}__{tag}" ON {shadow} ',
+            definition,
+        ))
+
+
+def _swap(cur, table: str, version: str, previous: str) -> None:
+    """Retire the live table as previous and rename table into its place
+
+    Runs in the caller's transaction: readers queue behind the brief exclusive
+    lock and then see the new table, country_latest included.
+    """
+    previous_tag, tag = version_tag(previous), version_tag(version)
+    foreign_keys = _constraints(cur, LIVE_TABLE, 'f')
+
+    # Retained tables drop their foreign keys so they never block deletes from countries
+    for name, _, _ in foreign_keys:
+        cur.execute(f'ALTER TABLE {LIVE_TABLE} DROP CONSTRAINT "{name}"')
+    for name, _, _ in _indexes(cur, LIVE_TABLE):
+        cur.execute(f'ALTER INDEX "{name}" RENAME TO "{name}__{previous_tag}"')
+    cur.execute(f"ALTER TABLE {LIVE_TABLE} RENAME TO {archive_table(previous)}")
+
+    suffix = f"__{tag}"
+    for name, _, _ in _indexes(cur, table):
+        if name.endswith(suffix):
+            cur.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:-len(suffix)]}"')
+    cur.execute(f"ALTER TABLE {table} RENAME TO {LIVE_TABLE}")
+
+    existing = {name for name, _, _ in _constraints(cur, LIVE_TABLE, 'f')}
+    for name, _, definition in foreign_keys:
+        if name not in existing:
+            cur.execute(f'ALTER TABLE {LIVE_TABLE} ADD CONSTRAINT "{name}" {definition}')
+
+    cur.execute("DROP MATERIALIZED VIEW IF EXISTS country_latest")
+    cur.execute(COUNTRY_LATEST_VIEW)
+    cur.execute("CREATE UNIQUE INDEX idx_country_latest_iso3 ON country_latest(iso3)")
+
+    cur.execute("""
+        UPDATE country_year_versions SET status = 'retained', table_name = %s
+        WHERE version = %s
+    """, (archive_table(previous), previous))
+
+
+@click.command()
+@click.option('--rollback', 'rollback_to', metavar='VERSION', help='Swap a retained version back in')
+@click.option('--keep', 'keep_versions', default=KEEP_VERSIONS, show_default=True,
+              help='Retained versions to keep after a rollback')
+@click.option('--snapshots/--no-snapshots', default=True, help='Rewrite API snapshots after a rollback')
+@click.option('--cache/--no-cache', default=True, help='Rewrite the read cache after a rollback')
+@click.option('--cache-path', type=click.Path(dir_okay=False, path_type=Path), default=DEFAULT_CACHE_PATH,
+              envvar='GTI_CACHE_PATH', show_default=True, help='Where to write the read cache')
+def main(rollback_to: Optional[str], keep_versions: int, snapshots: bool, cache: bool, cache_path: Path):
+    """List country_year versions, or roll back to a retained one"""
+
+    # Load environment
+    from dotenv import load_dotenv
+    env_path = project_root / '.env'
+    if env_path.exists():
+        load_dotenv(env_path)
+
+    try:
+        with connection() as conn:
+            if rollback_to:
+                rollback_country_year(conn, rollback_to)
+                drop_expired_versions(conn, keep_versions)
+                if snapshots:
+                    export_snapshots(conn, rollback_to)
+                if cache:
+                    export_cache(conn, rollback_to, cache_path)
+
+            for version, status, row_count, published_at in list_versions(conn):
+                print(f"{version:<32} {status:<9} {row_count or 0:>9} rows  {published_at:%Y-%m-%d %H:%M:%S}")
+
+        if rollback_to:
+            print(f"✅ country_year rolled back to {rollback_to}")
+
+    except Exception as e:
+        print(f"❌ Version command failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Quality Checks - Sample-size filtering and year-over-year outlier flags
+Runs on whole arrays inside each assembly write, so it gates every publish
+"""
+
+import json
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from etl.pipelines.aggregation import PILLARS
+
+# country_year columns checked for year-over-year jumps
+QUALITY_METRICS = ['gti'] + PILLARS
+
+FLAG_COLUMNS = ['iso3', 'year', 'check_name', 'subject', 'value', 'threshold', 'details']
+
+
+class QualityGateError(Exception):
+    pass
+
+
+def filter_small_samples(observations: pd.DataFrame, minimum_sample_size: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Split observations into (kept, dropped) by survey sample size
+
+    Observations without a sample size (indices such as CPI) are always kept.
+    """
+    sample_n = pd.to_numeric(observations['sample_n'], errors='coerce')
+    too_small = (sample_n < minimum_sample_size).to_numpy()
+    return observations[~too_small], observations[too_small]
+
+
+def year_over_year_flags(scores: pd.DataFrame, threshold: float,
+                         metrics: Sequence[str] = QUALITY_METRICS) -> pd.DataFrame:
+    """Flag changes larger than threshold between consecutive computed years of a country
+
+    Rows are sorted once by (iso3, year); each metric is then compared with the
+    previous element of the same country using array lags.
+    """
+    if scores.empty:
+        return pd.DataFrame(columns=FLAG_COLUMNS)
+
+    iso3 = scores['iso3'].to_numpy()
+    years = scores['year'].to_numpy(dtype=np.int64)
+    order = np.lexsort((years, iso3))
+    iso3, years = iso3[order], years[order]
+    same_country = iso3[1:] == iso3[:-1]
+
+    flags = []
+    for metric in metrics:
+        values = scores[metric].to_numpy(dtype=float)[order]
+        delta = values[1:] - values[:-1]
+        hits = np.flatnonzero(same_country & (np.abs(np.nan_to_num(delta)) > threshold))
+        if not len(hits):
+            continue
+        flags.append(pd.DataFrame({
+            'iso3': iso3[hits + 1],
+            'year': years[hits + 1],
+            'check_name': 'yoy_outlier',
+            'subject': metric,
+            'value': delta[hits],
+            'threshold': threshold,
+            'details': [
+                {'previous_year': int(y), 'previous_value': float(p), 'current_value': float(c)}
+                for y, p, c in zip(years[hits], values[hits], values[hits + 1])
+            ],
+        }))
+
+    if not flags:
+        return pd.DataFrame(columns=FLAG_COLUMNS)
+    return pd.concat(flags, ignore_index=True)
+
+
+def low_sample_flags(conn, years: Optional[List[int]], minimum_sample_size: int) -> pd.DataFrame:
+    """Observations excluded from aggregation for having too small a sample"""
+    year_filter = ""
+    params: List[object] = [minimum_sample_size]
+    if years is not None:
+        year_filter = "AND year = ANY(%s)"
+        params.append(list(years))
+
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT iso3, year, source, trust_type, sample_n
+            FROM observations
+            WHERE sample_n < %s {year_filter}
+        """, params)
+        rows = cur.fetchall()
+
+    return pd.DataFrame({
+        'iso3': [r[0] for r in rows],
+        'year': [r[1] for r in rows],
+        'check_name': 'low_sample_size',
+        'subject': [f"{r[2]}:{r[3]}" for r in rows],
+        'value': [r[4] for r in rows],
+        'threshold': minimum_sample_size,
+        'details': [{'source': r[2], 'trust_type': r[3]} for r in rows],
+    }, columns=FLAG_COLUMNS)
+
+
+def run_quality_checks(conn, methodology, years: Optional[List[int]] = None,
+                       strict: bool = False) -> pd.DataFrame:
+    """Recompute quality flags for the live country_year and commit them
+
+    For checks outside a write; assembly gates its writes with check_quality.
+    """
+    flags = check_quality(conn, methodology, years, strict=strict)
+    conn.commit()
+    return flags
+
+
+def check_quality(conn, methodology, years: Optional[List[int]] = None, strict: bool = False,
+                  table: str = 'country_year') -> pd.DataFrame:
+    """Recompute quality flags for the given years (None = all) of table and store them
+
+    Flags for the checked years are replaced in the caller's open transaction,
+    so a publish can check its shadow table before the swap. With strict,
+    raises QualityGateError before storing anything when a year-over-year
+    outlier is found; the caller rolls back the write it guards.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT iso3, year, {', '.join(QUALITY_METRICS)} FROM {table}")
+        scores = pd.DataFrame.from_records(cur.fetchall(), columns=['iso3', 'year'] + QUALITY_METRICS)
+
+    outliers = year_over_year_flags(scores, methodology.outlier_threshold)
+    if years is not None:
+        outliers = outliers[outliers['year'].isin(years)]
+    flags = pd.concat(
+        [outliers, low_sample_flags(conn, years, methodology.minimum_sample_size)],
+        ignore_index=True
+    )
+
+    print(f"Quality checks: {len(outliers)} year-over-year outliers, "
+          f"{len(flags) - len(outliers)} low-sample observations")
+    if strict and len(outliers):
+        sample = ', '.join(f"{r.iso3} {r.year} {r.subject}" for r in outliers.head(5).itertuples())
+        raise QualityGateError(f"{len(outliers)} year-over-year outliers (e.g. {sample})")
+
+    save_quality_flags(conn, flags, years, methodology.version)
+    return flags
+
+
+def save_quality_flags(conn, flags: pd.DataFrame, years: Optional[List[int]], version: str) -> None:
+    """Replace stored flags for the checked years; the caller commits"""
+    with conn.cursor() as cur:
+        if years is None:
+            cur.execute("DELETE FROM quality_flags")
+        else:
+            cur.execute("DELETE FROM quality_flags WHERE year = ANY(%s)", (list(years),))
+
+        if len(flags):
+            execute_values(cur, f"""
+                INSERT INTO quality_flags ({', '.join(FLAG_COLUMNS)}, version)
+                VALUES %s
+            """, [
+                (r.iso3, int(r.year), r.check_name, r.subject, float(r.value), float(r.threshold),
+                 json.dumps(r.details), version)
+                for r in flags.itertuples(index=False)
+            ])
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Scenarios - What-if GTI weights over pillar scores held in memory
+A batch of weight sets is compiled into coefficient tables and evaluated in one pass per availability mask
+"""
+
+import sys
+import json
+import click
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import yaml
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from etl.lib.db import connection
+from etl.pipelines.aggregation import PILLARS
+from etl.pipelines.assemble import parse_years
+from etl.pipelines.methodology import PILLAR_BITS, Methodology, compile_combinations, load_methodology
+
+# Scenario results kept per engine; each entry holds one GTI and one rank per country-year
+DEFAULT_CACHE_SIZE = 1024
+
+# A scenario is {'weights': {pillar: weight}, 'rules': {aggregation section}}, a bare
+# {pillar: weight} mapping, or a weight vector in PILLARS order
+ScenarioSpec = Union[Mapping, Sequence[float], np.ndarray]
+
+
+def compile_scenarios(specs: Union[Sequence[ScenarioSpec], np.ndarray], methodology: Methodology) -> np.ndarray:
+    """(scenarios, masks, pillars) GTI coefficient tables for a batch of scenarios
+
+    Pillar weights replace the primary formula, renormalised to sum to 1; the
+    methodology's two-pillar reweighting and proxy rules still apply to
+    country-years missing a pillar. Scenario rules use the aggregation syntax
+    of methodology.yaml and override those rows; anything a scenario does not
+    set keeps the methodology's coefficients.
+    """
+    vectors = np.full((len(specs), len(PILLARS)), np.nan)
+    rules: Dict[int, Mapping] = {}
+    if isinstance(specs, np.ndarray):
+        vectors[:] = specs.reshape(len(specs), len(PILLARS))
+    else:
+        for i, spec in enumerate(specs):
+            if not isinstance(spec, Mapping):
+                vectors[i] = spec
+                continue
+            if 'weights' not in spec and 'rules' not in spec:
+                spec = {'weights': spec}
+            weights = spec.get('weights')
+            if weights:
+                unknown = set(weights) - set(PILLARS)
+                if unknown:
+                    raise ValueError(f"Unknown pillars in scenario weights: {sorted(unknown)}")
+                vectors[i] = [weights.get(p, methodology.pillar_weights[j]) for j, p in enumerate(PILLARS)]
+            if spec.get('rules'):
+                rules[i] = spec['rules']
+
+    if (vectors < 0).any():
+        raise ValueError("Scenario weights must not be negative")
+    if (vectors.sum(axis=1) == 0).any():
+        raise ValueError("Scenario weights must not all be zero")
+
+    tables = np.repeat(methodology.combinations[None], len(specs), axis=0)
+
+    # Weights stand in for the primary formula, the row where every pillar is available
+    primary = int(PILLAR_BITS.sum())
+    weighted = ~np.isnan(vectors).any(axis=1)
+    if weighted.any() and not np.isnan(methodology.combinations[primary]).any():
+        tables[weighted, primary] = vectors[weighted] / vectors[weighted].sum(axis=1, keepdims=True)
+
+    for i, scenario_rules in rules.items():
+        overrides, _ = compile_combinations(scenario_rules)
+        defined = ~np.isnan(overrides).any(axis=1)
+        tables[i, defined] = overrides[defined]
+
+    return tables
+
+
+def compile_scenario(spec: ScenarioSpec, methodology: Methodology) -> np.ndarray:
+    """GTI coefficient table (one row per availability mask) for one scenario"""
+    return compile_scenarios([spec], methodology)[0]
+
+
+def scenario_keys(tables: np.ndarray) -> List[str]:
+    """sha256 of each compiled coefficient table, so equivalent scenarios share a key"""
+    # Rounding absorbs float noise and + 0.0 folds -0.0 into 0.0; NaN keeps one bit pattern
+    canonical = np.where(np.isnan(tables), np.nan, np.round(tables, 12) + 0.0).astype('<f8')
+    return [hashlib.sha256(table.tobytes()).hexdigest() for table in canonical]
+
+
+def scenario_key(table: np.ndarray) -> str:
+    return scenario_keys(table[None])[0]
+
+
+def sensitivity_scenarios(methodology: Methodology, pillar: str,
+                          weights: Union[Sequence[float], np.ndarray]) -> List[Dict]:
+    """Scenarios that set one pillar's weight and rescale the others to keep the total at 1"""
+    if pillar not in PILLARS:
+        raise ValueError(f"Unknown pillar '{pillar}'")
+    base = methodology.pillar_weights / methodology.pillar_weights.sum()
+    column = PILLARS.index(pillar)
+    others = base.sum() - base[column]
+
+    scenarios = []
+    for weight in weights:
+        vector = base * (1 - weight) / others
+        vector[column] = weight
+        scenarios.append({'weights': dict(zip(PILLARS, vector.tolist()))})
+    return scenarios
+
+
+@dataclass
+class ScenarioResults:
+    """GTI and within-year rank for each scenario (rows) and country-year (columns)"""
+    keys: List[str]
+    iso3: np.ndarray
+    years: np.ndarray
+    gti: np.ndarray  # (scenarios, country-years), NaN where no rule applies
+    rank: np.ndarray  # 1 = highest GTI in its year, 0 = no GTI
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def frame(self, scenario: int) -> pd.DataFrame:
+        """One scenario as a country-year table"""
+        return pd.DataFrame({
+            'iso3': self.iso3,
+            'year': self.years,
+            'gti': self.gti[scenario],
+            'rank': self.rank[scenario],
+        })
+
+
+class ScenarioEngine:
+    """Evaluates scenarios against a fixed (country-years x pillars) matrix
+
+    Pillar scores are the stored, carried-forward values from country_year, so
+    a scenario only changes how pillars are combined. Rows are held (and
+    results returned) grouped by year. Results are cached by scenario_key.
+    """
+
+    def __init__(self, iso3: Union[Sequence[str], np.ndarray], years: Union[Sequence[int], np.ndarray],
+                 pillars: np.ndarray, methodology: Optional[Methodology] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.methodology = methodology or load_methodology()
+
+        # Rows are kept in (year, availability mask) order: each year is a contiguous
+        # block for ranking and each mask a contiguous run within it for combining
+        year_values: np.ndarray = np.asarray(years, dtype=np.int16)
+        pillars = np.asarray(pillars, dtype=np.float64).reshape(len(year_values), len(PILLARS))
+        masks = self.methodology.availability_mask(pillars)
+        order = np.lexsort((masks, year_values))
+        self.iso3 = np.asarray(iso3, dtype=object)[order]
+        self.years = year_values[order]
+        self.pillars = pillars[order]
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[str, tuple]' = OrderedDict()
+
+        masks = masks[order]
+        filled = np.nan_to_num(self.pillars)
+        run_starts = np.flatnonzero(np.r_[True, (np.diff(self.years) != 0) | (np.diff(masks) != 0)])
+        run_stops = np.append(run_starts[1:], len(order))
+        self._mask_runs = [
+            (masks[start], start, stop, filled[start:stop].T) for start, stop in zip(run_starts, run_stops)
+        ]
+
+        # [start, stop) of each year's block
+        _, starts = np.unique(self.years, return_index=True)
+        self._year_blocks = list(zip(starts, np.append(starts[1:], len(self.years))))
+
+    @classmethod
+    def from_database(cls, conn, years: Optional[List[int]] = None,
+                      methodology: Optional[Methodology] = None, **kwargs) -> 'ScenarioEngine':
+        """Load pillar scores from country_year once"""
+        where_clause = "WHERE year = ANY(%s)" if years is not None else ""
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT iso3, year, interpersonal::float8, institutional::float8, governance::float8
+                FROM country_year
+                {where_clause}
+                ORDER BY year, iso3
+            """, [list(years)] if years is not None else None)
+            rows = cur.fetchall()
+
+        frame = pd.DataFrame(rows, columns=['iso3', 'year'] + PILLARS)
+        return cls(
+            frame['iso3'].to_numpy(), frame['year'].to_numpy(),
+            frame[PILLARS].to_numpy(dtype=float), methodology, **kwargs
+        )
+
+    def __len__(self) -> int:
+        return len(self.years)
+
+    def evaluate(self, scenarios: Union[Sequence[ScenarioSpec], np.ndarray]) -> ScenarioResults:
+        """GTI and rank for every scenario; cached scenarios are not recomputed
+
+        Scenarios may also be passed as a (scenarios, pillars) array of weights.
+        """
+        tables = compile_scenarios(scenarios, self.methodology)
+        keys = scenario_keys(tables)
+
+        computed = {}
+        missing = list(dict.fromkeys(k for k in keys if k not in self._cache))
+        if missing:
+            first = {key: row for row, key in reversed(list(enumerate(keys)))}
+            gti = self._combine(tables[[first[key] for key in missing]])
+            rank = self._rank(gti)
+            computed = {key: (gti[row].copy(), rank[row].copy()) for row, key in enumerate(missing)}
+
+        gti = np.empty((len(keys), len(self)))
+        rank = np.empty((len(keys), len(self)), dtype=np.int32)
+        for row, key in enumerate(keys):
+            if key not in computed:
+                self._cache.move_to_end(key)
+            gti[row], rank[row] = computed.get(key) or self._cache[key]
+
+        for key, result in computed.items():
+            self._store(key, result)
+
+        return ScenarioResults(keys, self.iso3, self.years, gti, rank)
+
+    def _combine(self, tables: np.ndarray) -> np.ndarray:
+        """(scenarios, country-years) GTI from (scenarios, masks, pillars) coefficient tables"""
+        gti = np.empty((len(tables), len(self)))
+        for mask, start, stop, filled in self._mask_runs:
+            gti[:, start:stop] = tables[:, mask, :] @ filled
+        return gti
+
+    def _rank(self, gti: np.ndarray) -> np.ndarray:
+        """Rank within each year, highest GTI first; 0 where there is no GTI"""
+        rank = np.zeros(gti.shape, dtype=np.int32)
+        scenarios = np.arange(len(gti))[:, None]
+        for start, stop in self._year_blocks:
+            block = gti[:, start:stop]
+            # NaN sorts last; ties are ordered arbitrarily
+            order = np.argsort(-block, axis=1)
+            ranks = rank[:, start:stop]
+            ranks[scenarios, order] = np.arange(1, stop - start + 1, dtype=np.int32)
+            ranks[np.isnan(block)] = 0
+        return rank
+
+    def _store(self, key: str, result: tuple) -> None:
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """Parse 'institutional=0.5,interpersonal=0.25,governance=0.25'"""
+    weights = {}
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        pillar, _, weight = part.partition('=')
+        try:
+            weights[pillar.strip()] = float(weight)
+        except ValueError:
+            raise click.BadParameter(f"Invalid weight '{part}'")
+    return weights
+
+
+@click.command()
+@click.option('--years', 'years_spec', help='Years to load, e.g. 2015-2024 (default: all)')
+@click.option('--weights', 'weight_specs', multiple=True,
+              help='Pillar weights for one scenario, e.g. institutional=0.5,interpersonal=0.25')
+@click.option('--file', 'scenario_file', type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help='YAML list of scenarios with weights and/or rules')
+@click.option('--sensitivity', type=click.Choice(PILLARS), help='Sweep this pillar\'s weight from 0 to 1')
+@click.option('--steps', default=11, help='Weights in the --sensitivity sweep')
+@click.option('--top', default=10, help='Countries to print per scenario for the latest year')
+@click.option('--output', type=click.Path(dir_okay=False, path_type=Path), help='Write results as JSON')
+def main(years_spec: Optional[str], weight_specs: Sequence[str], scenario_file: Optional[Path],
+         sensitivity: Optional[str], steps: int, top: int, output: Optional[Path]):
+    """Evaluate what-if weight scenarios against stored pillar scores"""
+
+    # Load environment
+    from dotenv import load_dotenv
+    env_path = project_root / '.env'
+    if env_path.exists():
+        load_dotenv(env_path)
+
+    methodology = load_methodology()
+    scenarios: List[ScenarioSpec] = [{'weights': parse_weights(w)} for w in weight_specs]
+    if scenario_file:
+        with open(scenario_file, 'r') as f:
+            scenarios.extend(yaml.safe_load(f) or [])
+    if sensitivity:
+        scenarios.extend(sensitivity_scenarios(methodology, sensitivity, np.linspace(0, 1, steps)))
+    if not scenarios:
+        raise click.UsageError('Pass --weights, --file or --sensitivity')
+
+    try:
+        with connection() as conn:
+            engine = ScenarioEngine.from_database(
+                conn, parse_years(years_spec) if years_spec else None, methodology
+            )
+        results = engine.evaluate(scenarios)
+        print(f"Evaluated {len(results)} scenarios over {len(engine)} country-years")
+
+        latest = int(engine.years.max()) if len(engine) else None
+        for i, spec in enumerate(scenarios):
+            frame = results.frame(i)
+            leaders = frame[(frame['year'] == latest) & (frame['rank'] > 0)].nsmallest(top, 'rank')
+            print(f"\n{results.keys[i][:12]} {json.dumps(spec, default=float)}")
+            for row in leaders.itertuples():
+                print(f"  {row.rank:>3}. {row.iso3} {row.gti:.1f}")
+
+        if output:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with open(output, 'w') as f:
+                json.dump([
+                    {'key': key, 'scenario': spec, 'scores': results.frame(i).dropna().to_dict('records')}
+                    for i, (key, spec) in enumerate(zip(results.keys, scenarios))
+                ], f, default=float)
+            print(f"Results written to {output}")
+
+        print("✅ Scenario evaluation completed")
+
+    except Exception as e:
+        print(f"❌ Scenario evaluation failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+Country-Year Scores - Struct-of-arrays container for computed scores
+One NumPy array per field instead of one object per country-year; sources are per-pillar bitmasks
+"""
+
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from etl.pipelines.aggregation import MAX_SOURCE_BITS, PILLARS, SOURCE_MASK_COLUMNS
+
+# Confidence tiers stored as int8 codes; -1 means no tier
+TIER_CODES = ('A', 'B', 'C')
+NO_TIER = -1
+
+# country_year columns for the bootstrap 5th, 50th and 95th GTI percentiles
+INTERVAL_COLUMNS = ['gti_p5', 'gti_p50', 'gti_p95']
+
+
+def tier_code(tier: Optional[str]) -> int:
+    return TIER_CODES.index(tier) if tier else NO_TIER
+
+
+class CountryYearScores:
+    """Computed scores for many country-years, one array per field
+
+    Country codes index into `countries` and bit i of a source mask refers to
+    `sources[i]`, so neither strings nor per-row dicts are stored per row.
+    Indexing with an int returns a CountryYearScoreView; slices and masks
+    return a new container sharing the country and source lists.
+    """
+
+    __slots__ = (
+        'countries', 'country_codes', 'years', 'pillars', 'source_masks', 'sources',
+        'gti', 'confidence_score', 'tier_codes', 'freshness', 'gti_intervals'
+    )
+
+    def __init__(self, countries: Union[Sequence[str], np.ndarray], country_codes, years, pillars,
+                 sources: Sequence[str] = (), source_masks=None, gti=None,
+                 confidence_score=None, tier_codes=None, freshness=None, gti_intervals=None):
+        n = len(years)
+        self.countries = np.asarray(countries, dtype=object)
+        self.country_codes = np.asarray(country_codes, dtype=np.int32)
+        self.years = np.asarray(years, dtype=np.int16)
+        self.pillars = np.asarray(pillars, dtype=np.float64).reshape(n, len(PILLARS))
+        self.sources = tuple(sources)
+        if len(self.sources) > MAX_SOURCE_BITS:
+            raise ValueError(f"At most {MAX_SOURCE_BITS} distinct sources fit in a source mask")
+
+        self.source_masks = (
+            np.zeros((n, len(PILLARS)), dtype=np.int64) if source_masks is None
+            else np.asarray(source_masks, dtype=np.int64).reshape(n, len(PILLARS))
+        )
+        self.gti = np.full(n, np.nan) if gti is None else np.asarray(gti, dtype=np.float64)
+        self.confidence_score = (
+            np.zeros(n) if confidence_score is None else np.asarray(confidence_score, dtype=np.float64)
+        )
+        self.tier_codes = (
+            np.full(n, NO_TIER, dtype=np.int8) if tier_codes is None else np.asarray(tier_codes, dtype=np.int8)
+        )
+        self.freshness = np.ones(n) if freshness is None else np.asarray(freshness, dtype=np.float64)
+        # Bootstrap GTI percentiles (INTERVAL_COLUMNS), NaN unless uncertainty was computed
+        self.gti_intervals = (
+            np.full((n, len(INTERVAL_COLUMNS)), np.nan) if gti_intervals is None
+            else np.asarray(gti_intervals, dtype=np.float64).reshape(n, len(INTERVAL_COLUMNS))
+        )
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'CountryYearScores':
+        """Build from aggregate_pillars / carry_forward output indexed by (iso3, year)"""
+        codes, countries = pd.factorize(frame.index.get_level_values('iso3'))
+        return cls(
+            countries, codes, frame.index.get_level_values('year'),
+            frame[PILLARS].to_numpy(dtype=float),
+            sources=frame.attrs.get('sources', ()),
+            source_masks=frame[SOURCE_MASK_COLUMNS].to_numpy(dtype=np.int64),
+            freshness=frame['freshness'].to_numpy(dtype=float) if 'freshness' in frame else None
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> 'CountryYearScores':
+        """Build from CountryYearScore objects (or anything with the same attributes)"""
+        records = list(records)
+        source_ids: Dict[str, int] = {}
+        masks = np.zeros((len(records), len(PILLARS)), dtype=np.int64)
+        for row, record in enumerate(records):
+            for pillar, names in (record.sources_used or {}).items():
+                column = PILLARS.index(pillar)
+                for name in names:
+                    masks[row, column] |= 1 << source_ids.setdefault(name, len(source_ids))
+
+        codes, countries = pd.factorize(pd.Index([r.iso3 for r in records], dtype=object))
+        return cls(
+            countries, codes, [r.year for r in records],
+            [[_nan(r.interpersonal), _nan(r.institutional), _nan(r.governance)] for r in records],
+            sources=list(source_ids),
+            source_masks=masks,
+            gti=[_nan(r.gti) for r in records],
+            confidence_score=[r.confidence_score for r in records],
+            tier_codes=[tier_code(r.confidence_tier) for r in records],
+            freshness=[getattr(r, 'freshness', 1.0) for r in records],
+            gti_intervals=[[_nan(getattr(r, name, None)) for name in INTERVAL_COLUMNS] for r in records]
+        )
+
+    def __len__(self) -> int:
+        return len(self.years)
+
+    def __iter__(self) -> Iterator['CountryYearScoreView']:
+        return (CountryYearScoreView(self, row) for row in range(len(self)))
+
+    def __getitem__(self, key) -> Union['CountryYearScoreView', 'CountryYearScores']:
+        if isinstance(key, (int, np.integer)):
+            row = int(key) + (len(self) if key < 0 else 0)
+            if not 0 <= row < len(self):
+                raise IndexError(key)
+            return CountryYearScoreView(self, row)
+        return self.take(key)
+
+    def take(self, index) -> 'CountryYearScores':
+        """Rows selected by a slice, boolean mask or integer index array"""
+        return CountryYearScores(
+            self.countries, self.country_codes[index], self.years[index], self.pillars[index],
+            sources=self.sources,
+            source_masks=self.source_masks[index],
+            gti=self.gti[index],
+            confidence_score=self.confidence_score[index],
+            tier_codes=self.tier_codes[index],
+            freshness=self.freshness[index],
+            gti_intervals=self.gti_intervals[index]
+        )
+
+    @property
+    def iso3(self) -> np.ndarray:
+        return self.countries[self.country_codes]
+
+    @property
+    def confidence_tier(self) -> np.ndarray:
+        """Tier letters, None where no tier applies"""
+        return np.array(TIER_CODES + (None,), dtype=object)[self.tier_codes]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the per-row arrays"""
+        return sum(getattr(self, name).nbytes for name in (
+            'country_codes', 'years', 'pillars', 'source_masks',
+            'gti', 'confidence_score', 'tier_codes', 'freshness', 'gti_intervals'
+        ))
+
+    def sources_used(self, row: int) -> Dict[str, List[str]]:
+        """Decode one row's source masks into {pillar: [source, ...]}"""
+        return self._decode(self.source_masks[row])
+
+    def sources_json(self) -> np.ndarray:
+        """sources_used as JSON per row (None when empty), encoded once per distinct mask combination"""
+        if not len(self):
+            return np.empty(0, dtype=object)
+        unique, inverse = np.unique(self.source_masks, axis=0, return_inverse=True)
+        encoded = [json.dumps(decoded) if decoded else None for decoded in map(self._decode, unique)]
+        return np.array(encoded, dtype=object)[inverse.reshape(-1)]
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per country-year with country_year column names"""
+        frame = pd.DataFrame({'iso3': self.iso3, 'year': self.years})
+        for column, pillar in enumerate(PILLARS):
+            frame[pillar] = self.pillars[:, column]
+        frame['gti'] = self.gti
+        for column, name in enumerate(INTERVAL_COLUMNS):
+            frame[name] = self.gti_intervals[:, column]
+        frame['confidence_score'] = self.confidence_score
+        frame['confidence_tier'] = self.confidence_tier
+        frame['sources_used'] = self.sources_json()
+        return frame
+
+    def _decode(self, masks: np.ndarray) -> Dict[str, List[str]]:
+        decoded = {}
+        for pillar, mask in zip(PILLARS, masks):
+            mask = int(mask)
+            if mask:
+                decoded[pillar] = [name for bit, name in enumerate(self.sources) if mask >> bit & 1]
+        return decoded
+
+
+class CountryYearScoreView:
+    """Read-only, slotted view of one row with CountryYearScore's attributes"""
+
+    __slots__ = ('_scores', '_row')
+
+    def __init__(self, scores: CountryYearScores, row: int):
+        self._scores = scores
+        self._row = row
+
+    @property
+    def iso3(self) -> str:
+        return self._scores.countries[self._scores.country_codes[self._row]]
+
+    @property
+    def year(self) -> int:
+        return int(self._scores.years[self._row])
+
+    @property
+    def interpersonal(self) -> Optional[float]:
+        return _none(self._scores.pillars[self._row, 0])
+
+    @property
+    def institutional(self) -> Optional[float]:
+        return _none(self._scores.pillars[self._row, 1])
+
+    @property
+    def governance(self) -> Optional[float]:
+        return _none(self._scores.pillars[self._row, 2])
+
+    @property
+    def gti(self) -> Optional[float]:
+        return _none(self._scores.gti[self._row])
+
+    @property
+    def gti_p5(self) -> Optional[float]:
+        return _none(self._scores.gti_intervals[self._row, 0])
+
+    @property
+    def gti_p50(self) -> Optional[float]:
+        return _none(self._scores.gti_intervals[self._row, 1])
+
+    @property
+    def gti_p95(self) -> Optional[float]:
+        return _none(self._scores.gti_intervals[self._row, 2])
+
+    @property
+    def confidence_score(self) -> float:
+        return float(self._scores.confidence_score[self._row])
+
+    @property
+    def confidence_tier(self) -> Optional[str]:
+        code = self._scores.tier_codes[self._row]
+        return TIER_CODES[code] if code != NO_TIER else None
+
+    @property
+    def freshness(self) -> float:
+        return float(self._scores.freshness[self._row])
+
+    @property
+    def sources_used(self) -> Dict[str, List[str]]:
+        return self._scores.sources_used(self._row)
+
+    def __repr__(self) -> str:
+        return (f"CountryYearScoreView(iso3={self.iso3!r}, year={self.year}, gti={self.gti}, "
+                f"confidence_tier={self.confidence_tier!r})")
+
+
+def _nan(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def _none(value) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
@@ -0,0 +1,188 @@
+"""
+API Snapshots - Precomputed, versioned JSON responses written after each assembly
+The API serves these from memory or disk and only falls back to Postgres when none exist
+"""
+
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent.parent / 'data' / 'snapshots'
+
+# /score trust_type values and the country_year column each one reads
+TRUST_TYPE_COLUMNS = {
+    'core': 'gti',
+    'interpersonal': 'interpersonal',
+    'institutional': 'institutional',
+    'governance': 'governance',
+    'proxy': 'governance',
+}
+
+# Older snapshot versions kept next to the current one
+KEEP_VERSIONS = 3
+
+
+def snapshot_version(methodology_version: str) -> str:
+    """Version label for a run published now, to the millisecond"""
+    now = datetime.now(timezone.utc)
+    return f"{methodology_version}-{now.strftime('%Y%m%dT%H%M%S')}{now.microsecond // 1000:03d}Z"
+
+
+def methodology_version_of(version: str) -> str:
+    """Methodology version a run version was made from (the timestamp suffix holds no '-')"""
+    return version.rsplit('-', 1)[0]
+
+
+def export_snapshots(conn, version: str, snapshot_dir: Path = DEFAULT_SNAPSHOT_DIR) -> Path:
+    """Write every API response shape for the current country_year contents
+
+    Files go to <snapshot_dir>/<version>/ and become visible only when
+    current.json is switched to the new version at the end.
+    """
+    countries = _query_frame(conn, "SELECT iso3, name, region FROM countries")
+    scores = _query_frame(conn, """
+        SELECT iso3, year, gti, interpersonal, institutional, governance,
+               confidence_tier, confidence_score, sources_used
+        FROM country_year
+    """)
+    for column in ['gti', 'interpersonal', 'institutional', 'governance', 'confidence_score']:
+        scores[column] = scores[column].astype(float)
+
+    target = snapshot_dir / version
+    if target.exists():
+        shutil.rmtree(target)
+
+    scores = scores.merge(countries[['iso3', 'name']], on='iso3', how='inner')
+    latest_year = int(scores['year'].max()) if len(scores) else None
+
+    files = 0
+    for year, year_scores in scores.sort_values('name').groupby('year'):
+        for trust_type, column in TRUST_TYPE_COLUMNS.items():
+            rows = year_scores[year_scores[column].notna()]
+            _write_json(target / 'score' / str(year) / f'{trust_type}.json', [
+                {
+                    'iso3': r.iso3,
+                    'year': int(r.year),
+                    'gti': _number(getattr(r, column)),
+                    'confidence_tier': r.confidence_tier,
+                }
+                for r in rows.itertuples(index=False)
+            ])
+            files += 1
+
+    _write_json(target / 'countries.json', _countries_response(countries, scores))
+    files += 1
+
+    series_by_country = {iso3: group for iso3, group in scores.groupby('iso3')}
+    for country in countries.itertuples(index=False):
+        series = series_by_country.get(country.iso3, scores.iloc[0:0])
+        _write_json(target / 'country' / f'{country.iso3}.json', _country_response(country, series))
+        files += 1
+
+    _publish(snapshot_dir, version, latest_year)
+    print(f"Wrote {files} API snapshots to {target}")
+    return target
+
+
+def _query_frame(conn, sql: str) -> pd.DataFrame:
+    with conn.cursor() as cur:
+        cur.execute(sql)
+        columns = [d[0] for d in cur.description]
+        return pd.DataFrame.from_records(cur.fetchall(), columns=columns)
+
+
+def _countries_response(countries: pd.DataFrame, scores: pd.DataFrame) -> List[Dict]:
+    """/countries: every country with its latest computed year"""
+    latest = scores.sort_values('year').drop_duplicates('iso3', keep='last').set_index('iso3')
+    response = []
+    for country in countries.sort_values('name').itertuples(index=False):
+        row = latest.loc[country.iso3] if country.iso3 in latest.index else None
+        response.append({
+            'iso3': country.iso3,
+            'name': country.name,
+            'region': country.region,
+            'latest_year': int(row['year']) if row is not None else None,
+            'latest_gti': _number(row['gti']) if row is not None else None,
+            'confidence_tier': row['confidence_tier'] if row is not None else None,
+        })
+    return response
+
+
+def _country_response(country, series: pd.DataFrame) -> Dict:
+    """/country/:iso3 without a year filter"""
+    rows = series.sort_values('year', ascending=False)
+
+    sources_used: Dict[str, List[str]] = {}
+    for sources in rows['sources_used']:
+        if isinstance(sources, str):
+            sources = json.loads(sources)
+        for pillar, names in (sources or {}).items():
+            known = sources_used.setdefault(pillar, [])
+            known.extend(n for n in names if n not in known)
+
+    return {
+        'iso3': country.iso3,
+        'name': country.name,
+        'region': country.region,
+        'series': [
+            {
+                'year': int(r.year),
+                'gti': _number(r.gti),
+                'interpersonal': _number(r.interpersonal),
+                'institutional': _number(r.institutional),
+                'governance': _number(r.governance),
+                'confidence_tier': r.confidence_tier,
+                'confidence_score': _number(r.confidence_score),
+            }
+            for r in rows.itertuples(index=False)
+        ],
+        'sources_used': sources_used,
+    }
+
+
+def _number(value) -> Optional[float]:
+    return None if value is None or pd.isna(value) else float(value)
+
+
+def _write_json(path: Path, payload) -> None:
+    """Write a JSON file plus precompressed gzip (and brotli when available) variants"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    path.write_bytes(body)
+    path.with_name(path.name + '.gz').write_bytes(gzip.compress(body, compresslevel=9))
+    if brotli is not None:
+        path.with_name(path.name + '.br').write_bytes(brotli.compress(body))
+
+
+def _publish(snapshot_dir: Path, version: str, latest_year: Optional[int]) -> None:
+    """Atomically point current.json at the new version and prune old ones"""
+    pointer = {
+        'version': version,
+        'methodology_version': methodology_version_of(version),
+        'path': version,
+        'latest_year': latest_year,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+    tmp_path = snapshot_dir / 'current.json.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(pointer, f, indent=2)
+    os.replace(tmp_path, snapshot_dir / 'current.json')
+
+    versions = sorted(
+        (p for p in snapshot_dir.iterdir() if p.is_dir()),
+        key=lambda p: p.stat().st_mtime
+    )
+    for old in versions[:-(KEEP_VERSIONS + 1)]:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
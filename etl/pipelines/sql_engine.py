@@ -0,0 +1,89 @@
+"""
+SQL Assembly Engine - Run pillar aggregation and GTI combination inside Postgres
+Methodology weights are mirrored into tables so assemble_country_year() (migration 004) scores every country-year set-based
+"""
+
+from typing import List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from etl.pipelines.aggregation import PILLARS, TRUST_TYPE_PILLARS
+from etl.pipelines.methodology import PILLAR_BITS, Methodology
+
+METHODOLOGY_TABLES = [
+    'methodology_settings', 'methodology_pillars', 'methodology_trust_types',
+    'methodology_source_weights', 'methodology_combinations',
+]
+
+
+def sync_methodology(cur, methodology: Methodology) -> None:
+    """Replace the methodology_* tables with the compiled methodology
+
+    Runs in the caller's transaction, so a failed assembly leaves the previous
+    tables in place.
+    """
+    for table in METHODOLOGY_TABLES:
+        cur.execute(f"DELETE FROM {table}")
+
+    cur.execute("""
+        INSERT INTO methodology_settings
+        (version, minimum_sample_size, max_data_age_years, survey_grace_years, decay_after_grace)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (methodology.version, methodology.minimum_sample_size, methodology.max_data_age_years,
+          methodology.survey_grace_years, methodology.decay_after_grace))
+
+    execute_values(cur, "INSERT INTO methodology_pillars (pillar, bit, carried) VALUES %s", [
+        (pillar, int(bit), pillar in methodology.carried_pillars)
+        for pillar, bit in zip(PILLARS, PILLAR_BITS)
+    ])
+    execute_values(cur, "INSERT INTO methodology_trust_types (trust_type, pillar) VALUES %s",
+                   list(TRUST_TYPE_PILLARS.items()))
+    execute_values(cur, "INSERT INTO methodology_source_weights (pillar, source, weight) VALUES %s", [
+        (row.pillar, row.source, float(row.weight))
+        for row in methodology.source_weights.itertuples(index=False)
+    ])
+    execute_values(cur, f"""
+        INSERT INTO methodology_combinations
+        (mask, {', '.join(PILLARS)}, confidence_tier, confidence) VALUES %s
+    """, [
+        (mask, *map(float, methodology.combinations[mask]), tier, float(methodology.tier_confidence[mask]))
+        for mask, tier in enumerate(methodology.tiers)
+        if tier is not None
+    ])
+
+
+def assemble_in_database(cur, columns: List[str], upsert: str, version: str,
+                         years: Optional[List[int]] = None, sources: Optional[List[str]] = None,
+                         keys: Optional[List[Tuple[str, int]]] = None, table: str = 'country_year') -> int:
+    """Insert assemble_country_year() results into table; returns the row count
+
+    upsert is the conflict clause ('' for an empty shadow table). Bootstrap
+    interval columns are written as NULL.
+    """
+    computed = {
+        'iso3', 'year', 'gti', 'confidence_score', 'confidence_tier', 'sources_used', *PILLARS
+    }
+    select = [
+        '%(version)s' if c == 'version' else f'scores.{c}' if c in computed else 'NULL'
+        for c in columns
+    ]
+    cur.execute(f"""
+        INSERT INTO {table} ({', '.join(columns)})
+        SELECT {', '.join(select)}
+        FROM assemble_country_year(%(years)s, %(sources)s, %(key_iso3)s, %(key_years)s) scores
+        {upsert}
+    """, {
+        'years': list(years) if years is not None else None,
+        'sources': list(sources) if sources else None,
+        'key_iso3': [k[0] for k in keys] if keys is not None else None,
+        'key_years': [k[1] for k in keys] if keys is not None else None,
+        'version': version,
+    })
+    return cur.rowcount
+
+
+def refresh_country_latest(conn) -> None:
+    """Rebuild the country_latest view without blocking readers"""
+    with conn.cursor() as cur:
+        cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY country_latest")
+    conn.commit()
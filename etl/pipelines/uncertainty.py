@@ -0,0 +1,145 @@
+"""
+Uncertainty - Bootstrap intervals for the GTI
+Every resample is one slice of a (B x country-years x pillars) tensor; countries are split across processes
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from etl.pipelines.aggregation import PILLARS, SOURCE_MASK_COLUMNS, TRUST_TYPE_PILLARS, carry_forward
+
+if TYPE_CHECKING:
+    from etl.pipelines.methodology import Methodology
+
+PERCENTILES = [5, 50, 95]
+
+# Countries per worker task; fixed so results do not depend on the number of cores
+COUNTRIES_PER_CHUNK = 25
+
+# Upper bound on float64 cells held by one batch of resamples
+BATCH_CELLS = 32_000_000
+
+
+def bootstrap_intervals(observations: pd.DataFrame, targets: pd.MultiIndex, methodology: 'Methodology',
+                        n_resamples: int, seed: int = 0, max_workers: Optional[int] = None) -> np.ndarray:
+    """GTI percentiles (PERCENTILES) for each target (iso3, year) as an (N, 3) array
+
+    Each resample redraws the observations of every (country-year, pillar) with
+    replacement and draws pillar weights from a Dirichlet centred on the
+    methodology weights. Rows without a GTI rule are NaN.
+    """
+    intervals = np.full((len(targets), len(PERCENTILES)), np.nan)
+    if not len(targets) or n_resamples <= 0:
+        return intervals
+
+    countries = pd.unique(targets.get_level_values('iso3'))
+    chunks = [countries[i:i + COUNTRIES_PER_CHUNK] for i in range(0, len(countries), COUNTRIES_PER_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    target_iso3 = targets.get_level_values('iso3')
+    obs_iso3 = observations['iso3']
+    tasks = []
+    for chunk, chunk_seed in zip(chunks, seeds):
+        rows = np.flatnonzero(target_iso3.isin(chunk))
+        tasks.append((
+            rows,
+            (observations[obs_iso3.isin(chunk)], targets[rows], methodology, n_resamples, chunk_seed)
+        ))
+
+    if len(tasks) == 1:
+        rows, args = tasks[0]
+        intervals[rows] = _bootstrap_chunk(*args)
+        return intervals
+
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        futures = [(rows, pool.submit(_bootstrap_chunk, *args)) for rows, args in tasks]
+        for rows, future in futures:
+            intervals[rows] = future.result()
+    return intervals
+
+
+def _bootstrap_chunk(observations: pd.DataFrame, targets: pd.MultiIndex, methodology: 'Methodology',
+                     n_resamples: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """Percentiles for the targets of one group of countries"""
+    rng = np.random.default_rng(seed)
+
+    scores, weights, group_ids, starts, sizes, positions = _resampling_layout(observations, targets, methodology)
+    n_groups = len(sizes)
+    available = ~np.isnan(positions)
+    group_index = np.where(available, positions, 0).astype(np.int64)
+
+    masks = methodology.availability_mask(positions)
+    base_coefficients = methodology.combinations[masks]
+    coefficient_totals = base_coefficients.sum(axis=1)
+
+    base_weights = methodology.pillar_weights / methodology.pillar_weights.sum()
+    concentration = methodology.weight_concentration * base_weights
+
+    batch_size = max(1, BATCH_CELLS // max(len(scores), len(targets) * len(PILLARS), 1))
+    samples: List[np.ndarray] = []
+    for start in range(0, n_resamples, batch_size):
+        batch = min(batch_size, n_resamples - start)
+
+        # Resample every group's observations with replacement
+        draws = starts[group_ids] + (rng.random((batch, len(scores))) * sizes[group_ids]).astype(np.int64)
+        draw_weights = weights[draws]
+        slots = (np.arange(batch)[:, None] * n_groups + group_ids[None, :]).ravel()
+        numerator = np.bincount(slots, weights=(scores[draws] * draw_weights).ravel(), minlength=batch * n_groups)
+        denominator = np.bincount(slots, weights=draw_weights.ravel(), minlength=batch * n_groups)
+        pillar_means = (numerator / denominator).reshape(batch, n_groups)
+
+        # (batch, targets, pillars) pillar scores, zero where the pillar is missing
+        tensor = np.where(available[None], pillar_means[:, group_index], 0.0)
+
+        # Perturb pillar weights, then rescale each row to its rule's total weight
+        factors = rng.dirichlet(concentration, size=batch) / base_weights
+        coefficients = base_coefficients[None] * factors[:, None, :]
+        coefficients *= (coefficient_totals / coefficients.sum(axis=2))[..., None]
+
+        samples.append(np.einsum('btp,btp->bt', coefficients, tensor))
+
+    return np.percentile(np.concatenate(samples), PERCENTILES, axis=0).T
+
+
+def _resampling_layout(observations: pd.DataFrame, targets: pd.MultiIndex, methodology: 'Methodology'
+                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Observations sorted by (iso3, year, pillar) group, plus each target's group per pillar
+
+    Carried-forward pillars point at the group of the survey year they were
+    carried from, found with the same as-of join as the point estimate.
+    """
+    obs = observations.assign(pillar=observations['trust_type'].map(TRUST_TYPE_PILLARS))
+    obs = obs[obs['pillar'].notna()]
+    obs = obs.assign(
+        score_0_100=obs['score_0_100'].astype(float),
+        weight=methodology.source_weight(obs['pillar'], obs['source']),
+        group=obs.groupby(['iso3', 'year', 'pillar'], sort=True).ngroup()
+    ).sort_values('group', kind='stable')
+
+    group_ids = obs['group'].to_numpy(dtype=np.int64)
+    sizes = np.bincount(group_ids)
+    starts = np.cumsum(sizes) - sizes
+
+    group_keys = obs.drop_duplicates('group')
+    positions = (
+        pd.Series(group_keys['group'].to_numpy(dtype=float),
+                  index=pd.MultiIndex.from_frame(group_keys[['iso3', 'year', 'pillar']]))
+        .unstack('pillar')
+        .reindex(columns=PILLARS)
+    )
+    positions.columns.name = None
+    positions[SOURCE_MASK_COLUMNS] = 0
+    carried = carry_forward(
+        positions, targets, methodology.carried_pillars, methodology.max_data_age_years,
+        methodology.survey_grace_years, methodology.decay_after_grace
+    )
+
+    return (
+        obs['score_0_100'].to_numpy(), obs['weight'].to_numpy(dtype=float),
+        group_ids, starts, sizes, carried[PILLARS].to_numpy(dtype=float)
+    )
@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Tests import the ETL as the jobs do, from the project root
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+
+@pytest.fixture
+def db():
+    """Connection to the migrated Postgres named by POSTGRES_*; skips the test without one"""
+    import psycopg2
+    from etl.lib.db import connection_params
+
+    try:
+        conn = psycopg2.connect(**connection_params())
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres unavailable: {e}")
+    yield conn
+    conn.rollback()
+    conn.close()
+
+
+@pytest.fixture
+def seed_observations(db):
+    """seed(prefix, observations, extra_codes=()) loads test countries and observations
+
+    Country codes follow the synthetic prefix + five-digit pattern. Every row
+    under a seeded prefix is removed before seeding and again after the test.
+    """
+    from etl.lib.synthetic import cleanup, copy_observations, insert_countries
+
+    prefixes = []
+
+    def seed(prefix, observations, extra_codes=()):
+        prefixes.append(prefix)
+        cleanup(db, prefix)
+        insert_countries(db, sorted({*observations['iso3'], *extra_codes}), prefix)
+        with db.cursor() as cur:
+            copy_observations(cur, observations.astype({'sample_n': 'Int64'}))
+        db.commit()
+        return observations
+
+    yield seed
+    db.rollback()
+    for prefix in prefixes:
+        cleanup(db, prefix)
@@ -0,0 +1,165 @@
+"""
+Tests - Grouped pillar aggregation against the per-row folding it replaced
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.pipelines.aggregation import OBSERVATION_COLUMNS, PILLARS, TRUST_TYPE_PILLARS, aggregate_pillars
+from etl.pipelines.methodology import load_methodology
+
+
+def observations(rows):
+    return pd.DataFrame(
+        [(iso3, year, source, trust_type, score, None) for iso3, year, source, trust_type, score in rows],
+        columns=OBSERVATION_COLUMNS,
+    )
+
+
+def fold_rows(frame, weights=None):
+    """The previous assembler loop: fold each row into its pillar in turn
+
+    Without weights this is the old running pairwise average; with a
+    {(pillar, source): weight} dict it folds running weighted sums instead.
+    """
+    countries = {}
+    for row in frame.itertuples(index=False):
+        pillar = TRUST_TYPE_PILLARS.get(row.trust_type)
+        if pillar is None:
+            continue
+        country = countries.setdefault((row.iso3, row.year), {'sources_used': {}, 'sums': {}})
+        if weights is None:
+            current = country.get(pillar)
+            country[pillar] = row.score_0_100 if current is None else (current + row.score_0_100) / 2
+        else:
+            weight = weights[(pillar, row.source)]
+            total, weight_sum = country['sums'].get(pillar, (0.0, 0.0))
+            country['sums'][pillar] = (total + weight * row.score_0_100, weight_sum + weight)
+            country[pillar] = country['sums'][pillar][0] / country['sums'][pillar][1]
+        used = country['sources_used'].setdefault(pillar, [])
+        if row.source not in used:
+            used.append(row.source)
+    return countries
+
+
+def sources_used(frame, iso3, year):
+    """Decode the per-pillar source masks of one country-year"""
+    row = frame.loc[(iso3, year)]
+    sources = frame.attrs['sources']
+    return {
+        pillar: {s for i, s in enumerate(sources) if int(row[f"{pillar}_sources"]) >> i & 1}
+        for pillar in PILLARS
+        if int(row[f"{pillar}_sources"])
+    }
+
+
+def assert_matches_fold(frame, folded):
+    assert sorted(frame.index) == sorted(folded)
+    for (iso3, year), expected in folded.items():
+        row = frame.loc[(iso3, year)]
+        for pillar in PILLARS:
+            if pillar in expected:
+                assert row[pillar] == pytest.approx(expected[pillar]), (iso3, year, pillar)
+            else:
+                assert np.isnan(row[pillar]), (iso3, year, pillar)
+        assert sources_used(frame, iso3, year) == {p: set(s) for p, s in expected['sources_used'].items()}
+
+
+def random_observations(seed, per_pillar):
+    """Random observations with up to per_pillar sources per country-year pillar"""
+    rng = np.random.default_rng(seed)
+    sources = {
+        'interpersonal': [('WVS', 'interpersonal'), ('ESS', 'interpersonal')],
+        'institutional': [('WVS', 'institutional'), ('ESS', 'institutional'), ('OECD', 'institutional')],
+        'governance': [('CPI', 'cpi'), ('WGI', 'wgi'), ('CPI', 'governance')],
+    }
+    rows = []
+    for country in range(20):
+        for year in (2020, 2021, 2022):
+            for candidates in sources.values():
+                count = rng.integers(0, per_pillar + 1)
+                picks = rng.choice(len(candidates), size=min(count, len(candidates)), replace=False)
+                for i in picks:
+                    source, trust_type = candidates[i]
+                    rows.append((f"C{country:02d}", year, source, trust_type, round(float(rng.uniform(0, 100)), 2)))
+    return observations(rows)
+
+
+def test_mixed_sources_match_row_folding():
+    frame = observations([
+        ('AAA', 2022, 'CPI', 'cpi', 40.0),
+        ('AAA', 2022, 'WGI', 'wgi', 60.0),
+        ('AAA', 2022, 'WVS', 'interpersonal', 30.0),
+        ('AAA', 2022, 'ESS', 'interpersonal', 50.0),
+        ('AAA', 2022, 'OECD', 'institutional', 45.0),
+        ('AAA', 2022, 'MEDIA', 'media', 99.0),  # feeds no pillar
+        ('BBB', 2022, 'CPI', 'governance', 70.0),
+        ('BBB', 2021, 'WVS', 'institutional', 20.0),
+    ])
+    result = aggregate_pillars(frame)
+
+    assert_matches_fold(result, fold_rows(frame))
+    assert result.loc[('AAA', 2022), 'governance'] == pytest.approx(50.0)
+    assert sources_used(result, 'AAA', 2022)['governance'] == {'CPI', 'WGI'}
+
+
+def test_random_observations_match_row_folding():
+    # With at most two observations per pillar the running average is the mean
+    frame = random_observations(seed=7, per_pillar=2)
+    assert_matches_fold(aggregate_pillars(frame), fold_rows(frame))
+
+
+def test_missing_pillars_are_nan_with_empty_masks():
+    frame = observations([
+        ('AAA', 2022, 'CPI', 'cpi', 40.0),
+        ('BBB', 2022, 'MEDIA', 'media', 10.0),
+    ])
+    result = aggregate_pillars(frame)
+
+    assert list(result.index) == [('AAA', 2022)]
+    row = result.loc[('AAA', 2022)]
+    assert np.isnan(row['interpersonal']) and np.isnan(row['institutional'])
+    assert row['interpersonal_sources'] == 0 and row['institutional_sources'] == 0
+    assert row['governance'] == 40.0
+
+
+def test_no_pillar_observations():
+    result = aggregate_pillars(observations([('AAA', 2022, 'MEDIA', 'media', 10.0)]))
+    assert result.empty
+    assert result.attrs['sources'] == ()
+
+
+def test_source_weights_match_weighted_folding():
+    methodology = load_methodology()
+    frame = observations([
+        ('AAA', 2022, 'WVS', 'institutional', 30.0),
+        ('AAA', 2022, 'ESS', 'institutional', 60.0),
+        ('AAA', 2022, 'OECD', 'institutional', 90.0),
+        ('AAA', 2022, 'NEW', 'institutional', 10.0),  # unlisted: mean institutional weight
+        ('AAA', 2022, 'CPI', 'cpi', 40.0),
+        ('AAA', 2022, 'WGI', 'wgi', 80.0),
+    ])
+    pillars = frame['trust_type'].map(TRUST_TYPE_PILLARS)
+    weights = dict(zip(zip(pillars, frame['source']), methodology.source_weight(pillars, frame['source'])))
+    assert weights[('institutional', 'NEW')] == pytest.approx((0.4 + 0.3 + 0.3) / 3)
+
+    result = aggregate_pillars(frame, methodology)
+
+    assert_matches_fold(result, fold_rows(frame, weights))
+    expected = (0.4 * 30 + 0.3 * 60 + 0.3 * 90 + weights[('institutional', 'NEW')] * 10) / (1.0 + 1 / 3)
+    assert result.loc[('AAA', 2022), 'institutional'] == pytest.approx(expected)
+    assert result.loc[('AAA', 2022), 'governance'] == pytest.approx(60.0)
+
+
+@pytest.mark.parametrize('with_methodology', [False, True])
+def test_row_order_does_not_change_results(with_methodology):
+    methodology = load_methodology() if with_methodology else None
+    frame = random_observations(seed=11, per_pillar=3)
+    expected = aggregate_pillars(frame, methodology)
+
+    for seed in range(5):
+        shuffled = frame.sample(frac=1, random_state=seed).reset_index(drop=True)
+        result = aggregate_pillars(shuffled, methodology)
+        pd.testing.assert_frame_equal(result.sort_index(), expected.sort_index())
+        assert result.attrs['sources'] == expected.attrs['sources']
@@ -0,0 +1,171 @@
+"""
+Tests - Conditional revalidation and resumable transfers against a local HTTP server
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from etl.lib.downloader import AsyncDownloader, DownloadRequest
+
+BODY = b''.join(f"Country,CPI 2024,Rank\nCountry {i:03d},{i % 100},{i}\n".encode() for i in range(2000))
+ETAG = '"cpi-2024-v1"'
+LAST_MODIFIED = 'Tue, 01 Oct 2024 12:00:00 GMT'
+
+
+class SourceHandler(BaseHTTPRequestHandler):
+    """Serves one file with ETag/Last-Modified validators and single byte ranges"""
+    body = BODY
+    etag = ETAG
+    last_modified = LAST_MODIFIED
+    requests: list = []
+
+    def do_GET(self):
+        headers = dict(self.headers)
+        type(self).requests.append(headers)
+
+        if self._not_modified(headers):
+            self._respond(304)
+            return
+
+        range_header = headers.get('Range')
+        if range_header and headers.get('If-Range') in (None, self.etag):
+            start = int(range_header.removeprefix('bytes=').rstrip('-'))
+            self._respond(206, self.body[start:], {
+                'Content-Range': f"bytes {start}-{len(self.body) - 1}/{len(self.body)}"
+            })
+            return
+
+        self._respond(200, self.body)
+
+    def _not_modified(self, headers) -> bool:
+        if 'If-None-Match' in headers:
+            return self.etag is not None and headers['If-None-Match'] == self.etag
+        return 'If-Modified-Since' in headers and headers['If-Modified-Since'] == self.last_modified
+
+    def _respond(self, status, body=b'', extra=None):
+        self.send_response(status)
+        if self.etag:
+            self.send_header('ETag', self.etag)
+        self.send_header('Last-Modified', self.last_modified)
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local source server; tests adjust SourceHandler's class attributes to change the file"""
+    SourceHandler.body, SourceHandler.etag, SourceHandler.last_modified = BODY, ETAG, LAST_MODIFIED
+    SourceHandler.requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), SourceHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/cpi.csv"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    return AsyncDownloader(tmp_path / 'raw', retries=0)
+
+
+def fetch(downloader, url, force=False):
+    [result] = downloader.download([DownloadRequest(url, 'CPI', 2024, 'cpi.csv')], force=force)
+    return result
+
+
+def test_first_download_records_validators(downloader, server):
+    result = fetch(downloader, server)
+
+    assert result.status == 'downloaded'
+    assert result.path.read_bytes() == BODY
+    assert result.bytes_received == len(BODY)
+    manifest = json.loads(downloader.manifest_path.read_text())
+    assert manifest[server]['etag'] == ETAG
+    assert manifest[server]['last_modified'] == LAST_MODIFIED
+    assert 'If-None-Match' not in SourceHandler.requests[0]
+
+
+def test_unchanged_file_is_revalidated_with_etag(downloader, server):
+    path = fetch(downloader, server).path
+    mtime = path.stat().st_mtime_ns
+
+    result = fetch(downloader, server)
+
+    assert result.status == 'not_modified'
+    assert result.bytes_received == 0
+    assert path.stat().st_mtime_ns == mtime
+    assert SourceHandler.requests[-1]['If-None-Match'] == ETAG
+    assert SourceHandler.requests[-1]['If-Modified-Since'] == LAST_MODIFIED
+
+
+def test_unchanged_file_is_revalidated_with_last_modified(downloader, server):
+    SourceHandler.etag = None
+    fetch(downloader, server)
+
+    result = fetch(downloader, server)
+
+    assert result.status == 'not_modified'
+    assert 'If-None-Match' not in SourceHandler.requests[-1]
+    assert SourceHandler.requests[-1]['If-Modified-Since'] == LAST_MODIFIED
+
+
+def test_changed_file_is_downloaded_again(downloader, server):
+    fetch(downloader, server)
+    SourceHandler.body, SourceHandler.etag = BODY + b'Country 999,50,999\n', '"cpi-2024-v2"'
+
+    result = fetch(downloader, server)
+
+    assert result.status == 'downloaded'
+    assert result.path.read_bytes() == SourceHandler.body
+
+
+def test_force_skips_revalidation(downloader, server):
+    fetch(downloader, server)
+
+    result = fetch(downloader, server, force=True)
+
+    assert result.status == 'downloaded'
+    assert 'If-None-Match' not in SourceHandler.requests[-1]
+
+
+def interrupted(downloader, url, received):
+    """Leave the state of a transfer that stopped after `received` bytes"""
+    path = downloader.target_path(DownloadRequest(url, 'CPI', 2024, 'cpi.csv'))
+    path.parent.mkdir(parents=True)
+    path.with_name(path.name + '.part').write_bytes(BODY[:received])
+    downloader.manifest[url] = {'partial_etag': ETAG}
+    return path
+
+
+def test_partial_file_is_resumed_with_range(downloader, server):
+    path = interrupted(downloader, server, 10_000)
+
+    result = fetch(downloader, server)
+
+    assert result.status == 'resumed'
+    assert result.bytes_received == len(BODY) - 10_000
+    assert path.read_bytes() == BODY
+    assert not path.with_name(path.name + '.part').exists()
+    assert SourceHandler.requests[-1]['Range'] == 'bytes=10000-'
+    assert SourceHandler.requests[-1]['If-Range'] == ETAG
+    assert downloader.manifest[server]['etag'] == ETAG
+
+
+def test_partial_file_restarts_when_upstream_changed(downloader, server):
+    path = interrupted(downloader, server, 10_000)
+    SourceHandler.body, SourceHandler.etag = b'Country,CPI 2024,Rank\n' + BODY[:500], '"cpi-2024-v2"'
+
+    result = fetch(downloader, server)
+
+    assert result.status == 'downloaded'
+    assert path.read_bytes() == SourceHandler.body
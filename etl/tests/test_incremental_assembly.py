@@ -0,0 +1,231 @@
+"""
+Tests - Incremental assembly against a full rebuild (needs Postgres, see the db fixture)
+"""
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.lib.synthetic import copy_observations
+from etl.jobs.cpi import OBSERVATION_COLUMNS
+from etl.pipelines.assemble import GTIAssembler
+from etl.pipelines.quality import QualityGateError
+
+# Test country codes, never real ISO3 codes
+PREFIX = 'ZT'
+
+COMPARED = [
+    'iso3', 'year', 'interpersonal', 'institutional', 'governance', 'gti',
+    'confidence_score', 'confidence_tier', 'sources_used',
+]
+
+
+def code(i: int) -> str:
+    return f"{PREFIX}{i:05d}"
+
+
+def observation(iso3, year, source, trust_type, score, sample_n=None):
+    return (iso3, year, source, trust_type, score, 'test', score, sample_n, 'test', None)
+
+
+def frame(rows) -> pd.DataFrame:
+    observations = pd.DataFrame(rows, columns=OBSERVATION_COLUMNS)
+    return observations.astype({'sample_n': 'Int64'})
+
+
+def make_observations(n_countries: int = 4, years=range(2008, 2021), seed: int = 3) -> pd.DataFrame:
+    """Annual CPI/WGI governance plus WVS survey waves every four years"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_countries):
+        for year in years:
+            for source in ('CPI', 'WGI'):
+                rows.append(observation(code(i), year, source, 'governance', round(float(rng.uniform(20, 80)), 2)))
+            if (year - i) % 4 == 0:
+                for trust_type in ('interpersonal', 'institutional'):
+                    rows.append(observation(code(i), year, 'WVS', trust_type,
+                                            round(float(rng.uniform(10, 70)), 2), int(rng.integers(800, 1500))))
+    return frame(rows)
+
+
+@pytest.fixture
+def seeded(seed_observations):
+    return seed_observations(PREFIX, make_observations(), [code(9)])
+
+
+def stored(conn):
+    """Test rows of country_year, numerics as rounded floats"""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT {', '.join(COMPARED)} FROM country_year
+            WHERE iso3 LIKE %s ORDER BY iso3, year
+        """, (f"{PREFIX}%",))
+        rows = cur.fetchall()
+    conn.commit()
+    return [
+        tuple(round(float(v), 9) if isinstance(v, Decimal) else v for v in row)
+        for row in rows
+    ]
+
+
+def dirty_test_keys(assembler, conn):
+    keys, _ = assembler.find_dirty_keys(conn)
+    conn.commit()
+    return [k for k in keys if k[0].startswith(PREFIX)]
+
+
+def change_observations(conn) -> None:
+    """Update, delete and insert observations, including every observation of two country-years"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE observations SET score_0_100 = score_0_100 + 7, raw_value = raw_value + 7
+            WHERE iso3 = %s AND year = 2012 AND source = 'CPI'
+        """, (code(1),))
+        cur.execute("DELETE FROM observations WHERE iso3 = %s AND year = 2016", (code(0),))
+        cur.execute("DELETE FROM observations WHERE iso3 = %s AND year = 2010", (code(2),))
+        # Drop a survey wave, so later years lose the pillar it carried forward
+        cur.execute("DELETE FROM observations WHERE iso3 = %s AND year = 2011 AND source = 'WVS'", (code(3),))
+    copy_observations(conn.cursor(), frame([
+        observation(code(1), 2021, 'CPI', 'governance', 55.0),
+        # A country with interpersonal data alone never gets a GTI
+        observation(code(9), 2022, 'WVS', 'interpersonal', 40.0, 1000),
+    ]))
+    conn.commit()
+
+
+def version_count(conn) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM country_year_versions")
+        count = cur.fetchone()[0]
+    conn.commit()
+    return count
+
+
+def run(assembler, conn, engine, **options):
+    if engine == 'sql':
+        return assembler.assemble_sql(conn, **options)
+    return assembler.assemble(conn, **options)
+
+
+@pytest.mark.parametrize('engine', ['python', 'sql'])
+@pytest.mark.parametrize('publish', [True, False])
+def test_incremental_matches_full_rebuild(db, seeded, engine, publish):
+    assembler = GTIAssembler()
+    versions = version_count(db)
+    run(assembler, db, engine, publish=publish)
+    before = stored(db)
+    # Only a published full rebuild creates a version
+    assert version_count(db) == versions + publish
+    assert (code(0), 2016) in [row[:2] for row in before]
+    # A full rebuild clears the change log it recomputed
+    assert dirty_test_keys(assembler, db) == []
+
+    change_observations(db)
+    dirty = dirty_test_keys(assembler, db)
+    assert (code(0), 2016) in dirty and (code(9), 2022) in dirty
+
+    versions = version_count(db)
+    run(assembler, db, engine, incremental=True, publish=publish)
+    incremental = stored(db)
+    # Partial runs upsert into the live table
+    assert version_count(db) == versions
+
+    keys = [row[:2] for row in incremental]
+    assert (code(0), 2016) not in keys
+    assert (code(2), 2010) not in keys
+    assert (code(9), 2022) not in keys
+    assert (code(1), 2021) in keys
+    assert incremental != before
+    # Country-years without a GTI do not stay dirty
+    assert dirty_test_keys(assembler, db) == []
+
+    run(assembler, db, engine, publish=publish)
+    assert stored(db) == incremental
+
+
+def test_incremental_with_no_changes_writes_nothing(db, seeded):
+    assembler = GTIAssembler()
+    assembler.assemble(db)
+    before = stored(db)
+
+    result = assembler.assemble(db, incremental=True)
+
+    assert len(result) == 0 or all(not iso3.startswith(PREFIX) for iso3 in result.iso3)
+    assert stored(db) == before
+    assert not assembler.changed
+    assert not assembler.export_outputs(db, snapshots=False)
+
+
+@pytest.mark.parametrize('engine', ['python', 'sql'])
+def test_delete_only_run_exports(db, seeded, engine, tmp_path):
+    assembler = GTIAssembler()
+    run(assembler, db, engine)
+    # The last year of a country without a survey wave: nothing is recomputed, one row goes
+    with db.cursor() as cur:
+        cur.execute("DELETE FROM observations WHERE iso3 = %s AND year = 2020", (code(1),))
+    db.commit()
+
+    run(assembler, db, engine, incremental=True)
+
+    assert (code(1), 2020) not in [row[:2] for row in stored(db)]
+    assert assembler.changed
+    assert assembler.export_outputs(db, snapshots=False, cache_path=tmp_path / 'country_year.bin')
+    assert (tmp_path / 'country_year.bin').exists()
+
+
+@pytest.mark.parametrize('engine', ['python', 'sql'])
+def test_year_limited_run_upserts_without_a_version(db, seeded, engine):
+    assembler = GTIAssembler()
+    run(assembler, db, engine)
+    before = stored(db)
+    versions = version_count(db)
+
+    change_observations(db)
+    run(assembler, db, engine, years=[2012])
+
+    assert version_count(db) == versions
+    after = stored(db)
+    assert [row for row in after if row[1] != 2012] == [row for row in before if row[1] != 2012]
+    assert [row for row in after if row[1] == 2012] != [row for row in before if row[1] == 2012]
+
+
+def stored_flags(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT iso3, year FROM quality_flags
+            WHERE iso3 LIKE %s AND check_name = 'yoy_outlier'
+        """, (f"{PREFIX}%",))
+        rows = cur.fetchall()
+    conn.commit()
+    return set(rows)
+
+
+@pytest.mark.parametrize('engine', ['python', 'sql'])
+@pytest.mark.parametrize('publish', [True, False])
+def test_strict_qa_failure_leaves_country_year_untouched(db, seeded, engine, publish):
+    assembler = GTIAssembler()
+    run(assembler, db, engine, publish=publish)
+    before = stored(db)
+    versions = version_count(db)
+
+    # A governance jump far above the outlier threshold
+    with db.cursor() as cur:
+        cur.execute("""
+            UPDATE observations SET score_0_100 = CASE WHEN year = 2014 THEN 1 ELSE 99 END
+            WHERE iso3 = %s AND year IN (2014, 2015) AND trust_type = 'governance'
+        """, (code(0),))
+    db.commit()
+
+    with pytest.raises(QualityGateError):
+        run(assembler, db, engine, publish=publish, qa=True, strict_qa=True)
+    db.rollback()
+
+    assert stored(db) == before
+    assert version_count(db) == versions
+    assert (code(0), 2015) not in stored_flags(db)
+
+    run(assembler, db, engine, publish=publish, qa=True)
+    assert stored(db) != before
+    assert (code(0), 2015) in stored_flags(db)
@@ -0,0 +1,132 @@
+"""
+Tests - What-if scenarios against the methodology's GTI combinations
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.jobs.cpi import OBSERVATION_COLUMNS
+from etl.pipelines.aggregation import PILLARS
+from etl.pipelines.assemble import GTIAssembler
+from etl.pipelines.methodology import PILLAR_BITS, load_methodology
+from etl.pipelines.scenarios import ScenarioEngine, compile_scenario
+
+# Test country codes, never real ISO3 codes
+PREFIX = 'ZU'
+
+# Pillars each test country reports: every availability mask the methodology scores, and one it does not
+COUNTRY_PILLARS = [
+    ('interpersonal', 'institutional', 'governance'),
+    ('institutional', 'governance'),
+    ('interpersonal', 'governance'),
+    ('interpersonal', 'institutional'),
+    ('governance',),
+    ('interpersonal',),
+]
+
+PILLAR_SOURCES = {'interpersonal': 'WVS', 'institutional': 'WVS', 'governance': 'CPI'}
+
+
+@pytest.fixture(scope='module')
+def methodology():
+    return load_methodology()
+
+
+def engine_for(rows, methodology):
+    """ScenarioEngine over (interpersonal, institutional, governance) rows for one year"""
+    pillars = np.array([[row.get(p, np.nan) for p in PILLARS] for row in rows])
+    return ScenarioEngine([f"C{i}" for i in range(len(rows))], [2020] * len(rows), pillars, methodology)
+
+
+def test_weights_keep_two_pillar_reweighting(methodology):
+    engine = engine_for([{'institutional': 60.0, 'governance': 70.0}], methodology)
+
+    results = engine.evaluate([{'institutional': 0.4}, {'institutional': 0.9}])
+
+    # methodology.yaml: institutional_governance is 0.6 * institutional + 0.4 * governance
+    np.testing.assert_allclose(results.gti[:, 0], [64.0, 64.0])
+
+
+def test_weights_replace_the_primary_formula(methodology):
+    engine = engine_for([{'interpersonal': 50.0, 'institutional': 60.0, 'governance': 70.0}], methodology)
+
+    results = engine.evaluate([
+        {'interpersonal': 0.3, 'institutional': 0.4, 'governance': 0.3},
+        {'interpersonal': 1.0, 'institutional': 1.0, 'governance': 2.0},
+    ])
+
+    np.testing.assert_allclose(results.gti[:, 0], [60.0, 62.5])
+
+
+def test_rules_override_two_pillar_reweighting(methodology):
+    scenario = {
+        'weights': {'institutional': 0.5},
+        'rules': {'two_pillar_reweighting': {'institutional_governance': '0.5 * institutional + 0.5 * governance'}},
+    }
+    engine = engine_for([{'institutional': 60.0, 'governance': 70.0}, {'interpersonal': 50.0, 'governance': 70.0}],
+                        methodology)
+
+    results = engine.evaluate([scenario])
+
+    # interpersonal_governance is not overridden and keeps its 0.5 / 0.5 rule
+    np.testing.assert_allclose(results.frame(0).sort_values('iso3')['gti'], [65.0, 60.0])
+
+    # Masks the scenario sets neither by weights nor by rules keep the methodology's rows
+    table = compile_scenario(scenario, methodology)
+    institutional_governance = PILLAR_BITS[PILLARS.index('institutional')] | PILLAR_BITS[PILLARS.index('governance')]
+    changed = {int(PILLAR_BITS.sum()), int(institutional_governance)}
+    untouched = [m for m in range(len(table)) if m not in changed]
+    np.testing.assert_array_equal(table[untouched], methodology.combinations[untouched])
+
+
+def observation(iso3, year, source, trust_type, score):
+    sample_n = 1000 if source == 'WVS' else None
+    return (iso3, year, source, trust_type, score, 'test', score, sample_n, 'test', None)
+
+
+@pytest.fixture
+def seeded(seed_observations):
+    rng = np.random.default_rng(5)
+    codes = [f"{PREFIX}{i:05d}" for i in range(len(COUNTRY_PILLARS))]
+    rows = [
+        observation(iso3, year, PILLAR_SOURCES[pillar], pillar, round(float(rng.uniform(10, 90)), 2))
+        for iso3, pillars in zip(codes, COUNTRY_PILLARS)
+        for year in (2018, 2019, 2020)
+        for pillar in pillars
+    ]
+    seed_observations(PREFIX, pd.DataFrame(rows, columns=OBSERVATION_COLUMNS))
+    return codes
+
+
+def test_baseline_scenario_reproduces_country_year_gti(db, seeded, methodology):
+    GTIAssembler().assemble(db, years=[2018, 2019, 2020], publish=False)
+    with db.cursor() as cur:
+        cur.execute("""
+            SELECT iso3, year, gti::float8 FROM country_year
+            WHERE iso3 LIKE %s AND gti IS NOT NULL
+        """, (f"{PREFIX}%",))
+        stored = pd.DataFrame(cur.fetchall(), columns=['iso3', 'year', 'gti'])
+    db.commit()
+    # Every mask with a methodology rule is scored
+    assert stored['iso3'].nunique() == len(COUNTRY_PILLARS) - 1
+
+    engine = ScenarioEngine.from_database(db, [2018, 2019, 2020], methodology)
+    baseline = {'weights': dict(zip(PILLARS, methodology.pillar_weights.tolist()))}
+    results = engine.evaluate([{}, baseline])
+
+    for scenario in range(len(results)):
+        frame = results.frame(scenario)
+        merged = stored.merge(frame[frame['iso3'].str.startswith(PREFIX)], on=['iso3', 'year'],
+                              how='outer', suffixes=('_stored', '_scenario'))
+        assert len(merged) == len(stored)
+        np.testing.assert_allclose(merged['gti_scenario'], merged['gti_stored'], rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('weights', [
+    {'interpersonal': 0, 'institutional': 0, 'governance': 0},
+    {'institutional': -0.1},
+])
+def test_invalid_weights_are_rejected(methodology, weights):
+    with pytest.raises(ValueError):
+        compile_scenario(weights, methodology)
@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 """
 Development seed script for Global Trust Index
-Loads reference countries and creates mock observations
+Loads reference countries and creates mock observations, or streams seeded synthetic data at scale
 """
 
-import os
 import sys
 import csv
+import time
+import click
 from pathlib import Path
-import psycopg2
+from typing import Optional
 from psycopg2.extras import execute_values
 import random
 
@@ -16,15 +17,14 @@ import random
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-def get_db_connection():
-    """Get database connection using environment variables"""
-    return psycopg2.connect(
-        host=os.getenv('POSTGRES_HOST', 'localhost'),
-        port=os.getenv('POSTGRES_PORT', '5432'),
-        database=os.getenv('POSTGRES_DB', 'trust'),
-        user=os.getenv('POSTGRES_USER', 'trust'),
-        password=os.getenv('POSTGRES_PASSWORD', 'trust')
-    )
+from etl.lib.db import connection
+from etl.lib.synthetic import (
+    DEFAULT_SOURCES, SEED_PREFIX, cleanup, copy_observations, extra_sources, insert_countries,
+    iter_observations, rows_per_country, country_code
+)
+from etl.pipelines.assemble import GTIAssembler, parse_years
+from etl.pipelines.snapshots import snapshot_version
+from etl.pipelines.sql_engine import refresh_country_latest
 
 def load_countries(conn):
     """Load countries from reference CSV"""
@@ -86,12 +86,12 @@ def create_mock_observations(conn, countries):
     
     print(f"Created {len(observations)} mock observations")
 
-def compute_country_year(conn):
-    """Compute country_year entries from observations"""
+def compute_country_year(conn, version: str) -> int:
+    """Compute country_year entries from observations; returns the rows written"""
     with conn.cursor() as cur:
         # Simple computation: for MVP, GTI = governance score (CPI only)
         cur.execute("""
-            INSERT INTO country_year (iso3, year, governance, gti, confidence_score, confidence_tier, sources_used)
+            INSERT INTO country_year (iso3, year, governance, gti, confidence_score, confidence_tier, sources_used, version)
             SELECT 
                 o.iso3,
                 o.year,
@@ -99,7 +99,8 @@ def compute_country_year(conn):
                 o.score_0_100 as gti,  -- For MVP, GTI = governance proxy
                 1.0 as confidence_score,
                 'C' as confidence_tier,  -- Proxy only
-                jsonb_build_object('governance', jsonb_build_array('CPI')) as sources_used
+                jsonb_build_object('governance', jsonb_build_array('CPI')) as sources_used,
+                %s as version
             FROM observations o
             WHERE o.trust_type = 'governance' AND o.source = 'CPI'
             ON CONFLICT (iso3, year) DO UPDATE SET
@@ -108,14 +109,68 @@ def compute_country_year(conn):
                 confidence_score = EXCLUDED.confidence_score,
                 confidence_tier = EXCLUDED.confidence_tier,
                 sources_used = EXCLUDED.sources_used,
+                version = EXCLUDED.version,
                 computed_at = NOW()
-        """)
+        """, (version,))
         
         rows_affected = cur.rowcount
         print(f"Computed {rows_affected} country-year entries")
+        return rows_affected
 
-def main():
+def seed_synthetic(conn, n_countries: int, years, sources, seed: int, chunk_rows: int) -> int:
+    """Stream seeded synthetic observations into Postgres with one COPY per chunk
+
+    Seeded countries use SEED_PREFIX, so benchmark cleanup never deletes them.
+    """
+    insert_countries(conn, [country_code(i, SEED_PREFIX) for i in range(n_countries)], SEED_PREFIX)
+    
+    total = 0
+    started = time.perf_counter()
+    for chunk in iter_observations(n_countries, years, sources, seed, chunk_rows, prefix=SEED_PREFIX):
+        with conn.cursor() as cur:
+            copy_observations(cur, chunk)
+        conn.commit()
+        total += len(chunk)
+        elapsed = time.perf_counter() - started
+        print(f"  {total:,} observations ({total / elapsed:,.0f} rows/s)")
+    
+    return total
+
+@click.command()
+@click.option('--synthetic', is_flag=True, help='Stream seeded synthetic observations instead of the demo data')
+@click.option('--countries', 'n_countries', default=200, help='Synthetic countries to generate')
+@click.option('--observations', 'n_observations', type=int,
+              help='Target observation count; sets --countries from the expected rows per country')
+@click.option('--years', 'years_spec', default='1995-2024', help='Year range or list, e.g. 1995-2024')
+@click.option('--sources', default=','.join(dict.fromkeys(s.source for s in DEFAULT_SOURCES)),
+              help='Comma-separated built-in sources to generate')
+@click.option('--extra-sources', 'n_extra_sources', default=0, help='Additional synthetic survey sources')
+@click.option('--trust-types', default='interpersonal,institutional,governance',
+              help='Comma-separated trust types to generate')
+@click.option('--seed', default=42, help='Random seed; the same options always produce the same rows')
+@click.option('--chunk-rows', default=500000, help='Rows generated and copied per chunk')
+@click.option('--reset', is_flag=True, help='Delete previously generated synthetic rows first')
+def main(synthetic: bool, n_countries: int, n_observations: Optional[int], years_spec: str, sources: str,
+         n_extra_sources: int, trust_types: str, seed: int, chunk_rows: int, reset: bool):
     """Main seeding function"""
+    
+    # Resolve the synthetic source specs before connecting
+    if synthetic:
+        years = parse_years(years_spec)
+        source_names = {s.strip() for s in sources.split(',') if s.strip()}
+        unknown = source_names - {spec.source for spec in DEFAULT_SOURCES}
+        if unknown:
+            raise click.BadParameter(f"Unknown sources {sorted(unknown)}", param_hint='--sources')
+        type_names = {t.strip() for t in trust_types.split(',') if t.strip()}
+        specs = [
+            spec for spec in [s for s in DEFAULT_SOURCES if s.source in source_names] + extra_sources(n_extra_sources, seed)
+            if spec.trust_type in type_names
+        ]
+        if not specs:
+            raise click.BadParameter('No sources left after filtering by trust type', param_hint='--trust-types')
+        if n_observations:
+            n_countries = max(1, round(n_observations / rows_per_country(years, specs)))
+    
     try:
         # Load environment variables
         from dotenv import load_dotenv
@@ -123,30 +178,42 @@ def main():
         if env_path.exists():
             load_dotenv(env_path)
         
-        conn = get_db_connection()
-        
-        print("Starting database seeding...")
-        
-        # Load countries
-        countries = load_countries(conn)
-        
-        # Create mock observations
-        create_mock_observations(conn, countries)
-        
-        # Compute country_year aggregations
-        compute_country_year(conn)
-        
-        conn.commit()
-        print("Database seeding completed successfully!")
+        with connection() as conn:
+            if synthetic:
+                if reset:
+                    cleanup(conn, SEED_PREFIX)
+                    print("Removed existing synthetic rows")
+                print(f"Generating synthetic observations for {n_countries:,} countries, "
+                      f"{len(years)} years and {len(specs)} source series (seed {seed})...")
+                total = seed_synthetic(conn, n_countries, years, specs, seed, chunk_rows)
+                print(f"Synthetic seeding completed: {total:,} observations. "
+                      f"Run `make assemble-all` to compute scores.")
+                return
+            
+            print("Starting database seeding...")
+            
+            # Load countries
+            countries = load_countries(conn)
+            
+            # Create mock observations
+            create_mock_observations(conn, countries)
+            
+            # Compute country_year aggregations
+            assembler = GTIAssembler()
+            assembler.version = snapshot_version(assembler.methodology.version)
+            assembler.changed = compute_country_year(conn, assembler.version) > 0
+            
+            conn.commit()
+            refresh_country_latest(conn)
+            
+            # Rewrite the API snapshots and read cache for the seeded scores
+            assembler.export_outputs(conn)
+            print("Database seeding completed successfully!")
         
     except Exception as e:
+        # Uncommitted work is rolled back when the connection returns to the pool
         print(f"Error during seeding: {e}")
-        if 'conn' in locals():
-            conn.rollback()
         sys.exit(1)
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()